@@ -0,0 +1,251 @@
+# Guardar y abrir el dibujo como imagen del programa de dibujo
+# PNG para intercambiar, y un formato nativo (.lienzo) que guarda las teselas
+# del Mosaico tal como están en memoria: abrirlo es mapear el archivo y crear
+# cada tesela con frombuffer sobre el mapa, sin decodificar ni copiar.
+#
+# Formato .lienzo (enteros little-endian):
+#   cabecera   "GRAFLNZ1", ancho, alto, lado (uint32) y el fondo RGB
+#   índice     un uint64 por tesela, fila por fila: posición de sus píxeles
+#              en el archivo, o 0 si la tesela es sólo fondo
+#   teselas    píxeles RGBX fila por fila, cada tesela alineada a PAGINA
+#
+# El autoguardado escribe en un hilo aparte sólo las teselas que cambiaron,
+# en su lugar o al final del archivo, y después actualiza el índice.
+
+import mmap
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+import pygame
+
+from mosaico import Mosaico
+
+MAGIA = b"GRAFLNZ1"
+CABECERA = struct.Struct("<8sIII3Bx")
+PAGINA = 4096
+FORMATO = "RGBX"  # Orden de los bytes de cada píxel en el archivo
+
+AUTOGUARDADO_S = 5.0  # Segundos entre dos autoguardados
+
+
+def _alinear(posicion):
+    return -(-posicion // PAGINA) * PAGINA
+
+
+def _inicio_teselas(documento):
+    return _alinear(CABECERA.size + 8 * documento.columnas * documento.filas)
+
+
+def guardar_png(documento, ruta):
+    """Guarda el documento como PNG, por franjas de teselas."""
+    documento.guardar_png(ruta)
+
+
+def abrir_png(ruta, lado=None):
+    """
+    Abre una imagen (PNG u otro formato que entienda pygame) como Mosaico.
+
+    La imagen queda como base del documento: cada tesela de la base es una
+    subsuperficie de la imagen, sin copiar sus píxeles.
+    """
+    imagen = pygame.image.load(ruta)
+    documento = Mosaico(*imagen.get_size(), **({"lado": lado} if lado else {}))
+    documento.blit(imagen, (0, 0))
+    for ix, iy, rect in documento.teselas_en(documento.get_rect()):
+        documento.base[ix, iy] = imagen.subsurface(rect)
+    return documento
+
+
+def guardar_nativo(documento, ruta):
+    """
+    Escribe el documento completo en formato .lienzo.
+
+    Las teselas que son sólo fondo no se escriben. Se escribe a un archivo
+    temporal que después reemplaza al destino, así que un corte a mitad de
+    camino no deja el archivo anterior a medias.
+    """
+    indice = np.zeros(documento.columnas * documento.filas, dtype="<u8")
+    temporal = ruta + ".tmp"
+    with open(temporal, "wb") as archivo:
+        archivo.write(CABECERA.pack(MAGIA, documento.ancho, documento.alto, documento.lado, *documento.fondo))
+        posicion = _inicio_teselas(documento)
+        for (ix, iy), tesela in sorted(documento.teselas.items(), key=lambda par: par[0][::-1]):
+            archivo.seek(posicion)
+            archivo.write(pygame.image.tobytes(tesela, FORMATO))
+            indice[iy * documento.columnas + ix] = posicion
+            posicion = _alinear(archivo.tell())
+        archivo.seek(CABECERA.size)
+        archivo.write(indice.tobytes())
+        archivo.truncate(max(posicion, _inicio_teselas(documento)))
+    os.replace(temporal, ruta)
+
+
+def abrir_nativo(ruta):
+    """
+    Abre un archivo .lienzo sin decodificar ni copiar píxeles.
+
+    El archivo se mapea en memoria con copia al escribir: cada tesela es una
+    Surface sobre su parte del mapa, y recién al dibujar en ella el sistema
+    copia las páginas que cambian. El archivo en disco sólo cambia con
+    guardar_nativo o el autoguardado. Un segundo mapa de sólo lectura da la
+    base del documento, la imagen tal como estaba en el archivo.
+
+    Returns:
+        Mosaico con las teselas del archivo.
+    """
+    with open(ruta, "rb") as archivo:
+        mapa = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_COPY)
+        original = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+    if len(mapa) < CABECERA.size:
+        raise ValueError("archivo .lienzo incompleto")
+    magia, ancho, alto, lado, *fondo = CABECERA.unpack_from(mapa)
+    if magia != MAGIA:
+        raise ValueError("no es un archivo .lienzo")
+
+    documento = Mosaico(ancho, alto, lado, tuple(fondo))
+    n = documento.columnas * documento.filas
+    if len(mapa) < CABECERA.size + 8 * n:
+        raise ValueError("archivo .lienzo incompleto")
+    indice = np.frombuffer(mapa, dtype="<u8", count=n, offset=CABECERA.size)
+    vista = memoryview(mapa)  # Las teselas la mantienen viva, y con ella el mapa
+    solo_lectura = memoryview(original)
+    for i in np.flatnonzero(indice).tolist():
+        iy, ix = divmod(i, documento.columnas)
+        rect = documento.rect_tesela(ix, iy)
+        posicion = int(indice[i])
+        fin = posicion + 4 * rect.w * rect.h
+        if fin > len(mapa):
+            raise ValueError("archivo .lienzo incompleto")
+        documento.teselas[ix, iy] = pygame.image.frombuffer(vista[posicion:fin], rect.size, FORMATO)
+        documento.base[ix, iy] = pygame.image.frombuffer(solo_lectura[posicion:fin], rect.size, FORMATO)
+    return documento
+
+
+def abrir(ruta):
+    """Abre un .lienzo o una imagen como Mosaico, según la extensión."""
+    if ruta.lower().endswith(".lienzo"):
+        return abrir_nativo(ruta)
+    return abrir_png(ruta)
+
+
+def guardar(documento, ruta):
+    """Guarda el documento como .lienzo o como PNG, según la extensión."""
+    if ruta.lower().endswith(".lienzo"):
+        guardar_nativo(documento, ruta)
+    else:
+        guardar_png(documento, ruta)
+
+
+class Autoguardado:
+    """
+    Mantiene un archivo .lienzo al día con un documento.
+
+    revisar() se llama en cada vuelta del bucle: cada AUTOGUARDADO_S segundos
+    anota qué teselas cambiaron y un hilo aparte copia sus píxeles y los
+    escribe en el archivo, así que el bucle nunca espera al disco.
+
+    Se anota la versión de cada tesela antes de copiarla: si el bucle la
+    vuelve a modificar mientras el hilo la copia, queda pendiente y se
+    escribe de nuevo en el siguiente autoguardado.
+
+    La base de un documento abierto con abrir_nativo lee del archivo, que
+    el autoguardado sobrescribe: antes de escribir una tesela se copia su
+    base a memoria.
+    """
+
+    def __init__(self, documento, ruta, intervalo=AUTOGUARDADO_S):
+        """
+        Constructor de la clase Autoguardado
+        :param documento: Mosaico que se guarda
+        :param ruta: archivo .lienzo con el contenido del documento; si no existe se crea
+        :param intervalo: segundos entre dos autoguardados
+        """
+        self.documento = documento
+        self.ruta = ruta
+        self.intervalo = intervalo
+        if not os.path.exists(ruta):
+            guardar_nativo(documento, ruta)
+        self.archivo = open(ruta, "r+b")
+        self.fin = _alinear(os.path.getsize(ruta))  # Donde se añaden las teselas nuevas
+        self.indice = np.frombuffer(self._leer(CABECERA.size, 8 * documento.columnas * documento.filas),
+                                    dtype="<u8").copy()
+        self.guardadas = dict(documento.versiones)  # Versión de cada tesela que ya está en el archivo
+        self.bases_copiadas = set()  # Teselas cuya base ya no lee del archivo
+        self.ultimo = time.monotonic()
+        self._hilo = None
+
+    def _leer(self, posicion, n):
+        return os.pread(self.archivo.fileno(), n, posicion)
+
+    def pendientes(self):
+        """Teselas cuya versión en memoria no es la del archivo."""
+        versiones = self.documento.versiones
+        return [clave for clave, version in versiones.items() if self.guardadas.get(clave) != version]
+
+    def revisar(self):
+        """Lanza un autoguardado si pasó el intervalo y no hay otro en curso."""
+        if time.monotonic() - self.ultimo < self.intervalo or (self._hilo and self._hilo.is_alive()):
+            return
+        self.ultimo = time.monotonic()
+        trabajo = self._preparar()
+        if trabajo:
+            self._hilo = threading.Thread(target=self._escribir, args=trabajo, name="autoguardado", daemon=True)
+            self._hilo.start()
+
+    def guardar_ya(self):
+        """Escribe en este hilo todo lo pendiente, esperando antes al autoguardado en curso."""
+        if self._hilo is not None:
+            self._hilo.join()
+        trabajo = self._preparar()
+        if trabajo:
+            self._escribir(*trabajo)
+        self.ultimo = time.monotonic()
+
+    def cerrar(self):
+        """Guarda lo pendiente y cierra el archivo."""
+        self.guardar_ya()
+        self.archivo.close()
+
+    def _preparar(self):
+        """
+        Anota las teselas que cambiaron y les asigna lugar en el archivo.
+
+        Returns:
+            Tupla (bloques, entradas) para _escribir, o None si no hay cambios.
+        """
+        documento = self.documento
+        bloques = []   # (posición, Surface) de las teselas a escribir
+        entradas = []  # (número de tesela, posición) del índice
+        for clave in self.pendientes():
+            ix, iy = clave
+            i = iy * documento.columnas + ix
+            base = documento.base.get(clave)
+            if base is not None and clave not in self.bases_copiadas:
+                documento.base[clave] = base.copy()
+                self.bases_copiadas.add(clave)
+            tesela = documento.teselas.get(clave)
+            if tesela is None:
+                # Volvió a ser fondo: el índice la olvida; su lugar queda libre hasta guardar_nativo
+                if self.indice[i]:
+                    self.indice[i] = 0
+                    entradas.append((i, 0))
+            else:
+                if not self.indice[i]:
+                    self.indice[i] = self.fin
+                    entradas.append((i, self.fin))
+                    self.fin = _alinear(self.fin + 4 * tesela.get_width() * tesela.get_height())
+                bloques.append((int(self.indice[i]), tesela))
+            self.guardadas[clave] = documento.versiones[clave]
+        return (bloques, entradas) if bloques or entradas else None
+
+    def _escribir(self, bloques, entradas):
+        """Escribe píxeles y después el índice, para que nunca apunte a datos sin escribir."""
+        descriptor = self.archivo.fileno()
+        for posicion, tesela in bloques:
+            os.pwrite(descriptor, pygame.image.tobytes(tesela, FORMATO), posicion)
+        for i, posicion in entradas:
+            os.pwrite(descriptor, struct.pack("<Q", posicion), CABECERA.size + 8 * i)
+        os.fsync(descriptor)
@@ -0,0 +1,366 @@
+# Banco de pruebas de rendimiento de las primitivas de rasterizado
+# Corre sin ventana sobre una superficie fuera de pantalla, recorre tamaños,
+# orientaciones y colores, y mide píxeles por segundo, llamadas de Python por
+# figura y memoria pico. Además compara cada imagen contra su huella dorada
+# para que ninguna optimización cambie la salida sin que se note.
+#
+# Uso:
+#   python benchmark.py                              # mide y verifica las huellas doradas
+#   python benchmark.py -o hoy.json --base ayer.json # guarda y compara contra una base
+#   python benchmark.py --actualizar-golden          # regenera las huellas doradas
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pygame
+
+import primitivas as prim
+
+TAMANO_LIENZO = (1020, 650)
+FONDO = (255, 255, 255)
+TAMANOS = (8, 64, 256, 600)
+ORIENTACIONES = (0, 30, 45, 90, 135)  # Grados
+COLORES = ((0, 0, 0), (255, 0, 0), (12, 34, 56))
+GOLDEN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_golden.json")
+
+
+def _extremos(tam, angulo):
+    """Extremos de un segmento de longitud tam centrado en el lienzo con el ángulo dado."""
+    cx, cy = TAMANO_LIENZO[0] // 2, TAMANO_LIENZO[1] // 2
+    dx = tam / 2 * math.cos(math.radians(angulo))
+    dy = tam / 2 * math.sin(math.radians(angulo))
+    return round(cx - dx), round(cy - dy), round(cx + dx), round(cy + dy)
+
+
+def _linea(s, tam, angulo, color):
+    x1, y1, x2, y2 = _extremos(tam, angulo)
+    return prim.lineaDDA(s, x1, y1, x2, y2, color)
+
+
+def _caja(tam, angulo):
+    """Rectángulo centrado cuyas proporciones siguen el ángulo."""
+    x1, y1, x2, y2 = _extremos(tam, angulo)
+    return min(x1, x2), min(y1, y2), max(abs(x2 - x1), 1), max(abs(y2 - y1), 1)
+
+
+def _rectangulo(s, tam, angulo, color):
+    return prim.rectangle(s, *_caja(tam, angulo), color)
+
+
+def _rectangulo_relleno(s, tam, angulo, color):
+    return prim.filled_rectangle(s, *_caja(tam, angulo), color)
+
+
+def _circulo(s, tam, angulo, color):
+    return prim.circleBresenham(s, TAMANO_LIENZO[0] // 2, TAMANO_LIENZO[1] // 2, tam // 2, color)
+
+
+def _circulo_relleno(s, tam, angulo, color):
+    return prim.filled_circle_bresenham(s, TAMANO_LIENZO[0] // 2, TAMANO_LIENZO[1] // 2, tam // 2, color)
+
+
+def _elipse(s, tam, angulo, color):
+    x, y, ancho, alto = _caja(tam, angulo)
+    return prim.drawElipse(s, x + ancho // 2, y + alto // 2, ancho // 2, alto // 2, color)
+
+
+def _triangulo(s, tam, angulo, color):
+    x1, y1, x2, y2 = _extremos(tam, angulo)
+    return prim.drawTriangulo(s, [(x1, y1), (x2, y2), (x1 - (x2 - x1), y2)], color)
+
+
+def _curva(s, tam, angulo, color):
+    x1, y1, x4, y4 = _extremos(tam, angulo)
+    # Puntos de control desplazados en perpendicular a la cuerda
+    nx = round(-(y4 - y1) / 3)
+    ny = round((x4 - x1) / 3)
+    p1 = (x1 + (x4 - x1) // 3 + nx, y1 + (y4 - y1) // 3 + ny)
+    p2 = (x1 + 2 * (x4 - x1) // 3 - nx, y1 + 2 * (y4 - y1) // 3 - ny)
+    return prim.drawCurvaBezier(s, (x1, y1), p1, p2, (x4, y4), color)
+
+
+def _estrella(tam, angulo):
+    """Estrella de cinco puntas que se corta a sí misma, girada según el ángulo."""
+    cx, cy = TAMANO_LIENZO[0] // 2, TAMANO_LIENZO[1] // 2
+    return [
+        (round(cx + tam / 2 * math.cos(math.radians(angulo + 144 * i))),
+         round(cy + tam / 2 * math.sin(math.radians(angulo + 144 * i))))
+        for i in range(5)
+    ]
+
+
+def _poligono_relleno(s, tam, angulo, color):
+    return prim.filled_polygon(s, _estrella(tam, angulo), color, prim.REGLA_PAR_IMPAR)
+
+
+def _poligono_relleno_no_cero(s, tam, angulo, color):
+    return prim.filled_polygon(s, _estrella(tam, angulo), color, prim.REGLA_NO_CERO)
+
+
+def _suavizado(caso):
+    """Versión del caso con el antialiasing activado mientras dibuja."""
+    def dibujar(s, tam, angulo, color):
+        anterior = prim.SUAVIZADO
+        prim.usar_suavizado(True)
+        try:
+            return caso(s, tam, angulo, color)
+        finally:
+            prim.usar_suavizado(anterior)
+    return dibujar
+
+
+# Rutina -> (función de caso, si la orientación cambia la figura)
+RUTINAS = {
+    "lineaDDA": (_linea, True),
+    "rectangle": (_rectangulo, True),
+    "filled_rectangle": (_rectangulo_relleno, True),
+    "circleBresenham": (_circulo, False),
+    "filled_circle_bresenham": (_circulo_relleno, False),
+    "drawElipse": (_elipse, True),
+    "drawTriangulo": (_triangulo, True),
+    "drawCurvaBezier": (_curva, True),
+    "filled_polygon": (_poligono_relleno, True),
+    "filled_polygon_nonzero": (_poligono_relleno_no_cero, True),
+    "lineaDDA_aa": (_suavizado(_linea), True),
+    "circleBresenham_aa": (_suavizado(_circulo), False),
+    "drawElipse_aa": (_suavizado(_elipse), True),
+    "drawCurvaBezier_aa": (_suavizado(_curva), True),
+}
+
+
+def casos(rutinas=None):
+    """Genera (rutina, tamaño, ángulo, color) para cada caso del barrido."""
+    for nombre, (_, orientable) in RUTINAS.items():
+        if rutinas and nombre not in rutinas:
+            continue
+        for tam in TAMANOS:
+            for angulo in (ORIENTACIONES if orientable else (0,)):
+                for color in COLORES:
+                    yield nombre, tam, angulo, color
+
+
+def clave(nombre, tam, angulo, color):
+    return f"{nombre}/{tam}/{angulo}/{'-'.join(map(str, color))}"
+
+
+def _huella(superficie):
+    """Huella SHA-256 de los píxeles RGB de la superficie."""
+    return hashlib.sha256(pygame.image.tobytes(superficie, "RGB")).hexdigest()
+
+
+def _contar_llamadas(funcion):
+    """Cuenta las llamadas a funciones de Python y de C que hace una ejecución."""
+    llamadas = 0
+
+    def perfil(frame, evento, arg):
+        nonlocal llamadas
+        if evento in ("call", "c_call"):
+            llamadas += 1
+
+    sys.setprofile(perfil)
+    try:
+        funcion()
+    finally:
+        sys.setprofile(None)
+    return llamadas - 1  # La llamada a sys.setprofile(None) no cuenta
+
+
+def _memoria_pico(funcion):
+    """Memoria pico (bytes) reservada durante una ejecución, según tracemalloc."""
+    tracemalloc.start()
+    try:
+        funcion()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _cronometrar(funcion, tiempo_min):
+    """Mediana del tiempo por llamada sobre 5 tandas de al menos tiempo_min / 5 segundos."""
+    repeticiones = 1
+    while True:
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            funcion()
+        transcurrido = time.perf_counter() - inicio
+        if transcurrido >= tiempo_min / 5:
+            break
+        repeticiones *= 2
+
+    muestras = [transcurrido / repeticiones]
+    for _ in range(4):
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            funcion()
+        muestras.append((time.perf_counter() - inicio) / repeticiones)
+    return statistics.median(muestras)
+
+
+def medir_caso(nombre, tam, angulo, color, tiempo_min=0.05):
+    """
+    Mide un caso del barrido.
+
+    Returns:
+        Diccionario con el tiempo por figura, los píxeles pintados, los
+        píxeles por segundo, las llamadas por figura, la memoria pico y la
+        huella de la imagen resultante.
+    """
+    funcion = RUTINAS[nombre][0]
+    superficie = pygame.Surface(TAMANO_LIENZO, 0, 32)
+    superficie.fill(FONDO)
+    funcion(superficie, tam, angulo, color)
+
+    pixeles = pygame.surfarray.pixels2d(superficie)
+    pintados = int(np.count_nonzero(pixeles != superficie.map_rgb(FONDO)))
+    del pixeles
+    huella = _huella(superficie)
+
+    def una_figura():
+        funcion(superficie, tam, angulo, color)
+
+    segundos = _cronometrar(una_figura, tiempo_min)
+    return {
+        "rutina": nombre,
+        "tamano": tam,
+        "angulo": angulo,
+        "color": list(color),
+        "segundos": segundos,
+        "pixeles": pintados,
+        "pixeles_por_segundo": pintados / segundos if segundos else None,
+        "llamadas": _contar_llamadas(una_figura),
+        "memoria_pico": _memoria_pico(una_figura),
+        "huella": huella,
+    }
+
+
+def ejecutar(rutinas=None, tiempo_min=0.05):
+    """Corre todo el barrido y retorna el informe como diccionario serializable a JSON."""
+    resultados = [medir_caso(*caso, tiempo_min=tiempo_min) for caso in casos(rutinas)]
+    return {
+        "version": 1,
+        "entorno": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pygame": pygame.version.ver,
+            "plataforma": platform.platform(),
+        },
+        "casos": resultados,
+    }
+
+
+def comparar(informe, base, tolerancia):
+    """
+    Compara los tiempos con un informe base.
+
+    Returns:
+        Lista de (clave, aceleración) de los casos más lentos que la base por
+        encima de la tolerancia (0.2 = 20 %).
+    """
+    anteriores = {clave(c["rutina"], c["tamano"], c["angulo"], c["color"]): c for c in base["casos"]}
+    regresiones = []
+    for caso in informe["casos"]:
+        k = clave(caso["rutina"], caso["tamano"], caso["angulo"], caso["color"])
+        if k in anteriores and caso["segundos"]:
+            aceleracion = anteriores[k]["segundos"] / caso["segundos"]
+            caso["aceleracion"] = aceleracion
+            if aceleracion < 1 / (1 + tolerancia):
+                regresiones.append((k, aceleracion))
+    return regresiones
+
+
+def verificar_golden(informe, golden):
+    """Retorna las claves cuyo resultado no coincide píxel a píxel con la huella dorada."""
+    distintos = []
+    for caso in informe["casos"]:
+        k = clave(caso["rutina"], caso["tamano"], caso["angulo"], caso["color"])
+        if k in golden and golden[k] != caso["huella"]:
+            distintos.append(k)
+    return distintos
+
+
+def _resumen(informe):
+    """Imprime una línea por rutina con los totales del barrido."""
+    por_rutina = {}
+    for caso in informe["casos"]:
+        por_rutina.setdefault(caso["rutina"], []).append(caso)
+    print(f"{'rutina':<26}{'casos':>6}{'Mpx/s':>10}{'µs/figura':>12}{'llamadas':>10}{'KiB pico':>10}")
+    for nombre, lista in por_rutina.items():
+        segundos = sum(c["segundos"] for c in lista)
+        pixeles = sum(c["pixeles"] for c in lista)
+        print(f"{nombre:<26}{len(lista):>6}{pixeles / segundos / 1e6:>10.1f}"
+              f"{segundos / len(lista) * 1e6:>12.1f}"
+              f"{statistics.median(c['llamadas'] for c in lista):>10.0f}"
+              f"{max(c['memoria_pico'] for c in lista) / 1024:>10.0f}")
+
+
+def main(argv=None):
+    """Punto de entrada de la línea de comandos; retorna el código de salida."""
+    parser = argparse.ArgumentParser(description="Mide las primitivas de rasterizado sin abrir ventana.")
+    parser.add_argument("-o", "--salida", help="guarda el informe JSON en este archivo")
+    parser.add_argument("--base", help="informe JSON anterior contra el que comparar tiempos")
+    parser.add_argument("--tolerancia", type=float, default=0.2,
+                        help="lentitud admitida frente a la base antes de fallar (por defecto 0.2)")
+    parser.add_argument("--rutinas", nargs="+", choices=list(RUTINAS), help="mide sólo estas rutinas")
+    parser.add_argument("--tiempo", type=float, default=0.05,
+                        help="segundos mínimos de medición por caso (por defecto 0.05)")
+    parser.add_argument("--golden", default=GOLDEN, help="archivo de huellas doradas")
+    parser.add_argument("--actualizar-golden", action="store_true",
+                        help="reescribe las huellas doradas con la salida actual")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.init()
+
+    informe = ejecutar(args.rutinas, args.tiempo)
+    _resumen(informe)
+    codigo = 0
+
+    if args.actualizar_golden:
+        golden = {}
+        if os.path.exists(args.golden):
+            with open(args.golden, encoding="utf-8") as archivo:
+                golden = json.load(archivo)
+        for caso in informe["casos"]:
+            golden[clave(caso["rutina"], caso["tamano"], caso["angulo"], caso["color"])] = caso["huella"]
+        with open(args.golden, "w", encoding="utf-8") as archivo:
+            json.dump(golden, archivo, indent=1, sort_keys=True)
+            archivo.write("\n")
+        print(f"Huellas doradas actualizadas en {args.golden}")
+    elif os.path.exists(args.golden):
+        with open(args.golden, encoding="utf-8") as archivo:
+            distintos = verificar_golden(informe, json.load(archivo))
+        if distintos:
+            print(f"{len(distintos)} casos no coinciden con las huellas doradas:", file=sys.stderr)
+            for k in distintos:
+                print(f"  {k}", file=sys.stderr)
+            codigo = 1
+        else:
+            print("Todas las imágenes coinciden con las huellas doradas")
+
+    if args.base:
+        with open(args.base, encoding="utf-8") as archivo:
+            regresiones = comparar(informe, json.load(archivo), args.tolerancia)
+        for k, aceleracion in regresiones:
+            print(f"Regresión: {k} va a {aceleracion:.2f}x de la base", file=sys.stderr)
+        if regresiones:
+            codigo = 1
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as archivo:
+            json.dump(informe, archivo, indent=1)
+
+    pygame.quit()
+    return codigo
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,993 @@
+# Modelo de escena del programa de dibujo
+# Guarda cada figura confirmada (tipo, parámetros, color y si se dibujó con
+# antialiasing) en arreglos tipados
+# para poder reconstruir el lienzo a partir de la geometría y no de los píxeles.
+
+import math
+
+import numpy as np
+import pygame
+
+import primitivas as prim
+
+# Tipos de figura
+LINEA = 0
+RECTANGULO = 1
+RECTANGULO_RELLENO = 2
+CIRCULO = 3
+CIRCULO_RELLENO = 4
+ELIPSE = 5
+TRIANGULO = 6
+CURVA = 7
+TRIANGULO_RELLENO = 8
+RELLENO = 9  # Balde: rellena la región del punto, depende de lo ya dibujado
+TRAZO = 10  # Segmento de un trazo a mano alzada, con pincel redondo
+
+# Parámetros de cada tipo, en el orden en que se guardan
+PARAMETROS = {
+    LINEA: ("x1", "y1", "x2", "y2"),
+    RECTANGULO: ("x", "y", "ancho", "alto"),
+    RECTANGULO_RELLENO: ("x", "y", "ancho", "alto"),
+    CIRCULO: ("xc", "yc", "r"),
+    CIRCULO_RELLENO: ("xc", "yc", "r"),
+    ELIPSE: ("xc", "yc", "rx", "ry"),
+    TRIANGULO: ("x1", "y1", "x2", "y2", "x3", "y3"),
+    CURVA: ("x0", "y0", "x1", "y1", "x2", "y2", "x3", "y3"),
+    TRIANGULO_RELLENO: ("x1", "y1", "x2", "y2", "x3", "y3"),
+    RELLENO: ("x", "y", "tolerancia"),
+    TRAZO: ("x1", "y1", "x2", "y2", "radio"),
+}
+MAX_PARAMETROS = 8
+
+# Nombre de cada tipo, usado al leer y escribir figuras en archivos
+NOMBRES = {
+    LINEA: "linea",
+    RECTANGULO: "rectangulo",
+    RECTANGULO_RELLENO: "rectangulo_relleno",
+    CIRCULO: "circulo",
+    CIRCULO_RELLENO: "circulo_relleno",
+    ELIPSE: "elipse",
+    TRIANGULO: "triangulo",
+    CURVA: "curva",
+    TRIANGULO_RELLENO: "triangulo_relleno",
+    RELLENO: "relleno",
+    TRAZO: "trazo",
+}
+TIPOS = {nombre: tipo for tipo, nombre in NOMBRES.items()}
+
+# Figuras cuyo contorno cambia con el antialiasing; las demás pintan lo mismo en ambos modos
+CONTORNOS = (LINEA, RECTANGULO, CIRCULO, ELIPSE, TRIANGULO, CURVA)
+
+
+def dibujar_figura(screen, tipo, p, color):
+    """
+    Dibuja una sola figura con la primitiva que le corresponde.
+
+    Args:
+        screen: Superficie de pygame donde se dibujará
+        tipo: Tipo de figura (LINEA, RECTANGULO, ...)
+        p: Parámetros de la figura en el orden de PARAMETROS[tipo]
+        color: Color de la figura en formato RGB
+
+    Returns:
+        pygame.Rect con la zona de la superficie que se modificó.
+    """
+    if tipo == LINEA:
+        return prim.lineaDDA(screen, p[0], p[1], p[2], p[3], color)
+    elif tipo == RECTANGULO:
+        return prim.rectangle(screen, p[0], p[1], p[2], p[3], color)
+    elif tipo == RECTANGULO_RELLENO:
+        return prim.filled_rectangle(screen, p[0], p[1], p[2], p[3], color)
+    elif tipo == CIRCULO:
+        return prim.circleBresenham(screen, p[0], p[1], p[2], color)
+    elif tipo == CIRCULO_RELLENO:
+        return prim.filled_circle_bresenham(screen, p[0], p[1], p[2], color)
+    elif tipo == ELIPSE:
+        return prim.drawElipse(screen, p[0], p[1], p[2], p[3], color)
+    elif tipo == TRIANGULO:
+        return prim.drawTriangulo(screen, [(p[0], p[1]), (p[2], p[3]), (p[4], p[5])], color)
+    elif tipo == CURVA:
+        return prim.drawCurvaBezier(screen, (p[0], p[1]), (p[2], p[3]), (p[4], p[5]), (p[6], p[7]), color)
+    elif tipo == TRIANGULO_RELLENO:
+        return prim.filled_triangle(screen, [(p[0], p[1]), (p[2], p[3]), (p[4], p[5])], color)
+    elif tipo == RELLENO:
+        return prim.flood_fill(screen, p[0], p[1], color, p[2])
+    elif tipo == TRAZO:
+        return prim.trazo(screen, (p[0], p[2]), (p[1], p[3]), p[4], color)
+    raise ValueError(f"Tipo de figura desconocido: {tipo}")
+
+
+# Papel de cada parámetro al mover o escalar una figura: "x" e "y" son
+# coordenadas, "m" una medida (ancho, alto o radio) y "-" no cambia (la tolerancia)
+PAPELES = {
+    LINEA: "xyxy",
+    RECTANGULO: "xymm",
+    RECTANGULO_RELLENO: "xymm",
+    CIRCULO: "xym",
+    CIRCULO_RELLENO: "xym",
+    ELIPSE: "xymm",
+    TRIANGULO: "xyxyxy",
+    CURVA: "xyxyxyxy",
+    TRIANGULO_RELLENO: "xyxyxy",
+    RELLENO: "xy-",
+    TRAZO: "xyxym",
+}
+
+# Máscaras (tipo, parámetro) con el papel de cada parámetro, para transformar arreglos
+_ES_X, _ES_Y, _ES_MEDIDA = (
+    np.array([[papel == letra for papel in PAPELES[tipo].ljust(MAX_PARAMETROS, "-")]
+              for tipo in range(len(PAPELES))])
+    for letra in "xym"
+)
+
+
+def transformar(tipos, parametros, escala=1, dx=0, dy=0):
+    """
+    Escala y mueve varias figuras: las coordenadas pasan a c * escala + d y
+    las medidas a m * escala, redondeando al entero más cercano.
+
+    Args:
+        tipos: Arreglo con el tipo de cada figura
+        parametros: Matriz (n, MAX_PARAMETROS) con los parámetros de cada figura
+        escala: Factor de escala
+        dx, dy: Desplazamiento que se suma a las coordenadas x e y
+
+    Returns:
+        Matriz nueva de parámetros, del mismo tipo que la original.
+    """
+    tipos = np.asarray(tipos, dtype=np.intp)
+    p = np.asarray(parametros)
+    nuevos = np.where(_ES_X[tipos] | _ES_Y[tipos] | _ES_MEDIDA[tipos], p * escala, p)
+    nuevos = nuevos + np.where(_ES_X[tipos], dx, 0) + np.where(_ES_Y[tipos], dy, 0)
+    return np.rint(nuevos).astype(p.dtype)
+
+
+def transformar_figura(tipo, p, escala=1, dx=0, dy=0):
+    """Versión de transformar para una sola figura; retorna la tupla de parámetros."""
+    fila = np.zeros((1, MAX_PARAMETROS), dtype=np.int64)
+    fila[0, :len(p)] = p
+    return tuple(transformar([tipo], fila, escala, dx, dy)[0, :len(p)].tolist())
+
+
+# Transformaciones afines ---------------
+# Las Bézier cúbicas son invariantes afines: transformar sus puntos de control
+# transforma la curva. Con KAPPA cuatro de ellas aproximan un cuarto de elipse
+# cada una, con un error menor al 0,03 % del radio.
+KAPPA = 0.5522847498
+MAX_LADOS_ABANICO = 128  # Triángulos como mucho del círculo relleno convertido
+
+
+def _aplicar(matriz, x, y):
+    """Aplica la matriz 3x3 a los puntos (x, y); retorna las coordenadas con decimales."""
+    return (matriz[0, 0] * x + matriz[0, 1] * y + matriz[0, 2],
+            matriz[1, 0] * x + matriz[1, 1] * y + matriz[1, 2])
+
+
+def _puntos_elipses(xc, yc, rx, ry):
+    """Puntos de control (n, 13) en x y en y de las 4 Bézier que forman cada elipse, encadenadas."""
+    k = KAPPA
+    # Recorrido desde (xc + rx, yc) en sentido horario en pantalla, de a un cuarto
+    fx = np.array([1, 1, k, 0, -k, -1, -1, -1, -k, 0, k, 1, 1])
+    fy = np.array([0, k, 1, 1, 1, k, 0, -k, -1, -1, -1, -k, 0])
+    return xc[:, None] + rx[:, None] * fx, yc[:, None] + ry[:, None] * fy
+
+
+def transformar_afin(tipos, parametros, matriz):
+    """
+    Aplica una transformación afín a varias figuras.
+
+    Las figuras definidas por puntos (líneas, triángulos, curvas, trazos y
+    baldes) transforman sus puntos; el radio del trazo se escala con la raíz
+    del determinante. Rectángulos, círculos y elipses se guardan alineados a
+    los ejes: mientras la matriz lleve los ejes a los ejes (y, los círculos,
+    sin deformarlos) conservan su tipo, y si no se cambian por figuras de
+    puntos equivalentes: el rectángulo por 4 líneas, el rectángulo relleno
+    por 2 triángulos rellenos, el círculo y la elipse por 4 curvas, y el
+    círculo relleno por un abanico de triángulos rellenos.
+
+    Args:
+        tipos: Arreglo con el tipo de cada figura
+        parametros: Matriz (n, MAX_PARAMETROS) con los parámetros de cada figura
+        matriz: Matriz 3x3 que lleva (x, y, 1) del documento a su nuevo lugar
+
+    Returns:
+        Tupla (tipos, parametros, origen) con las figuras transformadas; origen
+        dice de qué figura sale cada una, y las de cada figura van seguidas y
+        en el orden de la original.
+    """
+    tipos = np.asarray(tipos)
+    p = np.asarray(parametros, dtype=np.float64)
+    m = np.asarray(matriz, dtype=np.float64)
+    a, b, c, d = m[0, 0], m[0, 1], m[1, 0], m[1, 1]
+    escala = math.sqrt(abs(a * d - b * c))
+    ejes = max(abs(b), abs(c)) < 1e-9 or max(abs(a), abs(d)) < 1e-9  # Lleva los ejes a los ejes
+    semejanza = math.isclose(a * a + c * c, b * b + d * d) and abs(a * b + c * d) < 1e-9  # No deforma
+
+    grupos = []  # Tuplas (origen, tipos, parametros) con las figuras que salen de cada tipo
+    for tipo in np.unique(tipos).tolist():
+        cuales = np.flatnonzero(tipos == tipo)
+        q = p[cuales]
+        nuevos = q.copy()
+
+        if tipo in (LINEA, TRIANGULO, TRIANGULO_RELLENO, CURVA, RELLENO, TRAZO):
+            xs = _ES_X[tipo]
+            nuevos[:, xs], nuevos[:, _ES_Y[tipo]] = _aplicar(m, q[:, xs], q[:, _ES_Y[tipo]])
+            if tipo == TRAZO:
+                nuevos[:, 4] = np.abs(q[:, 4]) * escala
+            grupos.append((cuales, np.full(len(q), tipo), nuevos))
+
+        elif tipo in (RECTANGULO, RECTANGULO_RELLENO) and ejes:
+            x0, y0 = _aplicar(m, q[:, 0], q[:, 1])
+            x1, y1 = _aplicar(m, q[:, 0] + q[:, 2], q[:, 1] + q[:, 3])
+            nuevos[:, :4] = np.stack([np.minimum(x0, x1), np.minimum(y0, y1),
+                                      np.abs(x1 - x0), np.abs(y1 - y0)], axis=1)
+            grupos.append((cuales, np.full(len(q), tipo), nuevos))
+
+        elif tipo in (RECTANGULO, RECTANGULO_RELLENO):
+            # Esquinas en el orden en que se recorre el contorno
+            x, y, x2, y2 = q[:, 0], q[:, 1], q[:, 0] + q[:, 2], q[:, 1] + q[:, 3]
+            ex, ey = _aplicar(m, np.stack([x, x2, x2, x], axis=1), np.stack([y, y, y2, y2], axis=1))
+            if tipo == RECTANGULO:
+                lados = np.zeros((len(q), 4, MAX_PARAMETROS))
+                lados[:, :, 0], lados[:, :, 1] = ex, ey
+                lados[:, :, 2], lados[:, :, 3] = np.roll(ex, -1, axis=1), np.roll(ey, -1, axis=1)
+                grupos.append((np.repeat(cuales, 4), np.full(4 * len(q), LINEA), lados.reshape(-1, MAX_PARAMETROS)))
+            else:
+                mitades = np.zeros((len(q), 2, MAX_PARAMETROS))
+                mitades[:, :, 0:6:2] = ex[:, [[0, 1, 2], [0, 2, 3]]]
+                mitades[:, :, 1:6:2] = ey[:, [[0, 1, 2], [0, 2, 3]]]
+                grupos.append((np.repeat(cuales, 2), np.full(2 * len(q), TRIANGULO_RELLENO),
+                               mitades.reshape(-1, MAX_PARAMETROS)))
+
+        elif tipo in (CIRCULO, CIRCULO_RELLENO) and semejanza:
+            nuevos[:, 0], nuevos[:, 1] = _aplicar(m, q[:, 0], q[:, 1])
+            nuevos[:, 2] = np.abs(q[:, 2]) * escala
+            grupos.append((cuales, np.full(len(q), tipo), nuevos))
+
+        elif tipo == CIRCULO_RELLENO:
+            # Abanico desde el centro, con tantos lados como muestras tendría la elipse
+            r = np.abs(q[:, 2])
+            lados = np.minimum(prim._muestras_elipse(r * max(abs(a) + abs(b), abs(c) + abs(d)), 0),
+                               MAX_LADOS_ABANICO)
+            for n in np.unique(lados).tolist():
+                sel = lados == n
+                t = np.linspace(0, 2 * np.pi, n)
+                bx, by = _aplicar(m, q[sel, 0:1] + r[sel, None] * np.cos(t), q[sel, 1:2] + r[sel, None] * np.sin(t))
+                cx, cy = _aplicar(m, q[sel, 0], q[sel, 1])
+                abanico = np.zeros((sel.sum(), n - 1, MAX_PARAMETROS))
+                abanico[:, :, 0], abanico[:, :, 1] = cx[:, None], cy[:, None]
+                abanico[:, :, 2], abanico[:, :, 3] = bx[:, :-1], by[:, :-1]
+                abanico[:, :, 4], abanico[:, :, 5] = bx[:, 1:], by[:, 1:]
+                grupos.append((np.repeat(cuales[sel], n - 1), np.full(sel.sum() * (n - 1), TRIANGULO_RELLENO),
+                               abanico.reshape(-1, MAX_PARAMETROS)))
+
+        elif tipo in (CIRCULO, ELIPSE) and ejes:
+            rx = np.abs(q[:, 2])
+            ry = rx if tipo == CIRCULO else np.abs(q[:, 3])
+            nuevos[:, 0], nuevos[:, 1] = _aplicar(m, q[:, 0], q[:, 1])
+            nuevos[:, 2] = abs(a) * rx + abs(b) * ry
+            nuevos[:, 3] = abs(c) * rx + abs(d) * ry
+            grupos.append((cuales, np.full(len(q), ELIPSE), nuevos))
+
+        elif tipo in (CIRCULO, ELIPSE):
+            rx = np.abs(q[:, 2])
+            ry = rx if tipo == CIRCULO else np.abs(q[:, 3])
+            px, py = _aplicar(m, *_puntos_elipses(q[:, 0], q[:, 1], rx, ry))
+            cuartos = np.zeros((len(q), 4, MAX_PARAMETROS))
+            for i in range(4):
+                cuartos[:, i, 0:8:2] = px[:, 3 * i:3 * i + 4]
+                cuartos[:, i, 1:8:2] = py[:, 3 * i:3 * i + 4]
+            grupos.append((np.repeat(cuales, 4), np.full(4 * len(q), CURVA), cuartos.reshape(-1, MAX_PARAMETROS)))
+
+        else:
+            raise ValueError(f"Tipo de figura desconocido: {tipo}")
+
+    if not grupos:
+        return np.empty(0, dtype=np.uint8), np.empty((0, MAX_PARAMETROS), dtype=np.int32), np.empty(0, dtype=np.intp)
+    origen = np.concatenate([g[0] for g in grupos])
+    orden = np.argsort(origen, kind="stable")  # Estable: cada figura conserva el orden de sus partes
+    nuevos_tipos = np.concatenate([g[1] for g in grupos]).astype(np.uint8)[orden]
+    nuevos = np.rint(np.concatenate([g[2] for g in grupos])[orden]).astype(np.int32)
+    return nuevos_tipos, nuevos, origen[orden]
+
+
+def cajas_figuras(tipos, parametros):
+    """
+    Versión vectorizada de caja_figura.
+
+    Args:
+        tipos: Arreglo con el tipo de cada figura
+        parametros: Matriz (n, MAX_PARAMETROS) con los parámetros de cada figura
+
+    Returns:
+        Matriz (n, 4) con x0, y0, x1, y1 de cada caja (x1 e y1 excluidos).
+    """
+    tipos = np.asarray(tipos)
+    p = np.asarray(parametros, dtype=np.int64)
+    cajas = np.empty((len(tipos), 4), dtype=np.int64)
+
+    for tipo in np.unique(tipos).tolist():
+        sel = tipos == tipo
+        q = p[sel]
+        if tipo in (LINEA, TRIANGULO, CURVA, TRIANGULO_RELLENO):
+            # La curva de Bézier queda dentro de la envolvente de sus puntos de control
+            n = len(PARAMETROS[tipo])
+            xs, ys = q[:, 0:n:2], q[:, 1:n:2]
+        elif tipo in (RECTANGULO, RECTANGULO_RELLENO):
+            xs = np.stack([q[:, 0], q[:, 0] + q[:, 2]], axis=1)
+            ys = np.stack([q[:, 1], q[:, 1] + q[:, 3]], axis=1)
+        elif tipo in (CIRCULO, CIRCULO_RELLENO):
+            r = np.abs(q[:, 2]) + 1  # El círculo relleno de radio 0 pinta un bloque de 3x3
+            xs = np.stack([q[:, 0] - r, q[:, 0] + r], axis=1)
+            ys = np.stack([q[:, 1] - r, q[:, 1] + r], axis=1)
+        elif tipo == ELIPSE:
+            xs = np.stack([q[:, 0] - np.abs(q[:, 2]), q[:, 0] + np.abs(q[:, 2])], axis=1)
+            ys = np.stack([q[:, 1] - np.abs(q[:, 3]), q[:, 1] + np.abs(q[:, 3])], axis=1)
+        elif tipo == TRAZO:
+            r = np.abs(q[:, 4:5])
+            xs = np.concatenate([q[:, 0:3:2] - r, q[:, 0:3:2] + r], axis=1)
+            ys = np.concatenate([q[:, 1:4:2] - r, q[:, 1:4:2] + r], axis=1)
+        elif tipo == RELLENO:
+            # La región depende del lienzo: puede llegar a cualquier parte
+            cajas[sel] = (0, 0, 1 << 16, 1 << 16)
+            continue
+        else:
+            raise ValueError(f"Tipo de figura desconocido: {tipo}")
+
+        # El trazo suavizado en diagonal llega a 2 píxeles antes y 1 después del punto
+        cajas[sel] = np.stack([xs.min(axis=1) - 2, ys.min(axis=1) - 2,
+                               xs.max(axis=1) + 2, ys.max(axis=1) + 2], axis=1)
+    return cajas
+
+
+def caja_figura(tipo, p):
+    """
+    Rectángulo que contiene todos los píxeles que puede pintar una figura,
+    incluido el grosor de los contornos (pincel de 2x2 o trazo suavizado).
+
+    Args:
+        tipo: Tipo de figura (LINEA, RECTANGULO, ...)
+        p: Parámetros de la figura en el orden de PARAMETROS[tipo]
+
+    Returns:
+        pygame.Rect con la caja envolvente de la figura.
+    """
+    if tipo not in PARAMETROS:
+        raise ValueError(f"Tipo de figura desconocido: {tipo}")
+    fila = np.zeros((1, MAX_PARAMETROS), dtype=np.int64)
+    fila[0, :len(p)] = p
+    x0, y0, x1, y1 = cajas_figuras([tipo], fila)[0].tolist()
+    return pygame.Rect(x0, y0, x1 - x0, y1 - y0)
+
+
+def _rasterizar_lote(screen, tipos, p, color, suavizado=False):
+    """
+    Rasteriza de una vez un grupo de figuras del mismo color.
+
+    Como todas comparten color el orden entre ellas no importa: los contornos
+    se juntan en una sola escritura, y los rellenos en una sola llamada a
+    fill_spans. Con antialiasing, donde dos contornos del lote se cruzan
+    queda la mayor cobertura en vez de mezclarse dos veces, así que
+    _rasterizar_figuras sólo junta contornos suavizados que no se tocan.
+
+    Args:
+        screen: Superficie de pygame donde se dibujará
+        tipos: Arreglo con el tipo de cada figura
+        p: Matriz (n, MAX_PARAMETROS) con los parámetros de cada figura
+        color: Color común de todas las figuras en formato RGB
+        suavizado: Si los contornos se trazan con antialiasing
+    """
+    redondear = not suavizado  # Con antialiasing las curvas conservan los decimales
+    clip = screen.get_clip()
+    filas = (clip.top, clip.bottom)  # Los rellenos sólo calculan las filas visibles
+    pincel = prim._alcance(clip, 1)  # Donde puede estar un centro del pincel de 2x2 que se ve
+    segmentos = []  # Tuplas (x1, y1, x2, y2) de arreglos
+    puntos = []     # Tuplas (xs, ys) de arreglos
+    spans = []      # Matrices (n, 3) de tramos
+    discos = {}     # radio -> tuplas (xs, ys) de pasos del pincel redondo
+
+    for tipo in np.unique(tipos):
+        q = p[tipos == tipo].astype(np.intp)
+
+        if tipo == LINEA:
+            segmentos.append((q[:, 0], q[:, 1], q[:, 2], q[:, 3]))
+
+        elif tipo == RECTANGULO:
+            x, y = q[:, 0], q[:, 1]
+            x2, y2 = x + q[:, 2], y + q[:, 3]
+            segmentos.append((
+                np.concatenate([x, x2, x2, x]), np.concatenate([y, y, y2, y2]),
+                np.concatenate([x2, x2, x, x]), np.concatenate([y, y2, y2, y]),
+            ))
+
+        elif tipo == TRIANGULO:
+            vx = q[:, 0:6:2]
+            vy = q[:, 1:6:2]
+            segmentos.append((
+                vx.ravel(), vy.ravel(),
+                np.roll(vx, -1, axis=1).ravel(), np.roll(vy, -1, axis=1).ravel(),
+            ))
+
+        elif tipo == RECTANGULO_RELLENO:
+            # Una fila por tramo: se repite cada rectángulo tantas veces como filas visibles tiene
+            arriba = np.clip(q[:, 1], *filas)
+            alto = np.maximum(np.clip(q[:, 1] + q[:, 3], *filas) - arriba, 0)
+            fila = np.arange(alto.sum()) - np.repeat(np.cumsum(alto) - alto, alto)
+            x = np.repeat(q[:, 0], alto)
+            spans.append(np.stack([
+                np.repeat(arriba, alto) + fila, x, x + np.repeat(q[:, 2], alto) - 1,
+            ], axis=1))
+
+        elif tipo == CIRCULO and suavizado:
+            segmentos.append(prim._segmentos_elipses(q[:, 0], q[:, 1], q[:, 2], q[:, 2], redondear=False))
+
+        elif tipo in (CIRCULO, CIRCULO_RELLENO):
+            # Los círculos del mismo radio comparten su tabla precalculada
+            for r in np.unique(q[:, 2]).tolist():
+                centros = q[q[:, 2] == r]
+                if tipo == CIRCULO:
+                    puntos.append(prim._puntos_circulos(centros[:, 0], centros[:, 1], r, pincel)[:2])
+                else:
+                    spans.append(prim._spans_circulos(centros[:, 0], centros[:, 1], r, filas)[0])
+
+        elif tipo == TRIANGULO_RELLENO:
+            spans.append(prim._spans_poligonos(q[:, 0:6:2], q[:, 1:6:2], filas=filas))
+
+        elif tipo == RELLENO:
+            # Depende de lo ya dibujado: Escena.renderizar lo deja solo en su lote
+            for x, y, tolerancia in q[:, :3].tolist():
+                prim.flood_fill(screen, x, y, color, tolerancia)
+
+        elif tipo == ELIPSE:
+            segmentos.append(prim._segmentos_elipses(q[:, 0], q[:, 1], q[:, 2], q[:, 3], redondear))
+
+        elif tipo == CURVA:
+            segmentos.append(prim._segmentos_beziers(q[:, 0:8:2], q[:, 1:8:2], redondear))
+
+        elif tipo == TRAZO:
+            # Cada segmento con su extremo final, y un solo estampado por radio
+            for r in np.unique(np.abs(q[:, 4])).tolist():
+                s = q[np.abs(q[:, 4]) == r]
+                discos.setdefault(r, []).append(prim._puntos_dda(*prim._segmentos_polilinea(s[:, 0:3:2], s[:, 1:4:2]),
+                                                                 recorte=prim._alcance(clip, r)))
+
+    if segmentos and suavizado:
+        prim._mezclar(screen, *prim._cobertura_segmentos(*prim._concatenar_segmentos(segmentos), clip), color)
+    elif segmentos:
+        x, y = prim._puntos_dda(*prim._concatenar_segmentos(segmentos), recorte=pincel)
+        puntos.append((x, y))
+    if puntos:
+        prim._estampar(screen, np.concatenate([x for x, _ in puntos]),
+                       np.concatenate([y for _, y in puntos]), color)
+    for r, pasos in discos.items():
+        prim._estampar_disco(screen, np.concatenate([x for x, _ in pasos]),
+                             np.concatenate([y for _, y in pasos]), r, color)
+    if spans:
+        prim.fill_spans(screen, np.concatenate(spans), color)
+
+
+# Lotes de varios colores ---------------
+# Con colores que se alternan figura a figura los lotes de _rasterizar_lote
+# quedan de una o dos figuras y cada uno es una escritura en la superficie.
+# _rasterizar_mezcladas calcula juntos los píxeles de todas las figuras,
+# anotando a cuál pertenece cada uno; en cada píxel gana la última figura
+# que lo pinta, como al dibujarlas en orden, y todo se escribe de una vez.
+PIXELES_LOTE = 1 << 22  # Píxeles que se calculan como mucho antes de escribir
+FIGURAS_POR_COLOR = 16  # Con lotes de un color más largos se usa _rasterizar_lote
+MAX_ZONA_MEZCLADAS = 1 << 24  # Área de recorte máxima para la matriz con la figura de cada píxel
+FIGURAS_POR_SUAVIZADO = 256  # Contornos suavizados como mucho por lote (ver _cortes_suavizados)
+
+# Una figura suelta, para armar lotes con arreglo_figuras() y dibujar_figuras()
+FIGURA = np.dtype([
+    ("tipo", np.uint8),
+    ("parametros", np.int32, (MAX_PARAMETROS,)),
+    ("color", np.uint8, (3,)),
+])
+
+_RELLENAS = (RECTANGULO_RELLENO, CIRCULO_RELLENO, TRIANGULO_RELLENO)
+
+
+def arreglo_figuras(n):
+    """Arreglo de n figuras con dtype FIGURA, en cero, para llenar y pasar a dibujar_figuras."""
+    return np.zeros(n, dtype=FIGURA)
+
+
+def _pixeles_estimados(tipos, p, clip):
+    """
+    Cota aproximada de los píxeles que calcula _ultima_figura para cada
+    figura: el área visible de su caja si es rellena y, si es un contorno,
+    unas ocho veces el semiperímetro (por el área del pincel en los trazos).
+    """
+    cajas = cajas_figuras(tipos, p)
+    ancho = cajas[:, 2] - cajas[:, 0]
+    alto = cajas[:, 3] - cajas[:, 1]
+    visible = (np.maximum(np.minimum(cajas[:, 2], clip.right) - np.maximum(cajas[:, 0], clip.left), 0)
+               * np.maximum(np.minimum(cajas[:, 3], clip.bottom) - np.maximum(cajas[:, 1], clip.top), 0))
+    radio = np.where(tipos == TRAZO, np.abs(p[:, 4].astype(np.int64)), 0)
+    contorno = np.where(tipos == TRAZO, (2 * radio + 1) ** 2, 8) * (ancho + alto)
+    return np.where(np.isin(tipos, _RELLENAS), visible, contorno)
+
+
+def _ultima_figura(tipos, p, clip):
+    """
+    Última figura de un grupo que pinta cada píxel, como al dibujarlas en orden.
+
+    Es el cálculo de _rasterizar_lote llevando en cada paso el índice de su
+    figura. Los centros del pincel se marcan en una matriz de índices con
+    np.maximum.at y se dilatan con la huella del pincel tomando el máximo,
+    igual que _estampar y _estampar_disco dilatan su máscara; los tramos de
+    los rellenos se expanden a píxeles.
+
+    Args:
+        tipos: Arreglo con el tipo de cada figura (sin rellenos con balde)
+        p: Matriz (n, MAX_PARAMETROS) con los parámetros de cada figura
+        clip: pygame.Rect fuera del cual no interesan los píxeles
+
+    Returns:
+        Tupla (x0, y0, indices) donde indices[x - x0, y - y0] es la última
+        figura (su posición en tipos) que pinta el píxel, o -1; o None si
+        ninguna pinta dentro de clip.
+    """
+    filas = (clip.top, clip.bottom)
+    pincel = prim._alcance(clip, 1)
+    segmentos = []  # Tuplas (x1, y1, x2, y2, figura) de arreglos
+    puntos = []     # Tuplas (xs, ys, figura) de centros del pincel de 2x2
+    spans = []      # Tuplas (matriz (n, 3) de tramos, figura)
+    discos = {}     # radio -> tuplas (xs, ys, figura) de pasos del pincel redondo
+
+    for tipo in np.unique(tipos).tolist():
+        cuales = np.flatnonzero(tipos == tipo)
+        q = p[cuales].astype(np.intp)
+
+        if tipo == LINEA:
+            segmentos.append((q[:, 0], q[:, 1], q[:, 2], q[:, 3], cuales))
+
+        elif tipo == RECTANGULO:
+            x, y = q[:, 0], q[:, 1]
+            x2, y2 = x + q[:, 2], y + q[:, 3]
+            segmentos.append((
+                np.concatenate([x, x2, x2, x]), np.concatenate([y, y, y2, y2]),
+                np.concatenate([x2, x2, x, x]), np.concatenate([y, y2, y2, y]),
+                np.tile(cuales, 4),
+            ))
+
+        elif tipo == TRIANGULO:
+            vx = q[:, 0:6:2]
+            vy = q[:, 1:6:2]
+            segmentos.append((
+                vx.ravel(), vy.ravel(),
+                np.roll(vx, -1, axis=1).ravel(), np.roll(vy, -1, axis=1).ravel(),
+                np.repeat(cuales, 3),
+            ))
+
+        elif tipo == RECTANGULO_RELLENO:
+            arriba = np.clip(q[:, 1], *filas)
+            alto = np.maximum(np.clip(q[:, 1] + q[:, 3], *filas) - arriba, 0)
+            fila = np.arange(alto.sum()) - np.repeat(np.cumsum(alto) - alto, alto)
+            x = np.repeat(q[:, 0], alto)
+            spans.append((np.stack([
+                np.repeat(arriba, alto) + fila, x, x + np.repeat(q[:, 2], alto) - 1,
+            ], axis=1), np.repeat(cuales, alto)))
+
+        elif tipo in (CIRCULO, CIRCULO_RELLENO):
+            for r in np.unique(q[:, 2]).tolist():
+                mismo = q[:, 2] == r
+                if tipo == CIRCULO:
+                    x, y, circulo = prim._puntos_circulos(q[mismo, 0], q[mismo, 1], r, pincel)
+                    puntos.append((x, y, cuales[mismo][circulo]))
+                else:
+                    tramos, circulo = prim._spans_circulos(q[mismo, 0], q[mismo, 1], r, filas)
+                    spans.append((tramos, cuales[mismo][circulo]))
+
+        elif tipo == TRIANGULO_RELLENO:
+            spans.append(prim._spans_poligonos(q[:, 0:6:2], q[:, 1:6:2], etiquetas=cuales, filas=filas))
+
+        elif tipo == ELIPSE:
+            segmentos.append(prim._segmentos_elipses(q[:, 0], q[:, 1], q[:, 2], q[:, 3], etiquetas=cuales))
+
+        elif tipo == CURVA:
+            segmentos.append(prim._segmentos_beziers(q[:, 0:8:2], q[:, 1:8:2], etiquetas=cuales))
+
+        elif tipo == TRAZO:
+            for r in np.unique(np.abs(q[:, 4])).tolist():
+                mismo = np.abs(q[:, 4]) == r
+                s = q[mismo]
+                discos.setdefault(r, []).append(prim._puntos_dda(
+                    *prim._segmentos_polilinea(s[:, 0:3:2], s[:, 1:4:2], cuales[mismo]), recorte=prim._alcance(clip, r)))
+
+        else:
+            raise ValueError(f"Tipo de figura sin píxeles propios: {tipo}")
+
+    if segmentos:
+        discos.setdefault(None, []).append(prim._puntos_dda(*prim._concatenar_segmentos(segmentos), recorte=pincel))
+    if puntos:
+        discos.setdefault(None, []).extend(puntos)
+
+    # Centros que alcanzan el recorte, por radio (None es el pincel de 2x2)
+    centros = {}
+    for r, pasos in discos.items():
+        x, y, figura = prim._concatenar_segmentos(pasos)
+        alcance = 1 if r is None else r
+        dentro = ((x >= clip.left - alcance) & (x < clip.right + alcance)
+                  & (y >= clip.top - alcance) & (y < clip.bottom + alcance))
+        if dentro.any():
+            centros[r] = (x[dentro], y[dentro], figura[dentro])
+    if spans:
+        # Los tramos se recortan antes de expandirlos, como en fill_spans
+        tramos, figura = prim._concatenar_segmentos(spans)
+        y = tramos[:, 0]
+        x0 = np.maximum(np.minimum(tramos[:, 1], tramos[:, 2]), clip.left)
+        x1 = np.minimum(np.maximum(tramos[:, 1], tramos[:, 2]), clip.right - 1)
+        visibles = (y >= clip.top) & (y < clip.bottom) & (x0 <= x1)
+        spans = (y[visibles], x0[visibles], x1[visibles], figura[visibles])
+        if not len(spans[0]):
+            spans = None
+    if not centros and not spans:
+        return None
+
+    # La matriz cubre el recorte más el radio mayor, para dilatar sin salirse
+    margen = max([1] + [r for r in centros if r is not None])
+    x0, y0 = clip.left - margen, clip.top - margen
+    ancho, alto = clip.width + 2 * margen, clip.height + 2 * margen
+    indices = np.full((ancho, alto), -1, dtype=np.int32)
+
+    for r, (x, y, figura) in centros.items():
+        marcas = np.full((ancho, alto), -1, dtype=np.int32)
+        np.maximum.at(marcas.ravel(), (x - x0) * alto + (y - y0), figura.astype(np.int32))
+        if r is None:
+            np.maximum(marcas[:-1, :], marcas[1:, :], out=marcas[:-1, :])
+            np.maximum(marcas[:, :-1], marcas[:, 1:], out=marcas[:, :-1])
+            np.maximum(indices, marcas, out=indices)
+            continue
+        # Como en _estampar_disco: se ensancha en x de a un píxel y cada
+        # ancho se corre a las filas del disco que lo usan
+        semianchos = prim._semianchos_disco(r)
+        actual = marcas
+        for w in range(int(semianchos[0]) + 1):
+            if w:
+                anterior = actual
+                actual = anterior.copy()
+                np.maximum(actual[1:, :], anterior[:-1, :], out=actual[1:, :])
+                np.maximum(actual[:-1, :], anterior[1:, :], out=actual[:-1, :])
+            for dy in np.flatnonzero(semianchos == w).tolist():
+                if dy == 0:
+                    np.maximum(indices, actual, out=indices)
+                else:
+                    np.maximum(indices[:, dy:], actual[:, :-dy], out=indices[:, dy:])
+                    np.maximum(indices[:, :-dy], actual[:, dy:], out=indices[:, :-dy])
+
+    if spans:
+        y, desde, hasta, figura = spans
+        largo = hasta - desde + 1
+        x = np.repeat(desde - (np.cumsum(largo) - largo), largo) + np.arange(largo.sum())
+        np.maximum.at(indices.ravel(), (x - x0) * alto + np.repeat(y - y0, largo),
+                      np.repeat(figura, largo).astype(np.int32))
+
+    return clip.left, clip.top, indices[margen:-margen, margen:-margen]
+
+
+def _rasterizar_mezcladas(screen, tipos, p, colores):
+    """
+    Rasteriza de una vez un grupo de figuras de varios colores, en orden.
+
+    _ultima_figura dice qué figura queda encima en cada píxel y una sola
+    asignación escribe el color de esa figura en todos.
+
+    Args:
+        screen: Superficie de pygame donde se dibujará
+        tipos: Arreglo con el tipo de cada figura (sin rellenos con balde)
+        p: Matriz (n, MAX_PARAMETROS) con los parámetros de cada figura
+        colores: Matriz (n, 3) con el color RGB de cada figura
+    """
+    ultima = _ultima_figura(tipos, p, screen.get_clip())
+    if ultima is None:
+        return
+    x0, y0, indices = ultima
+    ancho, alto = indices.shape
+    pintados = indices >= 0
+
+    unicos, cual = np.unique(colores, axis=0, return_inverse=True)
+    pixeles, ox, oy = prim._pixeles(screen)
+    paleta = np.array([screen.map_rgb(color) for color in map(tuple, unicos.tolist())], dtype=pixeles.dtype)
+    x0, y0 = x0 - ox, y0 - oy
+    pixeles[x0:x0 + ancho, y0:y0 + alto][pintados] = paleta[cual.ravel()[indices[pintados]]]
+    del pixeles  # Libera el bloqueo de la superficie
+
+
+def _cortes_suavizados(tipos, p, colores, suaves):
+    """
+    Dónde cortar los lotes de contornos suavizados.
+
+    Dibujados en orden, dos contornos con antialiasing que se tocan mezclan
+    su color dos veces donde se cruzan; juntos en un lote quedaría sólo la
+    mayor cobertura. Cada lote de contornos suavizados es entonces de un
+    color, de figuras seguidas cuyas cajas no se tocan, y de no más de
+    FIGURAS_POR_SUAVIZADO figuras (para acotar las comparaciones de cajas).
+
+    Args:
+        tipos, p, colores: Figuras como en _rasterizar_figuras
+        suaves: Máscara de las figuras que son contornos con antialiasing
+
+    Returns:
+        Arreglo con las figuras que empiezan un lote nuevo de contornos suavizados.
+    """
+    cuales = np.flatnonzero(suaves)
+    if len(cuales) < 2:
+        return cuales[:0]
+    cajas = cajas_figuras(tipos[cuales], p[cuales])
+    # Empiezan lote las que no siguen a otra suavizada del mismo color
+    sueltas = (np.diff(cuales) != 1) | (colores[cuales[1:]] != colores[cuales[:-1]]).any(axis=1)
+    cortes = []
+    inicio = 0  # Posición en cuales de la primera figura del lote en curso
+    for k in range(1, len(cuales)):
+        lote = cajas[inicio:k]
+        x0, y0, x1, y1 = cajas[k]
+        if (sueltas[k - 1] or k - inicio >= FIGURAS_POR_SUAVIZADO
+                or ((lote[:, 0] < x1) & (lote[:, 2] > x0) & (lote[:, 1] < y1) & (lote[:, 3] > y0)).any()):
+            cortes.append(cuales[k])
+            inicio = k
+    return np.array(cortes, dtype=np.intp)
+
+
+def _rasterizar_figuras(screen, tipos, p, colores, suavizados):
+    """
+    Rasteriza figuras de cualquier color respetando el orden en que se dibujaron.
+
+    Las consecutivas del mismo color van juntas a _rasterizar_lote. Si esos
+    lotes son cortos (colores que se alternan) las figuras se cortan en
+    grupos de unos PIXELES_LOTE píxeles para _rasterizar_mezcladas. Los
+    rellenos con balde, y las figuras que solas pasan de PIXELES_LOTE, se
+    rasterizan aparte en su lugar. Los contornos con antialiasing se mezclan
+    con lo que tienen debajo: van en lotes de un color cortados por
+    _cortes_suavizados, así que el resultado es el de dibujarlos uno por uno.
+
+    Args:
+        screen: Superficie de pygame donde se dibujará
+        tipos: Arreglo con el tipo de cada figura
+        p: Matriz (n, MAX_PARAMETROS) con los parámetros de cada figura
+        colores: Matriz (n, 3) con el color RGB de cada figura
+        suavizados: Arreglo que dice si cada figura se dibuja con antialiasing
+    """
+    n = len(tipos)
+    if n == 0:
+        return
+    suaves = np.asarray(suavizados, dtype=bool) & np.isin(tipos, CONTORNOS)
+    cambios = np.flatnonzero((colores[1:] != colores[:-1]).any(axis=1)) + 1
+    modos = np.flatnonzero(suaves[1:] != suaves[:-1]) + 1  # Donde empieza o termina una corrida suavizada
+    solas = np.flatnonzero(tipos == RELLENO)
+    clip = screen.get_clip()
+    mezclar = (n < FIGURAS_POR_COLOR * (len(cambios) + 1)
+               and clip.width * clip.height <= MAX_ZONA_MEZCLADAS)
+    if mezclar:
+        estimados = _pixeles_estimados(tipos, p, clip)
+        solas = np.union1d(solas, np.flatnonzero(estimados > PIXELES_LOTE))
+        cortes = np.flatnonzero(np.diff(np.cumsum(estimados) // PIXELES_LOTE)) + 1
+    else:
+        cortes = cambios
+    limites = np.union1d(np.concatenate([[0], cortes, modos, solas, solas + 1,
+                                         _cortes_suavizados(tipos, p, colores, suaves)]), [n])
+
+    for inicio, fin in zip(limites[:-1].tolist(), limites[1:].tolist()):
+        c = colores[inicio:fin]
+        if suaves[inicio]:
+            _rasterizar_lote(screen, tipos[inicio:fin], p[inicio:fin], tuple(c[0].tolist()), suavizado=True)
+        elif mezclar and (c != c[0]).any():
+            _rasterizar_mezcladas(screen, tipos[inicio:fin], p[inicio:fin], c)
+        else:
+            _rasterizar_lote(screen, tipos[inicio:fin], p[inicio:fin], tuple(c[0].tolist()))
+
+
+def dibujar_figuras(screen, figuras):
+    """
+    Dibuja de una vez muchas figuras de cualquier tipo y color, en orden.
+
+    Es la versión por lotes de dibujar_figura: con miles de figuras de
+    colores alternados (partículas, mallas, gráficos de datos) los píxeles
+    de todas se calculan juntos y se escriben con una sola asignación por
+    grupo, con el mismo resultado que dibujarlas una por una. Todas usan el
+    antialiasing de prim.SUAVIZADO.
+
+    Args:
+        screen: Superficie de pygame donde se dibujará
+        figuras: Arreglo con dtype FIGURA (ver arreglo_figuras), con los
+            parámetros de cada figura en el orden de PARAMETROS[tipo]
+
+    Returns:
+        pygame.Rect con la zona de la superficie que pudo cambiar.
+    """
+    figuras = np.asarray(figuras)
+    if figuras.dtype != FIGURA:
+        raise TypeError("dibujar_figuras espera un arreglo con dtype FIGURA")
+    clip = screen.get_clip()
+    if len(figuras) == 0:
+        return pygame.Rect(clip.left, clip.top, 0, 0)
+    tipos, parametros = figuras["tipo"], figuras["parametros"]
+    _rasterizar_figuras(screen, tipos, parametros, figuras["color"], np.full(len(figuras), prim.SUAVIZADO))
+
+    cajas = cajas_figuras(tipos, parametros)
+    x0, y0 = cajas[:, :2].min(axis=0).tolist()
+    x1, y1 = cajas[:, 2:].max(axis=0).tolist()
+    return pygame.Rect(x0, y0, x1 - x0, y1 - y0).clip(clip)
+
+
+# Arreglos de la escena con un elemento por figura, en el orden de las tuplas de recortar()
+ARREGLOS = ("tipos", "parametros", "colores", "suavizados")
+
+
+def _completar(figuras):
+    """Tupla (tipos, parametros, colores, suavizados) de las figuras que acepta Escena.extender."""
+    if isinstance(figuras, np.ndarray) and figuras.dtype == FIGURA:
+        figuras = (figuras["tipo"], figuras["parametros"], figuras["color"])
+    if len(figuras) == 3:
+        figuras = (*figuras, np.full(len(figuras[0]), prim.SUAVIZADO))
+    return tuple(figuras)
+
+
+class Escena:
+    """
+    Lista de figuras confirmadas, guardada en arreglos de NumPy que crecen
+    duplicando su capacidad.
+
+    Cada figura guarda también si se dibujó con antialiasing, así que al
+    reconstruir el lienzo se ve igual aunque después cambie el modo global.
+    """
+
+    def __init__(self, capacidad=1024):
+        """
+        Constructor de la clase Escena
+        :param capacidad: número de figuras reservadas al inicio
+        """
+        self.tipos = np.zeros(capacidad, dtype=np.uint8)
+        self.parametros = np.zeros((capacidad, MAX_PARAMETROS), dtype=np.int32)
+        self.colores = np.zeros((capacidad, 3), dtype=np.uint8)
+        self.suavizados = np.zeros(capacidad, dtype=bool)
+        self.n = 0
+        self.version = 0  # Cambia con cada modificación, para quien guarde datos derivados
+
+    def __len__(self):
+        return self.n
+
+    def _reservar(self, n):
+        """Garantiza espacio para n figuras."""
+        capacidad = len(self.tipos)
+        if n <= capacidad:
+            return
+        while capacidad < n:
+            capacidad *= 2
+        for nombre in ARREGLOS:
+            viejo = getattr(self, nombre)
+            nuevo = np.zeros((capacidad,) + viejo.shape[1:], dtype=viejo.dtype)
+            nuevo[:self.n] = viejo[:self.n]
+            setattr(self, nombre, nuevo)
+
+    def agregar(self, tipo, parametros, color, suavizado=None):
+        """
+        Registra una figura al final de la escena.
+
+        Args:
+            tipo: Tipo de figura (LINEA, RECTANGULO, ...)
+            parametros: Parámetros enteros en el orden de PARAMETROS[tipo]
+            color: Color de la figura en formato RGB
+            suavizado: Si se dibuja con antialiasing; None toma prim.SUAVIZADO
+
+        Returns:
+            Índice de la figura dentro de la escena.
+        """
+        if len(parametros) != len(PARAMETROS[tipo]):
+            raise ValueError(f"Se esperaban {len(PARAMETROS[tipo])} parámetros para el tipo {tipo}")
+        self._reservar(self.n + 1)
+        i = self.n
+        self.tipos[i] = tipo
+        self.parametros[i] = 0
+        self.parametros[i, :len(parametros)] = parametros
+        self.colores[i] = color[:3]
+        self.suavizados[i] = prim.SUAVIZADO if suavizado is None else suavizado
+        self.n += 1
+        self.version += 1
+        return i
+
+    def figura(self, i):
+        """Retorna (tipo, parametros, color) de la figura i."""
+        if not -self.n <= i < self.n:
+            raise IndexError("Índice de figura fuera de la escena")
+        i %= self.n
+        tipo = int(self.tipos[i])
+        parametros = tuple(self.parametros[i, :len(PARAMETROS[tipo])].tolist())
+        return tipo, parametros, tuple(self.colores[i].tolist())
+
+    def __iter__(self):
+        for i in range(self.n):
+            yield self.figura(i)
+
+    def vaciar(self):
+        """Elimina todas las figuras."""
+        self.n = 0
+        self.version += 1
+
+    def recortar(self, n):
+        """
+        Deja sólo las primeras n figuras.
+
+        Returns:
+            Tupla (tipos, parametros, colores, suavizados) con copias de las
+            figuras quitadas, lista para volver a añadirlas con extender().
+        """
+        n = min(max(n, 0), self.n)
+        quitadas = tuple(getattr(self, nombre)[n:self.n].copy() for nombre in ARREGLOS)
+        self.n = n
+        self.version += 1
+        return quitadas
+
+    def extender(self, figuras):
+        """
+        Añade al final las figuras (tipos, parametros, colores, suavizados)
+        dadas por recortar(), o un arreglo con dtype FIGURA. Sin suavizados
+        (una tupla de tres o un arreglo FIGURA) toman prim.SUAVIZADO.
+        """
+        figuras = _completar(figuras)
+        k = len(figuras[0])
+        self._reservar(self.n + k)
+        for nombre, valores in zip(ARREGLOS, figuras):
+            getattr(self, nombre)[self.n:self.n + k] = valores
+        self.n += k
+        self.version += 1
+
+    def reemplazar(self, indices, figuras, cuantas):
+        """
+        Cambia cada figura de indices por las que la reemplazan, en su lugar.
+
+        Args:
+            indices: Índices de las figuras reemplazadas, en orden creciente
+            figuras: Tupla (tipos, parametros, colores, suavizados) con las
+                figuras nuevas, las de cada figura reemplazada seguidas y en
+                el orden de indices; sin suavizados toman prim.SUAVIZADO
+            cuantas: Cuántas figuras nuevas reemplazan a cada una (0 la borra)
+
+        Returns:
+            Arreglo con los índices que ocupan las figuras nuevas.
+        """
+        indices = np.asarray(indices, dtype=np.intp)
+        cuantas = np.asarray(cuantas, dtype=np.intp)
+        figuras = _completar(figuras)
+        ocupa = np.ones(self.n, dtype=np.intp)
+        ocupa[indices] = cuantas
+        inicio = np.cumsum(ocupa) - ocupa  # Primer lugar de cada figura en la escena nueva
+        total = int(ocupa.sum())
+        quedan = np.ones(self.n, dtype=bool)
+        quedan[indices] = False
+        nuevas = np.repeat(inicio[indices] - (np.cumsum(cuantas) - cuantas), cuantas) + np.arange(cuantas.sum())
+
+        self._reservar(total)
+        for nombre, valores in zip(ARREGLOS, figuras):
+            viejo = getattr(self, nombre)
+            arreglo = np.empty((total,) + viejo.shape[1:], dtype=viejo.dtype)
+            arreglo[inicio[quedan]] = viejo[:self.n][quedan]
+            arreglo[nuevas] = valores
+            viejo[:total] = arreglo
+        self.n = total
+        self.version += 1
+        return nuevas
+
+    def renderizar(self, screen, fondo=(255, 255, 255)):
+        """
+        Reconstruye el lienzo completo a partir de las figuras guardadas.
+
+        Las figuras consecutivas del mismo color se rasterizan juntas en un
+        lote, respetando el orden en que se dibujaron; si los colores se
+        alternan mucho se juntan figuras de varios colores (ver
+        _rasterizar_figuras). Los rellenos con balde dependen de lo que ya hay
+        en el lienzo, así que cada uno va en su propio lote. Cada figura usa
+        el antialiasing con que se guardó, no el modo global.
+
+        Args:
+            screen: Superficie de pygame donde se dibujará
+            fondo: Color de fondo del lienzo en formato RGB; con None se
+                dibuja encima de lo que ya tiene la superficie
+        """
+        if fondo is not None:
+            screen.fill(fondo)
+        if self.n == 0:
+            return
+
+        _rasterizar_figuras(screen, self.tipos[:self.n], self.parametros[:self.n], self.colores[:self.n],
+                            self.suavizados[:self.n])
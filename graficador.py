@@ -2,247 +2,36 @@
 # Autor: [Tu Nombre]
 # Fecha: [Fecha]
 
-import pygame
+import argparse
+import logging
+import logging.handlers
 import math
-import numpy as np
-
-# Funciones de dibujo ---------------
-def lineaDDA(screen, x1, y1, x2, y2, color):
-    """
-    Implementa el algoritmo DDA (Digital Differential Analyzer) para dibujar una línea.
-    
-    Args:
-        screen: Superficie de pygame donde se dibujará
-        x1, y1: Coordenadas del punto inicial
-        x2, y2: Coordenadas del punto final
-        color: Color de la línea en formato RGB
-    """
-    dx = x2 - x1
-    dy = y2 - y1
-
-    steps = int(max(abs(dx), abs(dy)))
-
-    if steps == 0:
-        pygame.draw.circle(screen, color, (x1, y1), 1)
-        return
-
-    Xinc = dx / steps
-    Yinc = dy / steps
-
-    x = x1
-    y = y1
-    for i in range(steps):
-        pygame.draw.circle(screen, color, ( (round(x), round(y) ) ), 1)
-        x += Xinc
-        y += Yinc
-    
-def polygon(screen, vertices, color):
-    """
-    Dibuja un polígono conectando una lista de vértices.
-    
-    Args:
-        screen: Superficie de pygame donde se dibujará
-        vertices: Lista de tuplas (x,y) que representan los vértices
-        color: Color del polígono en formato RGB
-    """
-    for i in range(len(vertices)):
-        x1, y1 = vertices[i]
-        x2, y2 = vertices[(i + 1) % len(vertices)]
-        lineaDDA(screen, x1, y1, x2, y2, color)
-
-def rectangle(screen, x, y, width, height, color):
-    """
-    Dibuja un rectángulo usando el algoritmo de línea DDA.
-    
-    Args:
-        screen: Superficie de pygame donde se dibujará
-        x, y: Coordenadas de la esquina superior izquierda
-        width: Ancho del rectángulo
-        height: Alto del rectángulo
-        color: Color del rectángulo en formato RGB
-    """
-    vertices = [
-        (x, y), (x + width, y),
-        (x + width, y + height), (x, y + height)
-    ]
-    polygon(screen, vertices, color)
-
-def circleBresenham(screen, xc, yc, r, color):
-    """
-    Implementa el algoritmo de Bresenham para dibujar círculos.
-    
-    Args:
-        screen: Superficie de pygame donde se dibujará
-        xc, yc: Coordenadas del centro del círculo
-        r: Radio del círculo
-        color: Color del círculo en formato RGB
-    """
-    x = 0
-    y = r
-    d = 3 - 2 * r
-
-    def plot_circle_points(x, y):
-        points = [
-            (xc + x, yc + y), (xc - x, yc + y),
-            (xc + x, yc - y), (xc - x, yc - y),
-            (xc + y, yc + x), (xc - y, yc + x),
-            (xc + y, yc - x), (xc - y, yc - x)
-        ]
-        for point in points:
-            pygame.draw.circle(screen, color, point, 1)
-
-    while x <= y:
-        plot_circle_points(x, y)
-        if d < 0:
-            d = d + 4 * x + 6
-        else:
-            d = d + 4 * (x - y) + 10
-            y -= 1
-        x += 1
-
-def drawTriangulo(screen, vertices, color):
-    """
-    Dibuja un triángulo usando el algoritmo de línea DDA.
-    
-    Args:
-        screen: Superficie de pygame donde se dibujará
-        vertices: Lista de 3 tuplas (x,y) que representan los vértices
-        color: Color del triángulo en formato RGB
-    """
-    for i in range(len(vertices)):
-        x1, y1 = vertices[i]
-        x2, y2 = vertices[(i + 1) % len(vertices)]
-        lineaDDA(screen, x1, y1, x2, y2, color)
-
-def drawElipse(screen, xc, yc, rx, ry, color):
-    """
-    Dibuja una elipse usando parametrización.
-    
-    Args:
-        screen: Superficie de pygame donde se dibujará
-        xc, yc: Coordenadas del centro de la elipse
-        rx: Radio en el eje x
-        ry: Radio en el eje y
-        color: Color de la elipse en formato RGB
-    """
-    t_values =  np.linspace(0, 2 * np.pi, 100)
-    for t in t_values:
-        x = int(xc + rx * np.cos(t))
-        y = int(yc + ry * np.sin(t))
-        pygame.draw.circle(screen, color, (x, y), 1)
-
-def drawCurvaBezier(screen, p0, p1, p2, p3, color):
-    """
-    Dibuja una curva de Bézier cúbica.
-    
-    Args:
-        screen: Superficie de pygame donde se dibujará
-        p0: Punto inicial (x,y)
-        p1, p2: Puntos de control (x,y)
-        p3: Punto final (x,y)
-        color: Color de la curva en formato RGB
-    """
-    t_values = np.linspace(0, 1, 100)
-    for t in t_values:
-        x = int((1 - t)**3 * p0[0] + 3 * (1 - t)**2 * t * p1[0] + 3 * (1 - t) * t**2 * p2[0] + t**3 * p3[0])
-        y = int((1 - t)**3 * p0[1] + 3 * (1 - t)**2 * t * p1[1] + 3 * (1 - t) * t**2 * p2[1] + t**3 * p3[1])
-        pygame.draw.circle(screen, color, (x, y), 1)
-
-# Rellenos --------
-def filled_rectangle(screen, x, y, width, height, color):
-    """
-    Dibuja un rectángulo RELLENO trazando líneas horizontales,
-    evitando pygame.draw y Surface.blit.
-    
-    Args:
-        screen: Superficie de pygame donde se dibujará.
-        x, y: Coordenadas de la esquina superior izquierda.
-        width: Ancho del rectángulo.
-        height: Alto del rectángulo.
-        color: Color del rectángulo en formato RGB.
-    """
-    x_end = x + width
-    y_end = y + height
-
-    for current_y in range(y, y_end):
-        line(screen, x, current_y, x_end - 1, current_y, color) 
+import os
+import sys
+import time
 
-def line(screen, x1, y1, x2, y2, color):
-    """
-    Dibuja una línea horizontal de (x1, y1) a (x2, y2) usando set_at().
-    """
-    if y1 != y2:
-        return 
-
-    start_x = min(x1, x2)
-    end_x = max(x1, x2)
-    
-    # Recorremos cada píxel y lo coloreamos
-    for x in range(start_x, end_x + 1):
-        try:
-            # ¡La llamada de bajo nivel!
-            screen.set_at((x, y1), color)
-        except IndexError:
-            pass
+import numpy as np
+import pygame
 
-def filled_circle_bresenham(screen, xc, yc, r, color):
-    """
-    Implementa el algoritmo de Bresenham para dibujar círculos RELLENOS.
-    
-    Args:
-        screen: Superficie de pygame donde se dibujará.
-        xc, yc: Coordenadas del centro del círculo.
-        r: Radio del círculo.
-        color: Color del círculo en formato RGB.
-    """
-    x = 0
-    y = r
-    d = 3 - 2 * r
-
-    # Función auxiliar para dibujar una línea horizontal que rellene
-    def draw_horizontal_line(x_start, x_end, current_y, c):
-        line(screen, x_start, current_y, x_end, current_y, c)
-
-    draw_horizontal_line(xc - x, xc + x, yc + y, color) # Arriba
-    draw_horizontal_line(xc - x, xc + x, yc - y, color) # Abajo
-    draw_horizontal_line(xc - y, xc + y, yc + x, color) # Izquierda
-    draw_horizontal_line(xc - y, xc + y, yc - x, color) # Derecha
-
-    while x <= y:
-        if d < 0:
-            d = d + 4 * x + 6
-        else:
-            d = d + 4 * (x - y) + 10
-            y -= 1
-        x += 1
-
-        # Para cada (x, y) calculado por Bresenham, dibujamos 4 líneas horizontales
-        # Lineas horizontales simétricas en el octante superior e inferior
-        draw_horizontal_line(xc - x, xc + x, yc + y, color)
-        draw_horizontal_line(xc - x, xc + x, yc - y, color)
-        draw_horizontal_line(xc - y, xc + y, yc + x, color)
-        draw_horizontal_line(xc - y, xc + y, yc - x, color)
-
-        # Si x == y, los puntos se superponen, no es necesario dibujar dos veces
-        # Si r es 0, la primera línea es suficiente.
-        if x == y and r != 0:
-            draw_horizontal_line(xc - x, xc + x, yc + y, color)
-            draw_horizontal_line(xc - x, xc + x, yc - y, color)
-
-    if r > 0:
-        draw_horizontal_line(xc - r, xc + r, yc, color) # Línea horizontal central
-    elif r == 0: # Caso de un solo pixel si el radio es 0
-        try:
-            screen.set_at((xc, yc), color)
-        except IndexError:
-            pass
-# -----------------
+import archivos
+import perfil
+import primitivas as prim
+import recursos
+import seleccion
+from escena import (
+    ARREGLOS, Escena, caja_figura, cajas_figuras, transformar_afin, MAX_PARAMETROS,
+    LINEA, RECTANGULO, RECTANGULO_RELLENO, CIRCULO, CIRCULO_RELLENO, ELIPSE, TRIANGULO, CURVA, RELLENO, TRAZO
+)
+from historial import Historial
+from mosaico import Mosaico, Vista
+from sesion import OPCIONES, Grabador
+from vectorial import escribir_svg, leer_svg
 
-# ---------------------------------------
+log = logging.getLogger(__name__)
 
 
 class Boton:
-    def __init__(self, x, y, ancho, alto, imagenO, color_normal, color_hover, color_texto=(255, 255, 255), fuente=None, llenado=0):
+    def __init__(self, x, y, ancho, alto, imagenO, color_normal, color_hover, color_texto=(255, 255, 255), fuente=None, llenado=0, texto="", diferida=False):
         """
         Constructor de la clase Boton
         :param x: posición X del botón
@@ -254,40 +43,61 @@ class Boton:
         :param color_hover: color cuando el mouse pasa sobre el botón
         :param color_texto: color del texto (tuple RGB)
         :param fuente: objeto pygame.font.Font o None
+        :param diferida: no decodifica la imagen; se toma con cargar_imagen() cuando esté lista
         """
         self.rect = pygame.Rect(x, y, ancho, alto)
 
-        if imagenO:
-            self.imagen = pygame.image.load(imagenO)
-            self.imagen = pygame.transform.scale(self.imagen, (ancho-10, alto-10))
+        self.rutaImagen = imagenO or None
+        self.tamanoImagen = (ancho-10, alto-10)
+        if imagenO and not diferida:
+            # Compartida con otros botones y ya en el formato de la ventana
+            self.imagen = recursos.imagen(imagenO, self.tamanoImagen)
         else:
             self.imagen = False
 
         self.color_normal = color_normal
         self.color_hover = color_hover
         self.color_texto = color_texto
-        self.fuente = fuente or pygame.font.Font(None, 36)
+        self.fuente = fuente or (recursos.fuente(None, 36) if texto else None)
         self.hover = False
         self.llenado = llenado
+        self.texto = texto
 
-    def dibujar(self, pantalla):
-        """Dibuja el botón en pantalla."""
+    def dibujar(self, pantalla, origen=(0, 0)):
+        """Dibuja el botón en pantalla; origen es la esquina de la pantalla en coordenadas de la ventana."""
+        rect = self.rect.move(-origen[0], -origen[1])
         color_actual = self.color_hover if self.hover else self.color_normal
-        pygame.draw.rect(pantalla, color_actual, self.rect, border_radius=8, width=self.llenado)
+        pygame.draw.rect(pantalla, color_actual, rect, border_radius=8, width=self.llenado)
 
         # mostrar imagen
         if self.imagen:
-            imagen_rect = self.imagen.get_rect(center=self.rect.center)
+            imagen_rect = self.imagen.get_rect(center=rect.center)
             pantalla.blit(self.imagen, imagen_rect)
-        else:
+        elif self.rutaImagen:
+            # Marcador mientras el icono se decodifica
+            marcador = pygame.Rect((0, 0), self.tamanoImagen)
+            marcador.center = rect.center
+            pygame.draw.rect(pantalla, colorMarcador, marcador, border_radius=4)
+        elif self.texto:
             # Dibujar texto centrado
-            texto_surf = self.fuente.render("", True, self.color_texto)
-            texto_rect = texto_surf.get_rect(center=self.rect.center)
+            texto_surf = self.fuente.render(self.texto, True, self.color_texto)
+            texto_rect = texto_surf.get_rect(center=rect.center)
             pantalla.blit(texto_surf, texto_rect)
 
-    def actualizar(self, eventos):
+    def cargar_imagen(self):
+        """Toma el icono diferido si ya está decodificado; retorna True si lo obtuvo."""
+        if self.imagen or not self.rutaImagen:
+            return False
+        imagen = recursos.imagen_lista(self.rutaImagen, self.tamanoImagen)
+        if imagen is None:
+            return False
+        self.imagen = imagen
+        return True
+
+    def actualizar(self, eventos, mouse_pos=None):
         """Actualiza el estado del botón (detecta hover y clics)."""
-        mouse_pos = pygame.mouse.get_pos()
+        if mouse_pos is None:
+            mouse_pos = pygame.mouse.get_pos()
         self.hover = self.rect.collidepoint(mouse_pos)
 
         for evento in eventos:
@@ -296,343 +106,1072 @@ class Boton:
                     return True  # Retorna True si se hace clic sobre el botón
         return False
 
+    def actualizar_hover(self, pos):
+        """Actualiza el hover para la posición dada; retorna True si cambió."""
+        hover = bool(self.rect.collidepoint(pos))
+        cambio = hover != self.hover
+        self.hover = hover
+        return cambio
 
 
-# Inicialización de Pygame y configuración inicial
-pygame.init()
-screen = pygame.display.set_mode((1020, 650))  # Ventana de 1020x650 píxeles
-screen.fill("white")  # Fondo blanco
-clock = pygame.time.Clock()  # Para controlar los FPS
-running = True  # Control del bucle principal
-
-# Variables de estado para el dibujo
-dibujar = False  # Controla si se debe dibujar
-inicio = (0, 0)  # Punto inicial del dibujo
-final = (0, 0)   # Punto final del dibujo
-color = (0,0,0)  # Color actual (negro por defecto)
-
-# Estados de las herramientas de dibujo
-linea = True      # Herramienta activa por defecto
-rectangulo = False
-rectangulo_rell = False
-circulo = False
-circulo_rell = False
-elipse = False
-triangulo = False
-curva = False
-vaciar = False
 
 # Configuración de los botones de herramientas
 colorBoton = (0,0,0)      # Color normal de los botones
 hoover = (100,160,210)    # Color cuando el mouse está sobre el botón
+colorMarcador = (200,200,200)  # Ocupa el lugar de un icono que aún no se carga
+
+# Paneles laterales
+colorPanel = (232, 223, 203)
+panelIzquierdo = pygame.Rect(0, 0, 70, 650)
+panelDerecho = pygame.Rect(950, 0, 70, 650)
+areaDibujo = pygame.Rect(70, 0, 880, 650)  # Zona visible del lienzo entre los paneles
+
+# Herramientas del panel izquierdo
+HERRAMIENTAS = {}  # Registro de herramientas por nombre, en el orden de los botones
+
+
+class Herramienta:
+    """Herramienta del panel izquierdo: su botón y la figura que dibuja al arrastrar."""
 
-# Creación de los botones de herramientas
-botonLinea = Boton(10, 10, 50, 50, "Imagenes/Linea.jpg", colorBoton, hoover, llenado=1)
-botonRectangulo = Boton(10, 70, 50, 50, "Imagenes/Rectangulo.jpeg", colorBoton, hoover, llenado=1)
-botonRectangulo_rell = Boton(10, 130, 50, 50, "Imagenes/Rectangulo_Relleno.jpeg", colorBoton, hoover, llenado=1)
-botonCirculo = Boton(10, 190, 50, 50, "Imagenes/Circulo.jpg", colorBoton, hoover, llenado=1)
-botonCirculo_rell = Boton(10, 250, 50, 50, "Imagenes/Circulo_Relleno.jpeg", colorBoton, hoover, llenado=1)
-botonElipse = Boton(10, 310, 50, 50, "Imagenes/Elipse.jpg", colorBoton, hoover, llenado=1)
-botonTriangulo = Boton(10, 370, 50, 50, "Imagenes/Triangulo.jpg", colorBoton, hoover, llenado=1)
-botonCurva = Boton(10, 430, 50, 50, "Imagenes/Curva.jpg", colorBoton, hoover, llenado=1)
-
-botonVaciar = Boton(10, 550, 50, 50, "Imagenes/Vaciar.jpeg", colorBoton, hoover, llenado=1)
-
-# Creación de la paleta de colores
-colorRojo = Boton(960, 10, 50, 50, "", (255,0,0), (200,0,0), llenado=0)
-colorNaranja = Boton(960, 70, 50, 50, "", (255,165,0), (50,50,50), llenado=0)
-colorAmarillo = Boton(960, 130, 50, 50, "", (255,255,0), (200,200,0), llenado=0)
-colorVerde = Boton(960, 190, 50, 50, "", (0,255,0), (0,200,0), llenado=0)
-colorAzul = Boton(960, 250, 50, 50, "", (0,0,255), (0,0,200), llenado=0)   
-colorMorado = Boton(960, 310, 50, 50, "", (160,32,240), (200,0,200), llenado=0)
-colorRosado = Boton(960, 370, 50, 50, "", (255,0,128), (200,0,100), llenado=0)
-colorMarron = Boton(960, 430, 50, 50, "", (150, 75, 0), (100,50,0), llenado=0)
-colorGris = Boton(960, 490, 50, 50, "", (128,128,128), (100,100,100), llenado=0)
-colorNegro = Boton(960, 550, 50, 50, "", (0,0,0), (50,50,50), llenado=0)
-
-
-
-
-# Bucle principal del juego
-while running:
-    # Dibuja los paneles laterales
-    pygame.draw.rect(screen, (232, 223, 203), (0, 0, 70, 650))      # Panel izquierdo
-    pygame.draw.rect(screen, (232, 223, 203), (950, 0, 70, 650))    # Panel derecho
-    
-    # Dibuja los botones de herramientas
-    botonRectangulo.dibujar(screen)
-    botonRectangulo_rell.dibujar(screen)
-    botonLinea.dibujar(screen)
-    botonCirculo.dibujar(screen)
-    botonCirculo_rell.dibujar(screen)
-    botonElipse.dibujar(screen)
-    botonTriangulo.dibujar(screen)
-    botonCurva.dibujar(screen)
-    botonVaciar.dibujar(screen)
-    
-    # Dibuja la paleta de colores
-    colorRojo.dibujar(screen)
-    colorNaranja.dibujar(screen)
-    colorAmarillo.dibujar(screen)
-    colorVerde.dibujar(screen)
-    colorAzul.dibujar(screen)
-    colorMorado.dibujar(screen)
-    colorRosado.dibujar(screen)
-    colorMarron.dibujar(screen)
-    colorGris.dibujar(screen)
-    colorNegro.dibujar(screen)
-    
-
-    # poll for events
-    # pygame.QUIT event means the user clicked X to close your window
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-
-        elif event.type == pygame.MOUSEBUTTONDOWN:
-
-            if(botonLinea.rect.collidepoint(event.pos)):
-                linea = True
-                rectangulo = False
-                rectangulo_rell = False
-                circulo = False
-                circulo_rell = False
-                elipse = False
-                triangulo = False
-                curva = False
-                vaciar = False
-                print("Linea seleccionada")
-            elif(botonRectangulo.rect.collidepoint(event.pos)):
-                linea = False
-                rectangulo = True
-                rectangulo_rell = False
-                circulo = False
-                circulo_rell = False
-                elipse = False
-                triangulo = False
-                curva = False
-                vaciar = False
-                print("Rectangulo seleccionada")
-            elif(botonRectangulo_rell.rect.collidepoint(event.pos)):
-                linea = False
-                rectangulo = False
-                rectangulo_rell = True
-                circulo = False
-                circulo_rell = False
-                elipse = False
-                triangulo = False
-                curva = False
-                vaciar = False
-                print("Rectangulo rellenado seleccionada")
-            elif(botonCirculo.rect.collidepoint(event.pos)):
-                linea = False
-                rectangulo = False
-                rectangulo_rell = False
-                circulo = True
-                circulo_rell = False
-                elipse = False
-                triangulo = False
-                curva = False
-                vaciar = False
-            elif(botonCirculo_rell.rect.collidepoint(event.pos)):
-                linea = False
-                rectangulo = False
-                rectangulo_rell = False
-                circulo = False
-                circulo_rell = True
-                elipse = False
-                triangulo = False
-                curva = False
-                vaciar = False
-                print("Circulo rellenado seleccionada")
-            elif(botonElipse.rect.collidepoint(event.pos)):
-                linea = False
-                rectangulo = False
-                rectangulo_rell = False
-                circulo = False
-                circulo_rell = False
-                elipse = True
-                triangulo = False
-                curva = False
-                vaciar = False
-                print("Elipse seleccionada")
-            elif(botonTriangulo.rect.collidepoint(event.pos)):
-                linea = False
-                rectangulo = False
-                rectangulo_rell = False
-                circulo = False
-                circulo_rell = False
-                elipse = False
-                triangulo = True
-                curva = False
-                vaciar = False
-                print("Triangulo seleccionada")
-            elif(botonCurva.rect.collidepoint(event.pos)):
-                linea = False
-                rectangulo = False
-                rectangulo_rell = False
-                circulo = False
-                circulo_rell = False
-                elipse = False
-                triangulo = False
-                curva = True
-                vaciar = False
-                print("Curva seleccionada")
-            elif(botonVaciar.rect.collidepoint(event.pos)):
-                linea = False
-                rectangulo = False
-                rectangulo_rell = False
-                circulo = False
-                circulo_rell = False
-                elipse = False
-                triangulo = False
-                curva = False
-                vaciar = True
-                print("Regresar seleccionada")
-
-            elif(colorRojo.rect.collidepoint(event.pos)):
-                color = (230,0,0)
-            elif(colorNaranja.rect.collidepoint(event.pos)):
-                color = (255,165,0)
-            elif(colorAmarillo.rect.collidepoint(event.pos)):
-                color = (255,255,0)
-            elif(colorVerde.rect.collidepoint(event.pos)):
-                color = (0,255,0)
-            elif(colorAzul.rect.collidepoint(event.pos)):
-                color = (0,0,255)
-            elif(colorMorado.rect.collidepoint(event.pos)):
-                color = (160,32,240)
-            elif(colorRosado.rect.collidepoint(event.pos)):
-                color = (255,0,128)
-            elif(colorMarron.rect.collidepoint(event.pos)):
-                color = (150, 75, 0)
-            elif(colorGris.rect.collidepoint(event.pos)):
-                color = (128,128,128)
-            elif(colorNegro.rect.collidepoint(event.pos)):
-                color = (0,0,0)
-            
-
-            print("Mouse down at", event.pos)
-            inicio = event.pos
-
-        elif event.type == pygame.MOUSEBUTTONUP:
-            print("Mouse up at", event.pos)
-            final = event.pos
-            dibujar = True
-        
-
-    if(dibujar):
-        if linea:
-            lineaDDA(screen, inicio[0], inicio[1], final[0], final[1], color)
-
-            dibujar = False
-            
-        elif rectangulo:
-            left = min(inicio[0], final[0])
-            top = min(inicio[1], final[1])
-            ancho = abs(final[0] - inicio[0])
-            alto = abs(final[1] - inicio[1])
-
-            print(left, top, ancho, alto)
-
-            #pygame.draw.rect(screen, color, (left, top, ancho, alto), 5)
-            rectangle(screen, left, top, ancho, alto, color)
-
-            dibujar = False
-        
-        elif rectangulo_rell:
-            left = min(inicio[0], final[0])
-            top = min(inicio[1], final[1])
-            ancho = abs(final[0] - inicio[0])
-            alto = abs(final[1] - inicio[1])
-
-            print("Relleno:", left, top, ancho, alto)
-
-            # ¡Aquí llamamos a tu algoritmo de relleno de bajo nivel!
-            filled_rectangle(screen, left, top, ancho, alto, color)
-
-            dibujar = False
-
-        elif circulo:
-            x = final[0] - inicio[0]
-            y = final[1] - inicio[1]
-
-            centroX = (inicio[0] + final[0]) / 2
-            centroY = (inicio[1] + final[1]) / 2
-
-            r = math.sqrt(x**2 + y**2)
-
-            circleBresenham(screen, int(centroX), int(centroY), int(r), color)
-
-            dibujar = False
-
-        elif circulo_rell:
-            x_diff = final[0] - inicio[0]
-            y_diff = final[1] - inicio[1]
-
-            centroX = (inicio[0] + final[0]) // 2
-            centroY = (inicio[1] + final[1]) // 2
-
-            r = math.sqrt(x_diff**2 + y_diff**2) / 2 # Radio es la mitad de la distancia
-
-            print("Círculo Relleno:", int(centroX), int(centroY), int(r))
-
-            filled_circle_bresenham(screen, int(centroX), int(centroY), int(r), color)
-
-            dibujar = False
-
-        elif elipse:
-            left = min(inicio[0], final[0])
-            top = min(inicio[1], final[1])
-            ancho = abs(final[0] - inicio[0])
-            alto = abs(final[1] - inicio[1])
+    def __init__(self, nombre, imagen, fila, tipo, figura, mensaje):
+        """
+        Constructor de la clase Herramienta
+        :param nombre: nombre de la herramienta
+        :param imagen: archivo del icono dentro de Imagenes
+        :param fila: posición del botón en el panel (0 arriba), o None si se elige sólo con el teclado
+        :param tipo: tipo de figura de la escena que dibuja, o None si no dibuja figuras
+        :param figura: función (inicio, final) -> parámetros de la figura, o acción sobre el graficador
+        :param mensaje: texto que se muestra al seleccionarla, o None
+        """
+        self.nombre = nombre
+        self.imagen = imagen
+        self.fila = fila
+        self.tipo = tipo
+        self.figura = figura
+        self.mensaje = mensaje
 
-            print(left, top, ancho, alto)
 
-            #pygame.draw.ellipse(screen, color, (left, top, ancho, alto), 5)
-            drawElipse(screen, left + ancho//2, top + alto//2, ancho//2, alto//2, color)
+def herramienta(nombre, imagen, fila, tipo=None, mensaje=None):
+    """
+    Decorador que registra una herramienta en HERRAMIENTAS.
 
-            dibujar = False
-            
-        elif triangulo:
-            x1, y1 = inicio
-            x2, y2 = final
-            x3 = x1 - (x2 - x1)
-            y3 = y2
+    Si tipo es un tipo de figura de la escena, la función decorada recibe los
+    puntos (inicio, final) del arrastre y retorna los parámetros de la figura
+    (que se dibuja con el rasterizador de ese tipo). Si tipo es None, recibe
+    el Graficador al soltar el mouse y retorna la zona del documento que modificó.
+    """
+    def registrar(funcion):
+        HERRAMIENTAS[nombre] = Herramienta(nombre, imagen, fila, tipo, funcion, mensaje)
+        return funcion
+    return registrar
 
-            vertices = [(x1, y1), (x2, y2), (x3, y3)]
-            drawTriangulo(screen, vertices, color)
 
-            dibujar = False
+def _caja(inicio, final):
+    """Rectángulo (left, top, ancho, alto) que forman dos puntos."""
+    left = min(inicio[0], final[0])
+    top = min(inicio[1], final[1])
+    return left, top, abs(final[0] - inicio[0]), abs(final[1] - inicio[1])
 
-        elif curva:
-            x1, y1 = inicio
-            x4, y4 = final
-            x2 = x1 + (x4 - x1) // 3
-            y2 = y1 - 100
-            x3 = x1 + 2 * (x4 - x1) // 3
-            y3 = y4 - 100
 
-            p0 = (x1, y1)
-            p1 = (x2, y2)
-            p2 = (x3, y3)
-            p3 = (x4, y4)
+@herramienta("linea", "Linea.jpg", 0, LINEA, "Linea seleccionada")
+def _linea(inicio, final):
+    return (inicio[0], inicio[1], final[0], final[1])
 
-            drawCurvaBezier(screen, p0, p1, p2, p3, color)
 
-            dibujar = False
-            
+@herramienta("rectangulo", "Rectangulo.jpeg", 1, RECTANGULO, "Rectangulo seleccionada")
+def _rectangulo(inicio, final):
+    return _caja(inicio, final)
 
-        elif vaciar:
-            screen.fill("white")
 
-            vaciar = False
-            dibujar = False    
+@herramienta("rectangulo_rell", "Rectangulo_Relleno.jpeg", 2, RECTANGULO_RELLENO, "Rectangulo rellenado seleccionada")
+def _rectangulo_relleno(inicio, final):
+    return _caja(inicio, final)
 
 
-    # flip() the display to put your work on screen
-    pygame.display.flip()
+@herramienta("circulo", "Circulo.jpg", 3, CIRCULO)
+def _circulo(inicio, final):
+    x = final[0] - inicio[0]
+    y = final[1] - inicio[1]
+
+    centroX = (inicio[0] + final[0]) / 2
+    centroY = (inicio[1] + final[1]) / 2
+
+    r = math.sqrt(x**2 + y**2)
+
+    return (int(centroX), int(centroY), int(r))
+
+
+@herramienta("circulo_rell", "Circulo_Relleno.jpeg", 4, CIRCULO_RELLENO, "Circulo rellenado seleccionada")
+def _circulo_relleno(inicio, final):
+    x_diff = final[0] - inicio[0]
+    y_diff = final[1] - inicio[1]
+
+    centroX = (inicio[0] + final[0]) // 2
+    centroY = (inicio[1] + final[1]) // 2
+
+    r = math.sqrt(x_diff**2 + y_diff**2) / 2 # Radio es la mitad de la distancia
+
+    return (int(centroX), int(centroY), int(r))
+
+
+@herramienta("elipse", "Elipse.jpg", 5, ELIPSE, "Elipse seleccionada")
+def _elipse(inicio, final):
+    left, top, ancho, alto = _caja(inicio, final)
+    return (left + ancho//2, top + alto//2, ancho//2, alto//2)
+
+
+@herramienta("triangulo", "Triangulo.jpg", 6, TRIANGULO, "Triangulo seleccionada")
+def _triangulo(inicio, final):
+    x1, y1 = inicio
+    x2, y2 = final
+    x3 = x1 - (x2 - x1)
+    y3 = y2
+
+    return (x1, y1, x2, y2, x3, y3)
+
+
+@herramienta("curva", "Curva.jpg", 7, CURVA, "Curva seleccionada")
+def _curva(inicio, final):
+    x1, y1 = inicio
+    x4, y4 = final
+    x2 = x1 + (x4 - x1) // 3
+    y2 = y1 - 100
+    x3 = x1 + 2 * (x4 - x1) // 3
+    y3 = y4 - 100
+
+    return (x1, y1, x2, y2, x3, y3, x4, y4)
+
+
+@herramienta("relleno", "Balde.jpeg", 8, mensaje="Balde seleccionado")
+def _relleno(app):
+    if not areaDibujo.collidepoint(app.final):
+        return None
+    parametros = app.vista.figura_a_documento(RELLENO, (*app.final, app.tolerancia))
+    if not app.documento.get_rect().collidepoint(parametros[:2]):
+        return None
+    return app.confirmar(RELLENO, parametros, app.color)
+
+
+@herramienta("vaciar", "Vaciar.jpeg", 9, mensaje="Regresar seleccionada")
+def _vaciar(app):
+    with app.historial.accion(app.documento, app.documento.get_rect(), app.escena, 0):
+        app.escena.vaciar()
+        app.documento.vaciar()
+    app.elegir(())
+    app.herramienta = None  # Es una acción de un solo uso
+    return app.documento.get_rect()
+
+
+@herramienta("pincel", None, None, mensaje="Pincel seleccionado")
+def _pincel(app):
+    return app.confirmar_trazo()
+
+
+@herramienta("seleccion", None, None, mensaje="Seleccion: clic o marco para elegir figuras, arrastrar para moverlas")
+def _seleccion(app):
+    return app.soltar_seleccion()
+
+
+# Paleta del panel derecho: (color del botón, color hover, color con que se dibuja)
+PALETA = (
+    ((255,0,0), (200,0,0), (230,0,0)),
+    ((255,165,0), (50,50,50), (255,165,0)),
+    ((255,255,0), (200,200,0), (255,255,0)),
+    ((0,255,0), (0,200,0), (0,255,0)),
+    ((0,0,255), (0,0,200), (0,0,255)),
+    ((160,32,240), (200,0,200), (160,32,240)),
+    ((255,0,128), (200,0,100), (255,0,128)),
+    ((150, 75, 0), (100,50,0), (150, 75, 0)),
+    ((128,128,128), (100,100,100), (128,128,128)),
+    ((0,0,0), (50,50,50), (0,0,0)),
+)
+
+# Teclas que cambian la tolerancia del balde y cuánto la cambian
+TECLAS_TOLERANCIA = {
+    pygame.K_PLUS: 8, pygame.K_EQUALS: 8, pygame.K_KP_PLUS: 8,
+    pygame.K_MINUS: -8, pygame.K_KP_MINUS: -8,
+}
+
+# Herramientas sin botón y las teclas que las eligen
+TECLAS_HERRAMIENTA = {
+    pygame.K_p: "pincel",
+    pygame.K_v: "seleccion",
+}
+
+# Pincel a mano alzada: radio en píxeles del documento y teclas que lo cambian
+RADIO_PINCEL = 2
+RADIO_PINCEL_MAX = 32
+TECLAS_RADIO = {
+    pygame.K_RIGHTBRACKET: 1, pygame.K_LEFTBRACKET: -1,
+}
+DISTANCIA_TRAZO = 1.5    # Los puntos más cerca que esto del anterior no se agregan al trazo
+TOLERANCIA_TRAZO = 0.75  # Desviación máxima al simplificar el trazo terminado
+
+# Teclas que transforman las figuras elegidas: función del centro de la selección a la matriz
+TECLAS_TRANSFORMACION = {
+    pygame.K_r: lambda centro: seleccion.rotacion(15, centro),
+    pygame.K_e: lambda centro: seleccion.rotacion(-15, centro),
+    pygame.K_PERIOD: lambda centro: seleccion.escalado(1.25, centro=centro),
+    pygame.K_COMMA: lambda centro: seleccion.escalado(0.8, centro=centro),
+    pygame.K_h: lambda centro: seleccion.reflexion(True, centro),
+    pygame.K_j: lambda centro: seleccion.reflexion(False, centro),
+}
+TECLAS_BORRAR = (pygame.K_DELETE, pygame.K_BACKSPACE)
+RADIO_CLIC = 3  # Píxeles de la ventana alrededor del clic en que se busca una figura
+
+# Tecla que alterna entre el trazo rápido y el suavizado
+TECLA_SUAVIZADO = pygame.K_a
+
+# Tecla que muestra u oculta la superposición con los tiempos de cada cuadro
+TECLA_PERFIL = pygame.K_F3
+
+# Flechas que mueven la vista y cuántos píxeles de la ventana la mueven
+TECLAS_DESPLAZAMIENTO = {
+    pygame.K_LEFT: (64, 0), pygame.K_RIGHT: (-64, 0),
+    pygame.K_UP: (0, 64), pygame.K_DOWN: (0, -64),
+}
+
+# Las imágenes se buscan junto al módulo, no en el directorio de trabajo
+CARPETA_IMAGENES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Imagenes")
+
+
+def unir(a, b):
+    """Une dos zonas que pueden ser None; retorna None si ambas lo son."""
+    if a is None:
+        return b
+    return a if b is None else a.union(b)
+
+
+class Panel:
+    """
+    Panel lateral compuesto una sola vez en dos superficies: una con todos los
+    botones normales y otra con todos resaltados.
+
+    Mostrarlo es un blit, y cambiar el hover de un botón es copiar su zona de
+    la superficie que corresponda; los botones no se vuelven a dibujar.
+    """
+
+    def __init__(self, rect, botones):
+        """
+        Constructor de la clase Panel
+        :param rect: zona de la ventana que ocupa el panel
+        :param botones: botones que contiene
+        """
+        self.rect = pygame.Rect(rect)
+        self.botones = botones
+        self.recomponer()
+
+    def recomponer(self):
+        """Vuelve a componer las superficies, por ejemplo al llegar un icono diferido."""
+        self.normal = self._componer(False)
+        self.resaltado = self._componer(True)
+
+    def _componer(self, hover):
+        superficie = pygame.Surface(self.rect.size)
+        if pygame.display.get_surface():
+            superficie = superficie.convert()
+        superficie.fill(colorPanel)
+        for boton in self.botones:
+            anterior, boton.hover = boton.hover, hover
+            boton.dibujar(superficie, self.rect.topleft)
+            boton.hover = anterior
+        return superficie
+
+    def dibujar(self, pantalla):
+        """Muestra el panel con el hover actual de sus botones; retorna la zona tocada."""
+        pantalla.blit(self.normal, self.rect)
+        for boton in self.botones:
+            if boton.hover:
+                self.mostrar_boton(pantalla, boton)
+        return self.rect
+
+    def mostrar_boton(self, pantalla, boton):
+        """Copia a la pantalla el botón en su estado de hover actual; retorna la zona tocada."""
+        origen = self.resaltado if boton.hover else self.normal
+        pantalla.blit(origen, boton.rect, boton.rect.move(-self.rect.x, -self.rect.y))
+        return boton.rect
+
+
+class IndiceBotones:
+    """
+    Rejilla uniforme para encontrar el botón bajo un punto sin recorrerlos todos.
+
+    Cada celda guarda los botones que la tocan; una consulta mira sólo los de
+    la celda del punto, así que cuesta lo mismo con 19 botones que con cien.
+    """
+
+    def __init__(self, botones, celda=64):
+        """
+        Constructor de la clase IndiceBotones
+        :param botones: pares (boton, valor); se retorna el valor del botón encontrado
+        :param celda: lado de las celdas de la rejilla en píxeles
+        """
+        self.celda = celda
+        self.celdas = {}
+        for boton, valor in botones:
+            r = boton.rect
+            for cx in range(r.left // celda, (r.right - 1) // celda + 1):
+                for cy in range(r.top // celda, (r.bottom - 1) // celda + 1):
+                    self.celdas.setdefault((cx, cy), []).append((boton, valor))
+
+    def buscar(self, pos):
+        """Retorna el par (boton, valor) bajo pos, o None."""
+        for boton, valor in self.celdas.get((pos[0] // self.celda, pos[1] // self.celda), ()):
+            if boton.rect.collidepoint(pos):
+                return boton, valor
+        return None
+
+
+class Graficador:
+    """
+    Estado y lógica de eventos del programa de dibujo, separados de la ventana.
+
+    Se le entregan los eventos de cada vuelta del bucle con procesar(); así la
+    misma lógica sirve para la ventana y para reproducir sesiones grabadas.
+    """
 
-    clock.tick(60)  # limits FPS to 60
+    def __init__(self, screen, iconos_diferidos=False, tolerancia=0, documento=None, archivo=None):
+        """
+        Constructor de la clase Graficador
+        :param screen: superficie donde se muestra el programa (la ventana u otra de 1020x650)
+        :param iconos_diferidos: decodifica los iconos en segundo plano y muestra marcadores mientras tanto
+        :param tolerancia: diferencia máxima por canal que rellena el balde
+        :param documento: tamaño (ancho, alto) del dibujo; por defecto el de la zona de dibujo
+        :param archivo: archivo .svg, .png o .lienzo donde Ctrl+S guarda el dibujo
+        """
+        self.screen = screen
+        self.screen.fill("white")  # Fondo blanco
+        self.documento = Mosaico(*(documento or areaDibujo.size))  # Figuras confirmadas, por teselas
+        self.vista = Vista(self.documento, areaDibujo)  # Parte del documento que se ve, con su zoom
+        self.lienzo = screen.copy()  # Documento visto a través de la vista; la pantalla lo muestra
+        self.lienzo.set_clip(areaDibujo)  # Lo tapado por los paneles no se compone
+        self.vista.componer(self.lienzo)
+        self.running = True  # Control del bucle principal
+
+        # Variables de estado para el dibujo
+        self.dibujar = False  # Controla si se debe dibujar
+        self.inicio = (0, 0)  # Punto inicial del dibujo
+        self.final = (0, 0)   # Punto final del dibujo
+        self.arrastrando = False      # Hay un botón del mouse presionado
+        self.pulsacionEnLienzo = False  # El botón se presionó en el lienzo y no sobre un botón
+        self.paneando = False         # El botón del medio mueve la vista
+        self.posicionMouse = areaDibujo.center  # Última posición conocida, centro del zoom
+        self.posicionArrastre = None  # Última posición del mouse mientras se arrastra
+        self.areaVistaPrevia = None   # Zona de la pantalla ocupada por la vista previa
+        self.trazo = None        # Puntos del documento del trazo a mano alzada en curso
+        self.trazoMostrado = 0   # Cuántos de esos puntos ya muestra la vista previa
+        self.radioPincel = RADIO_PINCEL  # Se cambia con [ y ]
+        self.color = (0,0,0)  # Color actual (negro por defecto)
+        self.tolerancia = tolerancia  # Del balde; se cambia con + y -
+        self.herramienta = "linea"  # Herramienta activa (nombre en HERRAMIENTAS) o None
+        self.escena = Escena()  # Figuras confirmadas, en coordenadas del documento
+        self.indiceFiguras = seleccion.IndiceFiguras(self.escena)
+        self.seleccion = np.empty(0, dtype=np.intp)  # Índices de las figuras elegidas, en orden
+        self.moviendo = False       # El arrastre en curso mueve la selección (si no, marca un marco)
+        self.areaSeleccion = None   # Zona de la pantalla con las cajas de la selección dibujadas
+        self.seleccionCambiada = False  # Hay que volver a dibujar las cajas
+        self.historial = Historial()  # Deshacer (Ctrl+Z) y rehacer (Ctrl+Y)
+        self.archivo = archivo  # Dónde guarda Ctrl+S
+        self.autoguardado = None  # archivos.Autoguardado del archivo .lienzo, si hay uno
+        self.superposicion = None  # perfil.Superposicion, mientras se muestra (tecla F3)
+
+        # Creación de los botones de herramientas y de la paleta de colores
+        pares = []
+        for h in HERRAMIENTAS.values():
+            if h.fila is None:
+                continue
+            boton = Boton(10, 10 + 60 * h.fila, 50, 50, os.path.join(CARPETA_IMAGENES, h.imagen),
+                          colorBoton, hoover, llenado=1, diferida=iconos_diferidos)
+            pares.append((boton, h))
+        for fila, (normal, resaltado, color) in enumerate(PALETA):
+            pares.append((Boton(960, 10 + 60 * fila, 50, 50, "", normal, resaltado, llenado=0), color))
+
+        self.botones = [boton for boton, _ in pares]
+        if iconos_diferidos:
+            recursos.precargar((b.rutaImagen, b.tamanoImagen) for b in self.botones if b.rutaImagen)
+        self.indice = IndiceBotones(pares)
+        self.paneles = [
+            Panel(panelIzquierdo, [b for b, v in pares if isinstance(v, Herramienta)]),
+            Panel(panelDerecho, [b for b, v in pares if not isinstance(v, Herramienta)]),
+        ]
+        self.panelDe = {boton: panel for panel in self.paneles for boton in panel.botones}
+        self.botonHover = None  # Botón bajo el mouse
+
+    def dibujar_paneles(self, pantalla):
+        """Muestra los paneles laterales ya compuestos y retorna las zonas tocadas."""
+        return [panel.dibujar(pantalla) for panel in self.paneles]
+
+    def actualizar_iconos(self):
+        """Pone en los paneles los iconos diferidos que ya se decodificaron; retorna las zonas tocadas."""
+        sucios = []
+        for panel in self.paneles:
+            if [boton for boton in panel.botones if boton.cargar_imagen()]:
+                panel.recomponer()
+                sucios.append(panel.dibujar(self.screen))
+        return sucios
+
+    def figura_arrastrada(self, inicio, final):
+        """
+        Calcula la figura que forma la herramienta activa al arrastrar el mouse.
+
+        Args:
+            inicio: Punto donde se presionó el botón
+            final: Punto actual o donde se soltó el botón
+
+        Returns:
+            Tupla (tipo, parametros), o None si la herramienta no dibuja figuras.
+        """
+        h = HERRAMIENTAS.get(self.herramienta)
+        if h is None or h.tipo is None:
+            return None
+        return h.tipo, h.figura(inicio, final)
+
+    def confirmar(self, tipo, parametros, color):
+        """
+        Registra la figura en la escena y en el historial y la dibuja en el documento.
+
+        Args:
+            tipo: Tipo de figura (LINEA, RECTANGULO, ...)
+            parametros: Parámetros en coordenadas del documento
+            color: Color de la figura en formato RGB
 
-pygame.quit()
\ No newline at end of file
+        Returns:
+            pygame.Rect con la zona del documento que cambió.
+        """
+        if tipo == RELLENO:
+            # El balde puede llegar a todo el documento: el parche del
+            # historial cubre sólo la zona que de verdad rellena
+            region = self.documento.region_relleno(*parametros)
+            with self.historial.accion(self.documento, region[0], self.escena, len(self.escena)):
+                self.escena.agregar(tipo, parametros, color)
+                area = self.documento.rellenar(region, color)
+            return area
+        with self.historial.accion(self.documento, caja_figura(tipo, parametros), self.escena, len(self.escena)):
+            self.escena.agregar(tipo, parametros, color)
+            area = self.documento.dibujar(tipo, parametros, color)
+        return area
+
+    def agregar_punto(self, pos, forzar=False):
+        """
+        Suma al trazo en curso el punto del documento bajo el punto pos de la ventana.
+
+        Los puntos a menos de DISTANCIA_TRAZO del anterior se descartan a
+        medida que llegan, salvo con forzar (el último del trazo), así que
+        un mouse que informa cientos de posiciones por cuadro no hace crecer
+        el trazo más que lo que se movió.
+        """
+        x, y = self.vista.a_documento(pos)
+        punto = (round(x), round(y))
+        if self.trazo:
+            distancia = math.dist(punto, self.trazo[-1])
+            if distancia == 0 or distancia < DISTANCIA_TRAZO and not forzar:
+                return
+        self.trazo.append(punto)
+
+    def confirmar_trazo(self):
+        """
+        Termina el trazo a mano alzada en curso: lo simplifica y lo registra
+        como una figura TRAZO por segmento, todas en una sola acción del
+        historial, y las dibuja en el documento de una vez.
+
+        Returns:
+            pygame.Rect con la zona del documento que cambió, o None si no había trazo.
+        """
+        puntos, self.trazo = self.trazo, None
+        self.trazoMostrado = 0
+        if not puntos:
+            return None
+        xs, ys = np.array(puntos, dtype=np.int32).T
+        conservar = prim.simplificar_polilinea(xs, ys, TOLERANCIA_TRAZO)
+        xs, ys = xs[conservar], ys[conservar]
+        if len(xs) == 1:
+            xs, ys = np.repeat(xs, 2), np.repeat(ys, 2)  # Un clic sin mover: un solo punto
+
+        n = len(xs) - 1
+        tipos = np.full(n, TRAZO, dtype=np.uint8)
+        parametros = np.zeros((n, MAX_PARAMETROS), dtype=np.int32)
+        parametros[:, :5] = np.stack([xs[:-1], ys[:-1], xs[1:], ys[1:], np.full(n, self.radioPincel)], axis=1)
+        colores = np.tile(np.array(self.color, dtype=np.uint8), (n, 1))
+        cajas = cajas_figuras(tipos, parametros)
+        x0, y0 = cajas[:, :2].min(axis=0).tolist()
+        x1, y1 = cajas[:, 2:].max(axis=0).tolist()
+        log.debug("Trazo: %d puntos, %d segmentos", len(puntos), n)
+        with self.historial.accion(self.documento, pygame.Rect(x0, y0, x1 - x0, y1 - y0),
+                                   self.escena, len(self.escena)):
+            self.escena.extender((tipos, parametros, colores))
+            area = self.documento.dibujar_figuras(tipos, parametros, colores)
+        return area
+
+    def elegir(self, indices):
+        """Cambia las figuras elegidas por la herramienta de selección."""
+        self.seleccion = np.asarray(indices, dtype=np.intp)
+        self.seleccionCambiada = True
+
+    def empezar_seleccion(self, pos):
+        """
+        Al presionar el botón con la herramienta de selección: un clic sobre
+        una figura la elige (o mantiene la selección, si ya estaba elegida) y
+        el arrastre la mueve; en un lugar vacío el arrastre marca un marco.
+        """
+        x, y = self.vista.a_documento(pos)
+        figura = self.indiceFiguras.en_punto(x, y, max(1, round(RADIO_CLIC / self.vista.zoom)))
+        self.moviendo = figura is not None
+        if figura is None:
+            self.elegir(())
+        elif figura not in self.seleccion:
+            self.elegir([figura])
+
+    def soltar_seleccion(self):
+        """
+        Al soltar el botón con la herramienta de selección: mueve las figuras
+        elegidas lo que se arrastró, o elige las que quedan dentro del marco.
+
+        Returns:
+            pygame.Rect con la zona del documento que cambió, o None.
+        """
+        self.seleccionCambiada = True
+        if not areaDibujo.collidepoint(self.inicio):
+            return None
+        x0, y0 = self.vista.a_documento(self.inicio)
+        x1, y1 = self.vista.a_documento(self.final)
+        if self.moviendo:
+            self.moviendo = False
+            dx, dy = round(x1 - x0), round(y1 - y0)
+            return self.transformar_seleccion(seleccion.traslacion(dx, dy)) if dx or dy else None
+        marco = pygame.Rect(math.floor(min(x0, x1)), math.floor(min(y0, y1)),
+                            math.ceil(abs(x1 - x0)) + 1, math.ceil(abs(y1 - y0)) + 1)
+        if marco.w > 1 or marco.h > 1:
+            self.elegir(self.indiceFiguras.contenidas(marco))
+        return None
+
+    def _reemplazar_seleccion(self, figuras, cuantas):
+        """
+        Cambia las figuras elegidas por otras, en su lugar de la escena, como
+        una acción del historial, y reconstruye sólo la zona del documento
+        que cubrían antes o cubren ahora.
+
+        Args:
+            figuras: Tupla (tipos, parametros, colores, suavizados) con las figuras nuevas
+            cuantas: Cuántas figuras nuevas reemplazan a cada elegida
+
+        Returns:
+            pygame.Rect con la zona del documento que cambió.
+        """
+        indices = self.seleccion
+        self.indiceFiguras.actualizar()
+        cajas = self.indiceFiguras.cajas[indices]
+        if len(figuras[0]):
+            cajas = np.concatenate([cajas, cajas_figuras(figuras[0], figuras[1])])
+        zona = seleccion.caja_total(cajas).clip(self.documento.get_rect())
+        if (self.escena.tipos[:len(self.escena)] == RELLENO).any():
+            zona = self.documento.get_rect()  # Los baldes dependen de todo el documento
+
+        with self.historial.accion(self.documento, zona, self.escena, int(indices[0])):
+            self.elegir(self.escena.reemplazar(indices, figuras, cuantas))
+            area = self.documento.reconstruir(self.escena, zona, self.indiceFiguras.en_rect(zona))
+        log.debug("Reemplazadas %d figuras por %d en %s", len(indices), len(figuras[0]), zona)
+        return area
+
+    def transformar_seleccion(self, matriz):
+        """
+        Aplica una transformación afín (matriz 3x3, ver seleccion.py) a las figuras elegidas.
+
+        Returns:
+            pygame.Rect con la zona del documento que cambió, o None si no hay selección.
+        """
+        if not len(self.seleccion):
+            return None
+        escena = self.escena
+        tipos, parametros, origen = transformar_afin(escena.tipos[self.seleccion],
+                                                     escena.parametros[self.seleccion], matriz)
+        colores = escena.colores[self.seleccion][origen]
+        suavizados = escena.suavizados[self.seleccion][origen]
+        return self._reemplazar_seleccion((tipos, parametros, colores, suavizados),
+                                          np.bincount(origen, minlength=len(self.seleccion)))
+
+    def borrar_seleccion(self):
+        """Quita de la escena las figuras elegidas; retorna la zona del documento que cambió, o None."""
+        if not len(self.seleccion):
+            return None
+        escena = self.escena
+        vacias = tuple(getattr(escena, nombre)[:0] for nombre in ARREGLOS)
+        return self._reemplazar_seleccion(vacias, np.zeros(len(self.seleccion), dtype=np.intp))
+
+    def centro_seleccion(self):
+        """Centro de la caja que contiene a las figuras elegidas, en el documento."""
+        self.indiceFiguras.actualizar()
+        return seleccion.caja_total(self.indiceFiguras.cajas[self.seleccion]).center
+
+    def dibujar_seleccion(self, arrastre=None):
+        """
+        Muestra sobre la pantalla las cajas de las figuras elegidas, corridas
+        lo que se arrastró si se están moviendo, o el marco en curso.
+
+        Returns:
+            pygame.Rect con la zona de la pantalla tocada, o None.
+        """
+        zona = None
+        if arrastre and not self.moviendo:
+            marco = pygame.Rect(min(self.inicio[0], arrastre[0]), min(self.inicio[1], arrastre[1]),
+                                abs(arrastre[0] - self.inicio[0]) + 1, abs(arrastre[1] - self.inicio[1]) + 1)
+            self.screen.set_clip(areaDibujo)
+            zona = pygame.draw.rect(self.screen, seleccion.COLOR_SELECCION, marco, 1)
+            self.screen.set_clip(None)
+            zona = zona.clip(areaDibujo)
+        if len(self.seleccion):
+            self.indiceFiguras.actualizar()
+            desplazamiento = (arrastre[0] - self.inicio[0], arrastre[1] - self.inicio[1]) if arrastre else (0, 0)
+            zona = unir(zona, seleccion.dibujar_cajas(self.screen, self.vista, self.indiceFiguras.cajas[self.seleccion],
+                                                      desplazamiento if self.moviendo else (0, 0)))
+        return zona
+
+    def abrir(self, ruta):
+        """
+        Reemplaza el dibujo por el de un archivo .svg, .png o .lienzo.
+
+        El documento toma el tamaño del archivo y se vacía el historial. Un
+        SVG trae sus figuras, que se rasterizan por teselas; una imagen trae
+        sólo píxeles, y la escena empieza vacía.
+
+        Returns:
+            pygame.Rect con la zona de la pantalla que cambió.
+        """
+        if ruta.lower().endswith(".svg"):
+            escena, opciones = leer_svg(ruta)
+            tamano = (opciones.get("ancho", self.documento.ancho), opciones.get("alto", self.documento.alto))
+            documento = Mosaico(*tamano, fondo=opciones.get("fondo", self.documento.fondo))
+            documento.rasterizar(escena)
+        else:
+            documento = archivos.abrir(ruta)
+            escena = Escena()
+        self.documento = documento
+        self.escena = escena
+        self.indiceFiguras = seleccion.IndiceFiguras(escena)
+        self.elegir(())
+        self.vista = Vista(self.documento, areaDibujo)
+        self.historial.vaciar()
+        return self.mostrar_lienzo(self.vista.componer(self.lienzo))
+
+    def guardar(self, ruta):
+        """Guarda el dibujo como figuras (.svg) o como imagen (.png o .lienzo), según la extensión."""
+        if ruta.lower().endswith(".svg"):
+            escribir_svg(ruta, self.escena, *self.documento.get_size(), self.documento.fondo)
+        elif self.autoguardado and ruta == self.autoguardado.ruta:
+            self.autoguardado.guardar_ya()  # Sólo faltan las teselas que cambiaron
+        else:
+            archivos.guardar(self.documento, ruta)
+
+    def autoguardar(self, ruta):
+        """Mantiene al día el archivo .lienzo ruta mientras se dibuja; si no existe, lo crea."""
+        self.autoguardado = archivos.Autoguardado(self.documento, ruta)
+
+    def cerrar(self):
+        """Termina el autoguardado, si hay uno, escribiendo lo que falte."""
+        if self.autoguardado:
+            self.autoguardado.cerrar()
+            self.autoguardado = None
+
+    def mostrar_documento(self, area):
+        """Recompone el lienzo y la pantalla en lo que se ve de una zona del documento; retorna la zona de la pantalla."""
+        return self.mostrar_lienzo(self.vista.componer(self.lienzo, self.vista.a_pantalla(area)))
+
+    def mostrar_lienzo(self, area):
+        """Copia a la pantalla una zona del lienzo sin tapar los paneles; retorna la zona copiada."""
+        area = area.clip(areaDibujo)
+        self.screen.blit(self.lienzo, area, area)
+        return area
+
+    def repintar_boton(self, boton):
+        """Muestra un botón en su estado de hover actual; retorna la zona tocada."""
+        return self.panelDe[boton].mostrar_boton(self.screen, boton)
+
+    def seleccionar(self, pos):
+        """
+        Aplica el botón de herramienta o de color que haya en pos, si hay alguno.
+
+        Returns:
+            True si en pos había un botón.
+        """
+        encontrado = self.indice.buscar(pos)
+        if encontrado is None:
+            return False
+        valor = encontrado[1]
+        if isinstance(valor, Herramienta):
+            self.herramienta = valor.nombre
+            if valor.mensaje:
+                log.info(valor.mensaje)
+        else:
+            self.color = valor
+        return True
+
+    def procesar(self, eventos):
+        """
+        Atiende los eventos de una vuelta del bucle principal.
+
+        Args:
+            eventos: Lista de eventos de pygame
+
+        Returns:
+            Lista de rectángulos de la pantalla que cambiaron.
+        """
+        sucios = []
+        area = None  # Zona del documento modificada en esta vuelta
+        vistaMovida = False  # Cambió el desplazamiento o el zoom
+
+        # poll for events
+        # pygame.QUIT event means the user clicked X to close your window
+        for event in eventos:
+            if event.type == pygame.QUIT:
+                self.running = False
+
+            elif event.type == pygame.VIDEOEXPOSE:
+                sucios.append(self.screen.get_rect())
+
+            elif event.type == recursos.ICONOS_LISTOS:
+                sucios.extend(self.actualizar_iconos())
+
+            elif event.type == pygame.MOUSEMOTION:
+                self.posicionMouse = event.pos
+                if self.paneando:
+                    self.vista.desplazar(*event.rel)
+                    vistaMovida = True
+                elif self.trazo is not None:
+                    self.agregar_punto(event.pos)
+                elif self.arrastrando:
+                    self.posicionArrastre = event.pos
+
+                # Sólo pueden cambiar el botón que deja el mouse y el que encuentra
+                encontrado = self.indice.buscar(event.pos)
+                boton = encontrado[0] if encontrado else None
+                if boton is not self.botonHover:
+                    for cambio in (self.botonHover, boton):
+                        if cambio and cambio.actualizar_hover(event.pos):
+                            sucios.append(self.repintar_boton(cambio))
+                    self.botonHover = boton
+
+            elif event.type == pygame.KEYDOWN and event.mod & pygame.KMOD_CTRL:
+                if event.key == pygame.K_z and not event.mod & pygame.KMOD_SHIFT:
+                    area = unir(area, self.historial.deshacer(self.documento, self.escena))
+                    self.elegir(())  # Los índices elegidos ya no son los mismos
+                elif event.key == pygame.K_y or event.key == pygame.K_z:
+                    area = unir(area, self.historial.rehacer(self.documento, self.escena))
+                    self.elegir(())
+                elif event.key == pygame.K_s and self.archivo:
+                    self.guardar(self.archivo)
+                    log.info("Dibujo guardado en %s", self.archivo)
+
+            elif event.type == pygame.KEYDOWN and event.key in TECLAS_TOLERANCIA:
+                self.tolerancia = min(max(self.tolerancia + TECLAS_TOLERANCIA[event.key], 0), 255)
+                log.info("Tolerancia del balde: %d", self.tolerancia)
+
+            elif event.type == pygame.KEYDOWN and event.key in TECLAS_HERRAMIENTA:
+                h = HERRAMIENTAS[TECLAS_HERRAMIENTA[event.key]]
+                self.herramienta = h.nombre
+                log.info(h.mensaje)
+
+            elif event.type == pygame.KEYDOWN and event.key in TECLAS_TRANSFORMACION and len(self.seleccion):
+                area = unir(area, self.transformar_seleccion(TECLAS_TRANSFORMACION[event.key](self.centro_seleccion())))
+
+            elif event.type == pygame.KEYDOWN and event.key in TECLAS_BORRAR and len(self.seleccion):
+                area = unir(area, self.borrar_seleccion())
+
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE and len(self.seleccion):
+                self.elegir(())
+
+            elif event.type == pygame.KEYDOWN and event.key in TECLAS_RADIO:
+                self.radioPincel = min(max(self.radioPincel + TECLAS_RADIO[event.key], 0), RADIO_PINCEL_MAX)
+                log.info("Radio del pincel: %d", self.radioPincel)
+
+            elif event.type == pygame.KEYDOWN and event.key == TECLA_PERFIL:
+                if self.superposicion:
+                    sucios.append(self.mostrar_lienzo(self.superposicion.rect))
+                    self.superposicion = None
+                else:
+                    activar_perfil()
+                    self.superposicion = perfil.Superposicion((areaDibujo.right - perfil.Superposicion.ANCHO - 8,
+                                                               areaDibujo.top + 8))
+
+            elif event.type == pygame.KEYDOWN and event.key == TECLA_SUAVIZADO:
+                prim.usar_suavizado(not prim.SUAVIZADO)
+                log.info("Suavizado %s", "activado" if prim.SUAVIZADO else "desactivado")
+
+            elif event.type == pygame.KEYDOWN and event.key in TECLAS_DESPLAZAMIENTO:
+                self.vista.desplazar(*TECLAS_DESPLAZAMIENTO[event.key])
+                vistaMovida = True
+
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_HOME:
+                self.vista.restablecer()
+                vistaMovida = True
+
+            elif event.type == pygame.MOUSEWHEEL:
+                if areaDibujo.collidepoint(self.posicionMouse) and event.y:
+                    vistaMovida |= self.vista.acercar(1 if event.y > 0 else -1, self.posicionMouse)
+
+            elif event.type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP) and event.button in (4, 5):
+                pass  # La rueda también llega como botones 4 y 5; la atiende MOUSEWHEEL
+
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 2:
+                self.paneando = True
+
+            elif event.type == pygame.MOUSEBUTTONUP and event.button == 2:
+                self.paneando = False
+
+            elif event.type == pygame.MOUSEBUTTONDOWN:
+                boton = self.seleccionar(event.pos)
+                self.pulsacionEnLienzo = not boton and areaDibujo.collidepoint(event.pos)
+
+                log.debug("Mouse down at %s", event.pos)
+                self.inicio = event.pos
+                self.arrastrando = True
+                if self.herramienta == "pincel" and areaDibujo.collidepoint(event.pos):
+                    self.trazo = []
+                    self.agregar_punto(event.pos)
+                elif self.herramienta == "seleccion" and areaDibujo.collidepoint(event.pos):
+                    self.empezar_seleccion(event.pos)
+
+            elif event.type == pygame.MOUSEBUTTONUP:
+                log.debug("Mouse up at %s", event.pos)
+                self.final = event.pos
+                if self.trazo is not None:
+                    self.agregar_punto(event.pos, forzar=True)
+                self.dibujar = True
+                self.arrastrando = False
+                self.posicionArrastre = None
+
+
+        if(self.dibujar):
+            with perfil.medir(f"herramienta {self.herramienta}"):
+                h = HERRAMIENTAS.get(self.herramienta)
+                if h is not None and h.tipo is None:
+                    area = unir(area, h.figura(self))
+                elif self.pulsacionEnLienzo:
+                    # Un clic en un botón elige la herramienta o el color, no dibuja
+                    figura = self.figura_arrastrada(self.inicio, self.final)
+                    if figura:
+                        tipo, parametros = figura
+                        parametros = self.vista.figura_a_documento(tipo, parametros)
+                        log.debug("Figura: %s %s", tipo, parametros)
+                        area = unir(area, self.confirmar(tipo, parametros, self.color))
+
+            self.dibujar = False
+
+        if vistaMovida:
+            # Se ve otra parte del documento: se recompone toda la vista
+            sucios.append(self.mostrar_lienzo(self.vista.componer(self.lienzo)))
+            self.areaVistaPrevia = None
+            self.trazoMostrado = 0
+            area = None
+
+        # La vista previa anterior se borra copiando encima lo que hay en el lienzo
+        if self.areaVistaPrevia and (area or self.posicionArrastre):
+            sucios.append(self.mostrar_lienzo(self.areaVistaPrevia))
+            self.areaVistaPrevia = None
+            self.trazoMostrado = 0
+
+        if area:
+            sucios.append(self.mostrar_documento(area))
+
+        # Del trazo a mano alzada se dibujan de una vez los puntos que llegaron
+        # en esta vuelta, unidos al último ya mostrado
+        if self.trazo and self.trazoMostrado < len(self.trazo):
+            xs, ys = zip(*(self.vista.punto_a_pantalla(p) for p in self.trazo[max(self.trazoMostrado - 1, 0):]))
+            self.screen.set_clip(areaDibujo)
+            zona = prim.trazo(self.screen, xs, ys, round(self.radioPincel * self.vista.zoom), self.color)
+            self.screen.set_clip(None)
+            if zona:
+                self.areaVistaPrevia = unir(self.areaVistaPrevia, zona)
+                sucios.append(zona)
+            self.trazoMostrado = len(self.trazo)
+
+        # Las cajas de la selección (y el marco o el movimiento en curso) se
+        # dibujan sólo sobre la pantalla, encima de todo lo demás
+        arrastre = self.posicionArrastre if self.herramienta == "seleccion" else None
+        if self.herramienta != "seleccion" and len(self.seleccion):
+            self.elegir(())
+        if self.seleccionCambiada or arrastre or sucios:
+            if self.areaSeleccion:
+                sucios.append(self.mostrar_lienzo(self.areaSeleccion))
+                self.areaSeleccion = None
+            self.areaSeleccion = self.dibujar_seleccion(arrastre)
+            if self.areaSeleccion:
+                sucios.append(self.areaSeleccion)
+            self.seleccionCambiada = False
+
+        # La figura en curso se dibuja sólo sobre la pantalla; el lienzo no se toca
+        if self.posicionArrastre:
+            figura = self.figura_arrastrada(self.inicio, self.posicionArrastre) if self.pulsacionEnLienzo else None
+            if figura:
+                self.screen.set_clip(areaDibujo)
+                self.areaVistaPrevia = self.vista.dibujar_figura(self.screen, *figura, self.color)
+                self.screen.set_clip(None)
+                sucios.append(self.areaVistaPrevia)
+            self.posicionArrastre = None
+
+        if self.autoguardado:
+            self.autoguardado.revisar()
+
+        # La superposición se vuelve a dibujar cada cuadro sobre lo que hay en el lienzo
+        if self.superposicion:
+            self.mostrar_lienzo(self.superposicion.rect)
+            sucios.append(self.superposicion.dibujar(self.screen))
+
+        return sucios
+
+
+def activar_perfil(traza=False):
+    """Empieza a medir el rasterizado y, además, el dibujo de los paneles y el historial."""
+    perfil.activar(traza)
+    perfil.instrumentar(Panel, ("dibujar", "mostrar_boton", "_componer"))
+    perfil.instrumentar(Boton, ("dibujar",))
+    perfil.instrumentar(Historial, ("deshacer", "rehacer"))
+    perfil.instrumentar(archivos.Autoguardado, ("revisar", "guardar_ya"))
+
+
+class Cronometro:
+    """Mide el tiempo de las etapas del arranque."""
+
+    def __init__(self):
+        self.inicio = self.ultimo = time.perf_counter()
+        self.etapas = []
+
+    def marcar(self, etapa):
+        """Registra el tiempo transcurrido desde la marca anterior."""
+        ahora = time.perf_counter()
+        self.etapas.append((etapa, ahora - self.ultimo))
+        self.ultimo = ahora
+
+    def informe(self):
+        lineas = [f"{etapa:<26}{1000 * t:8.1f} ms" for etapa, t in self.etapas]
+        lineas.append(f"{'total':<26}{1000 * (self.ultimo - self.inicio):8.1f} ms")
+        lineas += [f"  {etapa:<24}{1000 * t:8.1f} ms" for etapa, t in sorted(recursos.tiempos.items())]
+        return "\n".join(lineas)
+
+
+def _tamano(texto):
+    """Convierte 'ANCHOxALTO' en una tupla de enteros, para argparse."""
+    try:
+        ancho, alto = (int(v) for v in texto.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"se esperaba ANCHOxALTO, no '{texto}'") from None
+    if ancho <= 0 or alto <= 0:
+        raise argparse.ArgumentTypeError("el ancho y el alto deben ser positivos")
+    return ancho, alto
+
+
+def _configurar_registro(nivel):
+    """
+    Muestra los mensajes del nivel dado o más graves en la salida estándar.
+
+    Pasan por un búfer que el bucle principal vacía una vez por cuadro, así
+    que varios mensajes de un mismo cuadro se escriben juntos; las
+    advertencias y los errores se escriben en seguida.
+
+    Returns:
+        El logging.handlers.MemoryHandler, para vaciarlo y quitarlo al terminar.
+    """
+    salida = logging.StreamHandler(sys.stdout)
+    salida.setFormatter(logging.Formatter("%(message)s"))
+    bufer = logging.handlers.MemoryHandler(256, logging.WARNING, salida)
+    raiz = logging.getLogger()
+    raiz.setLevel(nivel.upper())
+    raiz.addHandler(bufer)
+    return bufer
+
+
+def main(argv=None):
+    """Abre la ventana del graficador y atiende sus eventos hasta que se cierra."""
+    parser = argparse.ArgumentParser(description="Programa de dibujo.")
+    parser.add_argument("--grabar", metavar="RUTA",
+                        help="guarda los eventos de la sesión en un archivo JSONL para reproducirla")
+    parser.add_argument("--iconos-diferidos", action="store_true",
+                        help="abre la ventana sin esperar a decodificar los iconos")
+    parser.add_argument("--tolerancia", type=int, default=0,
+                        help="diferencia máxima por canal (0 a 255) que rellena el balde")
+    parser.add_argument("--documento", type=_tamano, metavar="ANCHOxALTO",
+                        help="tamaño del dibujo, que puede ser mayor que la ventana "
+                             "(rueda: zoom; botón del medio o flechas: desplazar; Inicio: volver)")
+    parser.add_argument("--archivo", metavar="RUTA",
+                        help="archivo .svg (figuras), .png o .lienzo (imagen): se abre si existe y "
+                             "Ctrl+S guarda en él; un .lienzo además se autoguarda mientras se dibuja")
+    parser.add_argument("--suavizado", action="store_true",
+                        help="dibuja líneas, círculos y curvas con bordes suavizados (se alterna con la tecla A)")
+    parser.add_argument("--tiempos", action="store_true", help="muestra cuánto tarda cada etapa del arranque")
+    parser.add_argument("--perfil", metavar="RUTA",
+                        help="mide cada cuadro y cada primitiva y al salir guarda la línea de tiempo como "
+                             "traza de Chrome (JSON para chrome://tracing o Perfetto); F3 muestra los tiempos")
+    parser.add_argument("--registro", choices=("debug", "info", "warning", "error"), default="info",
+                        help="mensajes que se muestran; debug incluye cada clic y cada figura")
+    args = parser.parse_args(argv)
+    if args.archivo and not args.archivo.lower().endswith((".svg", ".png", ".lienzo")):
+        parser.error("--archivo debe ser un .svg, un .png o un .lienzo")
+    arranque = Cronometro()
+    registro = _configurar_registro(args.registro)
+    prim.usar_suavizado(args.suavizado)
+    if args.perfil:
+        activar_perfil(traza=True)
+
+    # Inicialización de Pygame y configuración inicial
+    pygame.init()
+    arranque.marcar("pygame.init")
+    screen = pygame.display.set_mode((1020, 650))  # Ventana de 1020x650 píxeles
+    arranque.marcar("ventana")
+    clock = pygame.time.Clock()  # Para controlar los FPS
+    app = Graficador(screen, iconos_diferidos=args.iconos_diferidos, tolerancia=args.tolerancia,
+                     documento=args.documento, archivo=args.archivo)
+    arranque.marcar("graficador")
+    if args.archivo and os.path.exists(args.archivo):
+        try:
+            app.abrir(args.archivo)
+        except (ValueError, pygame.error) as error:
+            parser.error(f"{args.archivo}: {error}")
+        arranque.marcar("abrir dibujo")
+    if args.archivo and args.archivo.lower().endswith(".lienzo"):
+        app.autoguardar(args.archivo)
+    grabador = None
+    if args.grabar:
+        grabador = Grabador(args.grabar, {nombre: getattr(args, nombre) for nombre in OPCIONES})
+
+    app.dibujar_paneles(screen)
+    pygame.display.flip()
+    arranque.marcar("primer cuadro")
+    if args.tiempos:
+        print(arranque.informe())
+
+    # Bucle principal del juego
+    # Sólo se envían a la pantalla las zonas que cambiaron (rectángulos sucios)
+    while app.running:
+        # Si no hay eventos pendientes se duerme hasta el próximo en vez de girar;
+        # con autoguardado se despierta igual de vez en cuando para revisarlo
+        eventos = pygame.event.get()
+        if not eventos:
+            evento = pygame.event.wait(1000 if app.autoguardado else 0)
+            eventos = [evento] if evento.type != pygame.NOEVENT else []
+
+        inicio = time.perf_counter()
+        with perfil.medir("cuadro"):
+            if grabador:
+                grabador.registrar(eventos)
+            with perfil.medir("procesar"):
+                sucios = app.procesar(eventos)
+
+            # Envía a la pantalla sólo las zonas modificadas
+            if sucios:
+                with perfil.medir("actualizar pantalla"):
+                    pygame.display.update(sucios)
+            registro.flush()
+        perfil.cuadro(time.perf_counter() - inicio)
+
+        clock.tick(60)  # limits FPS to 60
+
+    app.cerrar()
+    if grabador:
+        grabador.cerrar()
+    if args.perfil:
+        log.info("Traza guardada en %s (%d eventos)", args.perfil, perfil.guardar_traza(args.perfil))
+    logging.getLogger().removeHandler(registro)
+    registro.close()
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+# Historial de deshacer/rehacer del programa de dibujo
+# Cada acción guarda sólo el parche de píxeles que cambió, comprimido, y las
+# figuras de la escena que añadió o quitó; deshacer y rehacer cuestan lo que
+# mide el parche, no el lienzo.
+
+import zlib
+from collections import deque
+from contextlib import contextmanager
+
+import pygame
+
+LIMITE_BYTES = 32 * 1024 * 1024  # Memoria máxima por defecto para el historial
+NIVEL_COMPRESION = 1             # zlib rápido: los parches suelen ser casi planos
+
+
+class _Accion:
+    """Una acción del historial: un parche de píxeles y un cambio en la escena."""
+
+    __slots__ = ("rect", "pixeles", "conservar", "figuras_otro", "figuras_actual")
+
+    def __init__(self, rect, pixeles, conservar, figuras_otro, figuras_actual):
+        self.rect = rect                      # Zona del lienzo afectada
+        self.pixeles = pixeles                # Parche comprimido del estado contrario
+        self.conservar = conservar            # Figuras de la escena comunes a ambos estados
+        self.figuras_otro = figuras_otro      # Figuras tras 'conservar' en el estado contrario
+        self.figuras_actual = figuras_actual  # Figuras tras 'conservar' en el estado actual
+
+    def tamano(self):
+        return len(self.pixeles) + sum(
+            arreglo.nbytes for figuras in (self.figuras_otro, self.figuras_actual) for arreglo in figuras
+        )
+
+
+def _capturar(superficie, rect):
+    """Copia comprimida de los píxeles de la zona rect."""
+    if not rect:
+        return b""
+    datos = pygame.image.tobytes(superficie.subsurface(rect), "RGB")
+    return zlib.compress(datos, NIVEL_COMPRESION)
+
+
+def _restaurar(superficie, rect, pixeles):
+    """Escribe en la zona rect un parche obtenido con _capturar."""
+    if not rect:
+        return
+    parche = pygame.image.frombytes(zlib.decompress(pixeles), rect.size, "RGB")
+    superficie.blit(parche, rect)
+
+
+class Historial:
+    """
+    Pilas de deshacer y rehacer con memoria acotada.
+
+    Cuando los parches guardados superan el límite de memoria se descartan
+    las acciones más antiguas primero.
+    """
+
+    def __init__(self, limite_bytes=LIMITE_BYTES):
+        """
+        Constructor de la clase Historial
+        :param limite_bytes: memoria máxima que pueden ocupar las acciones guardadas
+        """
+        self.limite_bytes = limite_bytes
+        self.bytes_usados = 0
+        self._deshacer = deque()
+        self._rehacer = []
+
+    def puede_deshacer(self):
+        return bool(self._deshacer)
+
+    def puede_rehacer(self):
+        return bool(self._rehacer)
+
+    @contextmanager
+    def accion(self, superficie, rect, escena, conservar):
+        """
+        Registra como una sola acción lo que se dibuje dentro del bloque with.
+
+        Args:
+            superficie: Superficie del lienzo, o un Mosaico de teselas
+            rect: Zona que la acción puede modificar
+            escena: Escena con las figuras del lienzo
+            conservar: Cuántas figuras de la escena deja intactas la acción
+                (len(escena) al añadir una figura, 0 al vaciar)
+        """
+        rect = pygame.Rect(rect).clip(superficie.get_clip())  # Fuera del recorte no se dibuja
+        pixeles = _capturar(superficie, rect)
+        figuras_antes = escena.recortar(conservar)
+        escena.extender(figuras_antes)
+
+        yield
+
+        figuras_despues = escena.recortar(conservar)
+        escena.extender(figuras_despues)
+        self._apilar(self._deshacer, _Accion(rect, pixeles, conservar, figuras_antes, figuras_despues))
+        while self._rehacer:
+            self.bytes_usados -= self._rehacer.pop().tamano()
+        self._recortar_memoria()
+
+    def deshacer(self, superficie, escena):
+        """
+        Deshace la última acción.
+
+        Returns:
+            pygame.Rect con la zona restaurada, o None si no había nada que deshacer.
+        """
+        if not self._deshacer:
+            return None
+        return self._invertir(self._deshacer.pop(), self._rehacer, superficie, escena)
+
+    def rehacer(self, superficie, escena):
+        """
+        Rehace la última acción deshecha.
+
+        Returns:
+            pygame.Rect con la zona restaurada, o None si no había nada que rehacer.
+        """
+        if not self._rehacer:
+            return None
+        return self._invertir(self._rehacer.pop(), self._deshacer, superficie, escena)
+
+    def vaciar(self):
+        """Olvida todas las acciones guardadas."""
+        self._deshacer.clear()
+        self._rehacer.clear()
+        self.bytes_usados = 0
+
+    def _invertir(self, accion, destino, superficie, escena):
+        """Lleva el lienzo y la escena al estado contrario de la acción y la pasa a la otra pila."""
+        self.bytes_usados -= accion.tamano()
+
+        pixeles = _capturar(superficie, accion.rect)
+        _restaurar(superficie, accion.rect, accion.pixeles)
+        escena.recortar(accion.conservar)
+        escena.extender(accion.figuras_otro)
+
+        accion.pixeles = pixeles
+        accion.figuras_otro, accion.figuras_actual = accion.figuras_actual, accion.figuras_otro
+        self._apilar(destino, accion)
+        self._recortar_memoria()
+        return accion.rect
+
+    def _apilar(self, pila, accion):
+        pila.append(accion)
+        self.bytes_usados += accion.tamano()
+
+    def _recortar_memoria(self):
+        """Descarta las acciones más antiguas mientras se supere el límite de memoria."""
+        while self.bytes_usados > self.limite_bytes and self._deshacer:
+            self.bytes_usados -= self._deshacer.popleft().tamano()
@@ -0,0 +1,645 @@
+# Lienzo por teselas del programa de dibujo
+# Un documento grande (carteles de 10000x10000 y más) se guarda como teselas
+# cuadradas independientes; las que nunca se dibujaron no ocupan memoria. Las
+# figuras se reparten por su caja envolvente entre las teselas que tocan y
+# cada tesela se puede rasterizar en otro proceso sobre memoria compartida.
+# La ventana muestra sólo las teselas visibles, con desplazamiento y zoom.
+
+import math
+import os
+import struct
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pygame
+
+import primitivas as prim
+from escena import ARREGLOS, Escena, RELLENO, caja_figura, cajas_figuras, dibujar_figura, transformar_figura
+
+# Lado de las teselas en píxeles. Las figuras se rasterizan en coordenadas
+# del documento sobre cada tesela desplazada (prim.Desplazada), así que el
+# lado no cambia qué píxeles pintan
+LADO = 256
+
+# Zoom mínimo y máximo de la vista; cada paso de la rueda lo duplica o lo divide
+ZOOM_MIN = 1 / 16
+ZOOM_MAX = 16
+
+COLOR_FUERA = (160, 160, 160)  # Lo que se ve más allá de los bordes del documento
+
+# Con procesos=None se usa un proceso cada tantas teselas con figuras: en
+# documentos chicos arrancar el pool cuesta más de lo que ahorra
+TESELAS_POR_PROCESO = 16
+
+
+def _rasterizar_tesela(nombre, rect, fondo, figuras):
+    """
+    Dibuja un grupo de figuras en una tesela de memoria compartida.
+
+    Corre en los procesos del pool: sólo recibe el nombre del bloque de
+    memoria, la zona del documento que cubre la tesela y las figuras que la
+    tocan, en coordenadas del documento y con el antialiasing de cada una.
+    Con fondo None dibuja encima de lo que ya tiene el bloque.
+    """
+    memoria = shared_memory.SharedMemory(name=nombre)
+    try:
+        superficie = pygame.image.frombuffer(memoria.buf, rect.size, "RGBX")
+        escena = Escena(len(figuras[0]))
+        escena.extender(figuras)
+        escena.renderizar(prim.Desplazada(superficie, rect.x, rect.y), fondo)
+        del superficie  # Suelta el búfer antes de cerrar la memoria
+    finally:
+        memoria.close()
+
+
+def _bloque_png(archivo, tipo, datos):
+    archivo.write(struct.pack(">I", len(datos)) + tipo + datos)
+    archivo.write(struct.pack(">I", zlib.crc32(tipo + datos)))
+
+
+class Mosaico:
+    """
+    Documento dividido en teselas de LADO x LADO píxeles.
+
+    Se puede usar donde el historial espera una superficie: subsurface(),
+    blit() y get_clip() trabajan en coordenadas del documento y reparten la
+    operación entre las teselas que corresponda.
+    """
+
+    def __init__(self, ancho, alto, lado=LADO, fondo=(255, 255, 255)):
+        """
+        Constructor de la clase Mosaico
+        :param ancho: ancho del documento en píxeles
+        :param alto: alto del documento en píxeles
+        :param lado: lado de las teselas en píxeles
+        :param fondo: color de las zonas sin dibujar
+        """
+        self.ancho = ancho
+        self.alto = alto
+        self.lado = lado
+        self.fondo = tuple(fondo)
+        self.columnas = -(-ancho // lado)
+        self.filas = -(-alto // lado)
+        self.teselas = {}   # (ix, iy) -> Surface; las que faltan son del color de fondo
+        self.versiones = {}  # (ix, iy) -> contador que cambia con cada modificación
+        # (ix, iy) -> Surface de sólo lectura con la imagen que había bajo las
+        # figuras al abrir un PNG o un .lienzo; al volver a rasterizar se parte
+        # de ella en vez del fondo
+        self.base = {}
+
+    def get_size(self):
+        return self.ancho, self.alto
+
+    def get_rect(self):
+        return pygame.Rect(0, 0, self.ancho, self.alto)
+
+    def get_clip(self):
+        return self.get_rect()
+
+    def rect_tesela(self, ix, iy):
+        """Zona del documento que cubre la tesela (ix, iy); las del borde pueden ser menores."""
+        x, y = ix * self.lado, iy * self.lado
+        return pygame.Rect(x, y, min(self.lado, self.ancho - x), min(self.lado, self.alto - y))
+
+    def teselas_en(self, rect):
+        """Genera (ix, iy, rect_tesela) de las teselas que tocan la zona rect."""
+        rect = pygame.Rect(rect).clip(self.get_rect())
+        if not rect:
+            return
+        for iy in range(rect.top // self.lado, (rect.bottom - 1) // self.lado + 1):
+            for ix in range(rect.left // self.lado, (rect.right - 1) // self.lado + 1):
+                yield ix, iy, self.rect_tesela(ix, iy)
+
+    def _tesela_nueva(self, ix, iy):
+        superficie = pygame.Surface(self.rect_tesela(ix, iy).size, 0, 32)
+        superficie.fill(self.fondo)
+        return superficie
+
+    def _modificada(self, ix, iy):
+        self.versiones[ix, iy] = self.versiones.get((ix, iy), 0) + 1
+
+    def subsurface(self, rect):
+        """
+        Copia de la zona rect en una Surface nueva.
+
+        A diferencia de Surface.subsurface no comparte los píxeles: para
+        cambiar el documento hay que devolver la copia con blit().
+        """
+        rect = pygame.Rect(rect).clip(self.get_rect())
+        superficie = pygame.Surface(rect.size, 0, 32)
+        superficie.fill(self.fondo)
+        for ix, iy, zona in self.teselas_en(rect):
+            tesela = self.teselas.get((ix, iy))
+            if tesela is not None:
+                parte = zona.clip(rect)
+                superficie.blit(tesela, (parte.x - rect.x, parte.y - rect.y), parte.move(-zona.x, -zona.y))
+        return superficie
+
+    def blit(self, fuente, destino, area=None):
+        """
+        Copia una superficie al documento, como Surface.blit.
+
+        Returns:
+            pygame.Rect con la zona del documento que cambió.
+        """
+        area = pygame.Rect(area) if area is not None else fuente.get_rect()
+        x, y = destino[:2]
+        rect = pygame.Rect(x, y, area.width, area.height)
+        cambiada = rect.clip(self.get_rect())
+        for ix, iy, zona in self.teselas_en(cambiada):
+            tesela = self.teselas.get((ix, iy))
+            if tesela is None:
+                tesela = self.teselas[ix, iy] = self._tesela_nueva(ix, iy)
+            parte = zona.clip(cambiada)
+            tesela.blit(fuente, (parte.x - zona.x, parte.y - zona.y),
+                        pygame.Rect(area.x + parte.x - x, area.y + parte.y - y, parte.width, parte.height))
+            self._modificada(ix, iy)
+        return cambiada
+
+    def dibujar(self, tipo, p, color):
+        """
+        Dibuja una figura en las teselas que toca su caja envolvente.
+
+        Cada tesela se dibuja desplazada, con la figura en coordenadas del
+        documento, igual que en rasterizar(): el documento queda idéntico se
+        dibuje figura a figura, se reconstruya desde la escena o se dibuje en
+        una sola superficie. El balde se extiende de tesela en tesela con
+        region_relleno().
+
+        Returns:
+            pygame.Rect con la zona del documento que se modificó.
+        """
+        if tipo == RELLENO:
+            return self.rellenar(self.region_relleno(*p), color)
+
+        tocada = None
+        for ix, iy, zona in self.teselas_en(caja_figura(tipo, p)):
+            tesela = self.teselas.get((ix, iy)) or self._tesela_nueva(ix, iy)
+            rect = dibujar_figura(prim.Desplazada(tesela, zona.x, zona.y), tipo, p, color).clip(zona)
+            if rect:
+                self.teselas[ix, iy] = tesela
+                self._modificada(ix, iy)
+                tocada = tocada.union(rect) if tocada else rect
+        return tocada or pygame.Rect(0, 0, 0, 0)
+
+    def region_relleno(self, x, y, tolerancia=0):
+        """
+        Tramos que pintaría el balde desde el punto (x, y), sin pintarlos.
+
+        Es el relleno por tramos de prim.flood_fill corrido tesela a tesela:
+        en cada tesela que alcanza se buscan las corridas de píxeles parecidos
+        al del punto de partida, y las corridas alcanzadas que tocan un borde
+        siguen en la tesela vecina. Sólo se leen las teselas a las que llega
+        el relleno (las que faltan se leen como el fondo), así que rellenar
+        una figura chica no depende del tamaño del documento.
+
+        Returns:
+            Tupla (rect, tramos): la zona del documento que cambiaría y, por
+            tesela (ix, iy), los tramos (y, x_inicio, x_fin) en coordenadas
+            de la tesela. Sirve hasta el próximo cambio del documento.
+        """
+        if not self.get_rect().collidepoint(x, y):
+            return pygame.Rect(0, 0, 0, 0), {}
+
+        def leer(ix, iy):
+            return self.teselas.get((ix, iy)) or self._tesela_nueva(ix, iy)
+
+        lado = self.lado
+        ix, iy = x // lado, y // lado
+        tesela = leer(ix, iy)
+        # Las teselas abiertas de un .lienzo tienen otro orden de canales: se compara por color
+        semilla = tesela.unmap_rgb(tesela.get_at_mapped((x - ix * lado, y - iy * lado)))
+
+        corridas = {}  # (ix, iy) -> prim._Corridas de las teselas alcanzadas
+        pendientes = [((ix, iy), [(y - iy * lado, x - ix * lado, x - ix * lado + 1)])]
+        while pendientes:
+            (ix, iy), semillas = pendientes.pop()
+            c = corridas.get((ix, iy))
+            if c is None:
+                tesela = leer(ix, iy)
+                parecidos = prim._parecidos(tesela, tesela.get_rect(), tesela.map_rgb(semilla), tolerancia)
+                c = corridas[ix, iy] = prim._Corridas(parecidos)
+
+            # Corridas nuevas en los bordes: semillas de las teselas vecinas
+            vecinas = {}
+            for k in c.alcanzar(semillas):
+                fila, x0, x1 = c.filas[k], c.x_inicio[k], c.x_fin[k]
+                if x0 == 0 and ix > 0:
+                    vecinas.setdefault((ix - 1, iy), []).append((fila, lado - 1, lado))
+                if x1 == c.ancho and ix < self.columnas - 1:
+                    vecinas.setdefault((ix + 1, iy), []).append((fila, 0, 1))
+                if fila == 0 and iy > 0:
+                    vecinas.setdefault((ix, iy - 1), []).append((lado - 1, x0, x1))
+                if fila == c.alto - 1 and iy < self.filas - 1:
+                    vecinas.setdefault((ix, iy + 1), []).append((0, x0, x1))
+            pendientes.extend(vecinas.items())
+
+        rect, tramos = None, {}
+        for (ix, iy), c in corridas.items():
+            spans = c.tramos()
+            if len(spans):
+                tramos[ix, iy] = spans
+                caja = prim._caja_tramos(spans).move(ix * lado, iy * lado)
+                rect = rect.union(caja) if rect else caja
+        return rect, tramos
+
+    def rellenar(self, region, color):
+        """
+        Pinta los tramos de una región calculada con region_relleno().
+
+        Returns:
+            pygame.Rect con la zona del documento que se modificó.
+        """
+        rect, tramos = region
+        for (ix, iy), spans in tramos.items():
+            tesela = self.teselas.get((ix, iy)) or self._tesela_nueva(ix, iy)
+            prim.fill_spans(tesela, spans, color)
+            self.teselas[ix, iy] = tesela
+            self._modificada(ix, iy)
+        return rect
+
+    def dibujar_figuras(self, tipos, parametros, colores, suavizados=None):
+        """
+        Dibuja varias figuras que no son rellenos, de una vez por tesela.
+
+        Cada tesela recibe sólo las figuras que la tocan y las rasteriza en
+        lotes con Escena.renderizar, desplazada como en dibujar(); el
+        resultado es el mismo que dibujarlas una por una con dibujar().
+
+        Args:
+            tipos: Arreglo con el tipo de cada figura
+            parametros: Matriz (n, MAX_PARAMETROS) en coordenadas del documento
+            colores: Matriz (n, 3) con el color de cada figura
+            suavizados: Si cada figura lleva antialiasing; por defecto, prim.SUAVIZADO
+
+        Returns:
+            pygame.Rect con la zona del documento que cubren las figuras.
+        """
+        tipos, parametros, colores = np.asarray(tipos), np.asarray(parametros), np.asarray(colores)
+        if suavizados is None:
+            suavizados = np.full(len(tipos), prim.SUAVIZADO)
+        figuras = (tipos, parametros, colores, np.asarray(suavizados, dtype=bool))
+        self._dibujar_reparto(self.repartir(tipos, parametros), figuras)
+        if len(tipos) == 0:
+            return pygame.Rect(0, 0, 0, 0)
+        cajas = cajas_figuras(tipos, parametros)
+        x0, y0 = cajas[:, :2].min(axis=0).tolist()
+        x1, y1 = cajas[:, 2:].max(axis=0).tolist()
+        return pygame.Rect(x0, y0, x1 - x0, y1 - y0).clip(self.get_rect())
+
+    def _dibujar_reparto(self, reparto, figuras):
+        """Dibuja en este proceso las figuras (arreglos como en Escena.recortar) de cada tesela según repartir()."""
+        for (ix, iy), indices in reparto.items():
+            rect = self.rect_tesela(ix, iy)
+            tesela = self.teselas.get((ix, iy)) or self._tesela_nueva(ix, iy)
+            sub = Escena(len(indices))
+            sub.extender(tuple(arreglo[indices] for arreglo in figuras))
+            sub.renderizar(prim.Desplazada(tesela, rect.x, rect.y), None)
+            self.teselas[ix, iy] = tesela
+            self._modificada(ix, iy)
+
+    def vaciar(self):
+        """Deja todo el documento del color de fondo, sin la imagen de base."""
+        for clave in self.teselas:
+            self._modificada(*clave)
+        self.teselas.clear()
+        self.base.clear()
+
+    def _restablecer(self):
+        """Deja el documento como si no tuviera figuras: la imagen de base o el fondo."""
+        for clave in self.teselas.keys() | self.base.keys():
+            self._modificada(*clave)
+        self.teselas = {}
+        for (ix, iy), base in self.base.items():
+            tesela = self.teselas[ix, iy] = self._tesela_nueva(ix, iy)
+            tesela.blit(base, (0, 0))
+
+    def reconstruir(self, escena, rect, indices=None):
+        """
+        Vuelve a rasterizar desde la escena sólo la zona rect del documento.
+
+        En cada tesela que toca la zona se repone la base (o el fondo) en su
+        parte de la zona y se dibujan con ese recorte las figuras que la
+        tocan, desplazada como en rasterizar(): los píxeles no
+        dependen del recorte, así que el resultado es el mismo que rasterizar
+        todo. Si la escena tiene rellenos con balde, que dependen de todo el
+        documento, se rasteriza todo.
+
+        Args:
+            escena: Escena con las figuras, en coordenadas del documento
+            rect: Zona del documento a reconstruir
+            indices: Figuras de la escena que pueden tocar la zona, en orden
+                (por ejemplo, las que da un índice espacial); por defecto se
+                buscan por su caja envolvente
+
+        Returns:
+            pygame.Rect con la zona del documento que cambió.
+        """
+        n = len(escena)
+        figuras = tuple(getattr(escena, nombre)[:n] for nombre in ARREGLOS)
+        tipos, parametros = figuras[:2]
+        if (tipos == RELLENO).any():
+            self.rasterizar(escena)
+            return self.get_rect()
+
+        rect = pygame.Rect(rect).clip(self.get_rect())
+        if indices is None:
+            indices = np.arange(n)
+        indices = np.asarray(indices, dtype=np.intp)
+        cajas = cajas_figuras(tipos[indices], parametros[indices])
+        for ix, iy, zona in self.teselas_en(rect):
+            parte = zona.clip(rect)
+            local = parte.move(-zona.x, -zona.y)
+            tesela = self.teselas.get((ix, iy)) or self._tesela_nueva(ix, iy)
+            base = self.base.get((ix, iy))
+            if base is None:
+                tesela.fill(self.fondo, local)
+            else:
+                tesela.blit(base, local, local)
+
+            tocan = indices[(cajas[:, 0] < parte.right) & (cajas[:, 2] > parte.left)
+                            & (cajas[:, 1] < parte.bottom) & (cajas[:, 3] > parte.top)]
+            if len(tocan):
+                sub = Escena(len(tocan))
+                sub.extender(tuple(arreglo[tocan] for arreglo in figuras))
+                tesela.set_clip(local)
+                sub.renderizar(prim.Desplazada(tesela, zona.x, zona.y), None)
+                tesela.set_clip(None)
+            self.teselas[ix, iy] = tesela
+            self._modificada(ix, iy)
+        return rect
+
+    def repartir(self, tipos, parametros):
+        """
+        Agrupa figuras por las teselas que tocan sus cajas envolventes.
+
+        Returns:
+            Diccionario (ix, iy) -> índices de las figuras de esa tesela, en
+            el orden en que se dibujaron.
+        """
+        cajas = cajas_figuras(tipos, parametros)
+        ix0 = np.clip(cajas[:, 0] // self.lado, 0, self.columnas)
+        iy0 = np.clip(cajas[:, 1] // self.lado, 0, self.filas)
+        ix1 = np.clip((cajas[:, 2] - 1) // self.lado, -1, self.columnas - 1)
+        iy1 = np.clip((cajas[:, 3] - 1) // self.lado, -1, self.filas - 1)
+        ancho = np.maximum(ix1 - ix0 + 1, 0)
+        cuantas = ancho * np.maximum(iy1 - iy0 + 1, 0)
+
+        # Un par (figura, tesela) por cada tesela que toca cada figura
+        figura = np.repeat(np.arange(len(cajas)), cuantas)
+        k = np.arange(cuantas.sum()) - np.repeat(np.cumsum(cuantas) - cuantas, cuantas)
+        tesela = (iy0[figura] + k // ancho[figura]) * self.columnas + ix0[figura] + k % ancho[figura]
+
+        orden = np.argsort(tesela, kind="stable")  # Estable: conserva el orden de las figuras
+        tesela, figura = tesela[orden], figura[orden]
+        cortes = np.flatnonzero(np.diff(tesela)) + 1
+        return {
+            (int(t % self.columnas), int(t // self.columnas)): indices
+            for t, indices in zip(tesela[np.r_[0, cortes]].tolist(), np.split(figura, cortes))
+        } if len(tesela) else {}
+
+    def rasterizar(self, escena, procesos=None):
+        """
+        Reconstruye todo el documento a partir de una escena, sobre la
+        imagen de base si la hay.
+
+        Cada tesela recibe sólo las figuras que la tocan y se dibuja con
+        Escena.renderizar, desplazada como en dibujar(). Con más de un proceso
+        las teselas se reparten en un pool y cada una se dibuja sobre un bloque
+        de memoria compartida, sin copiar píxeles entre procesos.
+
+        Los rellenos con balde dependen de lo dibujado en todo el documento:
+        las figuras entre dos rellenos se rasterizan por teselas y cada relleno
+        se aplica después, en orden.
+
+        Args:
+            escena: Escena con las figuras, en coordenadas del documento
+            procesos: Procesos del pool; None elige según los núcleos y las
+                teselas a dibujar, y 1 no usa pool
+        """
+        self._restablecer()
+        n = len(escena)
+        figuras = tuple(getattr(escena, nombre)[:n] for nombre in ARREGLOS)
+        tipos, parametros, colores = figuras[:3]
+        inicio = 0
+        for fin in np.flatnonzero(tipos == RELLENO).tolist() + [n]:
+            if fin > inicio:
+                self._rasterizar_tramo(tuple(arreglo[inicio:fin] for arreglo in figuras), procesos)
+            if fin < n:
+                self.dibujar(RELLENO, tuple(parametros[fin, :3].tolist()), tuple(colores[fin].tolist()))
+            inicio = fin + 1
+
+    def _rasterizar_tramo(self, figuras, procesos):
+        """Dibuja por teselas, encima de lo que ya hay, figuras (como Escena.recortar) que no son rellenos."""
+        reparto = self.repartir(*figuras[:2])
+        if procesos is None:
+            procesos = min(os.cpu_count() or 1, len(reparto) // TESELAS_POR_PROCESO)
+        if procesos <= 1 or len(reparto) < 2:
+            self._dibujar_reparto(reparto, figuras)
+            return
+
+        trabajos = []
+        for (ix, iy), indices in reparto.items():
+            rect = self.rect_tesela(ix, iy)
+            trabajos.append((ix, iy, rect, tuple(arreglo[indices] for arreglo in figuras)))
+
+        memorias = {}
+        try:
+            with ProcessPoolExecutor(max_workers=procesos) as pool:
+                pendientes = []
+                for ix, iy, rect, figuras in trabajos:
+                    memoria = memorias[ix, iy] = shared_memory.SharedMemory(create=True, size=rect.w * rect.h * 4)
+                    fondo = self.fondo
+                    if (ix, iy) in self.teselas:
+                        # La tesela ya tiene dibujo de un tramo anterior: se copia al bloque
+                        compartida = pygame.image.frombuffer(memoria.buf, rect.size, "RGBX")
+                        compartida.blit(self.teselas[ix, iy], (0, 0))
+                        del compartida
+                        fondo = None
+                    pendientes.append(pool.submit(_rasterizar_tesela, memoria.name, rect, fondo, figuras))
+                for pendiente in pendientes:
+                    pendiente.result()  # Propaga aquí los errores de los procesos
+
+            for ix, iy, rect, _ in trabajos:
+                compartida = pygame.image.frombuffer(memorias[ix, iy].buf, rect.size, "RGBX")
+                tesela = self.teselas.get((ix, iy)) or pygame.Surface(rect.size, 0, 32)
+                tesela.blit(compartida, (0, 0))
+                del compartida
+                self.teselas[ix, iy] = tesela
+                self._modificada(ix, iy)
+        finally:
+            for memoria in memorias.values():
+                memoria.close()
+                memoria.unlink()
+
+    def guardar_png(self, ruta, nivel=6):
+        """
+        Escribe el documento como PNG de 24 bits, una fila de teselas por vez.
+
+        Nunca arma la imagen completa, así que la memoria que usa depende del
+        ancho del documento y no de su alto.
+        """
+        compresor = zlib.compressobj(nivel)
+        with open(ruta, "wb") as archivo:
+            archivo.write(b"\x89PNG\r\n\x1a\n")
+            _bloque_png(archivo, b"IHDR", struct.pack(">IIBBBBB", self.ancho, self.alto, 8, 2, 0, 0, 0))
+            for iy in range(self.filas):
+                franja = self.subsurface((0, iy * self.lado, self.ancho, self.lado))
+                filas = np.frombuffer(pygame.image.tobytes(franja, "RGB"), dtype=np.uint8)
+                filas = filas.reshape(franja.get_height(), 3 * self.ancho)
+                # Cada fila de un PNG empieza con su tipo de filtro; 0 es sin filtro
+                datos = compresor.compress(np.hstack([np.zeros((len(filas), 1), np.uint8), filas]).tobytes())
+                if datos:
+                    _bloque_png(archivo, b"IDAT", datos)
+            _bloque_png(archivo, b"IDAT", compresor.flush())
+            _bloque_png(archivo, b"IEND", b"")
+
+
+class Vista:
+    """
+    Parte del documento que se ve en una zona de la ventana.
+
+    origen es el punto del documento que queda en la esquina superior
+    izquierda de la zona y zoom cuántos píxeles de pantalla ocupa cada píxel
+    del documento. Las teselas escaladas se guardan hasta que cambian.
+    """
+
+    def __init__(self, documento, area):
+        """
+        Constructor de la clase Vista
+        :param documento: Mosaico que se muestra
+        :param area: zona de la ventana donde se muestra
+        """
+        self.documento = documento
+        self.area = pygame.Rect(area)
+        self.origen = (0.0, 0.0)
+        self.zoom = 1.0
+        self._escaladas = {}  # (ix, iy) -> (versión, tamaño, Surface)
+
+    def a_documento(self, pos):
+        """Punto del documento bajo el punto pos de la ventana."""
+        return (self.origen[0] + (pos[0] - self.area.x) / self.zoom,
+                self.origen[1] + (pos[1] - self.area.y) / self.zoom)
+
+    def figura_a_documento(self, tipo, p):
+        """Pasa los parámetros de una figura de coordenadas de la ventana a las del documento."""
+        escala = 1 / self.zoom
+        return transformar_figura(tipo, p, escala,
+                                  self.origen[0] - self.area.x * escala, self.origen[1] - self.area.y * escala)
+
+    def dibujar_figura(self, destino, tipo, p, color):
+        """
+        Dibuja en destino (la ventana) una figura en coordenadas de la ventana.
+
+        A zoom 1 la figura pasa al documento y se rasteriza sobre la ventana
+        desplazada, como Mosaico.dibujar la rasteriza en cada tesela: la
+        vista previa pinta los mismos píxeles que la figura confirmada. Con
+        otro zoom se dibuja tal cual en la ventana.
+
+        Returns:
+            pygame.Rect con la zona de la ventana que se modificó.
+        """
+        if self.zoom != 1:
+            return dibujar_figura(destino, tipo, p, color)
+        dx, dy = round(self.origen[0]) - self.area.x, round(self.origen[1]) - self.area.y
+        rect = dibujar_figura(prim.Desplazada(destino, dx, dy), tipo, self.figura_a_documento(tipo, p), color)
+        return rect.move(-dx, -dy)
+
+    def _en_pantalla(self, x, y):
+        return (self.area.x + math.floor((x - self.origen[0]) * self.zoom + 0.5),
+                self.area.y + math.floor((y - self.origen[1]) * self.zoom + 0.5))
+
+    def punto_a_pantalla(self, pos):
+        """Punto de la ventana donde se ve el punto pos del documento."""
+        return self._en_pantalla(*pos)
+
+    def a_pantalla(self, rect):
+        """Zona de la ventana que ocupa la zona rect del documento, recortada a la vista."""
+        rect = pygame.Rect(rect)
+        x0, y0 = self._en_pantalla(rect.left, rect.top)
+        x1, y1 = self._en_pantalla(rect.right, rect.bottom)
+        return pygame.Rect(x0, y0, x1 - x0, y1 - y0).clip(self.area)
+
+    def desplazar(self, dx, dy):
+        """Mueve el documento dx, dy píxeles de la ventana."""
+        self.origen = (self.origen[0] - dx / self.zoom, self.origen[1] - dy / self.zoom)
+
+    def acercar(self, pasos, centro=None):
+        """
+        Duplica el zoom pasos veces (o lo divide, si pasos es negativo)
+        dejando fijo el punto del documento que está bajo centro.
+
+        Returns:
+            True si el zoom cambió.
+        """
+        zoom = min(max(self.zoom * 2.0 ** pasos, ZOOM_MIN), ZOOM_MAX)
+        if zoom == self.zoom:
+            return False
+        centro = centro or self.area.center
+        fijo = self.a_documento(centro)
+        self.zoom = zoom
+        self.origen = (fijo[0] - (centro[0] - self.area.x) / zoom, fijo[1] - (centro[1] - self.area.y) / zoom)
+        if zoom == 1:
+            self.origen = (round(self.origen[0]), round(self.origen[1]))  # Sin medios píxeles a escala 1
+        self._escaladas.clear()
+        return True
+
+    def restablecer(self):
+        """Vuelve al zoom 1 con la esquina del documento en la esquina de la vista."""
+        self.origen = (0.0, 0.0)
+        self.zoom = 1.0
+        self._escaladas.clear()
+
+    def _escalada(self, ix, iy, tamano):
+        """La tesela al tamaño que ocupa en pantalla, o None si es sólo fondo."""
+        tesela = self.documento.teselas.get((ix, iy))
+        if tesela is None or tesela.get_size() == tamano:
+            return tesela
+        version = self.documento.versiones.get((ix, iy))
+        guardada = self._escaladas.get((ix, iy))
+        if guardada and guardada[0] == version and guardada[1] == tamano:
+            return guardada[2]
+        escalar = pygame.transform.smoothscale if self.zoom < 1 else pygame.transform.scale
+        superficie = escalar(tesela, tamano)
+        self._escaladas[ix, iy] = (version, tamano, superficie)
+        return superficie
+
+    def componer(self, destino, zona=None):
+        """
+        Dibuja en destino las teselas visibles en la zona dada de la ventana.
+
+        Args:
+            destino: Superficie del tamaño de la ventana
+            zona: Zona de la ventana a recomponer; por defecto toda la vista
+
+        Returns:
+            pygame.Rect con la zona recompuesta.
+        """
+        zona = self.area if zona is None else pygame.Rect(zona).clip(self.area)
+        if not zona:
+            return zona
+        anterior = destino.get_clip()
+        destino.set_clip(zona)
+
+        documento = self.documento
+        x0, y0 = self.a_documento(zona.topleft)
+        x1, y1 = self.a_documento(zona.bottomright)
+        visible = pygame.Rect(math.floor(x0), math.floor(y0), 0, 0)
+        visible.size = (math.ceil(x1) - visible.x + 1, math.ceil(y1) - visible.y + 1)
+
+        ocupada = self.a_pantalla(documento.get_rect())
+        if not ocupada.contains(zona):
+            destino.fill(COLOR_FUERA, zona)
+        for ix, iy, rect in documento.teselas_en(visible):
+            x, y = self._en_pantalla(rect.left, rect.top)
+            x2, y2 = self._en_pantalla(rect.right, rect.bottom)
+            tesela = self._escalada(ix, iy, (x2 - x, y2 - y))
+            if tesela is None:
+                destino.fill(documento.fondo, (x, y, x2 - x, y2 - y))
+            else:
+                destino.blit(tesela, (x, y))
+
+        destino.set_clip(anterior)
+        return zona
@@ -0,0 +1,229 @@
+# Instrumentación del programa de dibujo
+# Cronómetros y contadores de píxeles para las etapas del bucle principal y
+# las primitivas de rasterizado. Es opcional: hasta que se llama a activar()
+# las funciones no están envueltas y medir() no hace nada, así que apagada
+# no cuesta nada.
+#
+# Los tiempos se acumulan por nombre para la superposición de la ventana y,
+# si se pide, cada medición se guarda como evento de una traza de Chrome
+# (JSON que abren chrome://tracing y Perfetto).
+
+import contextlib
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+import pygame
+
+import escena
+import primitivas as prim
+import recursos
+from mosaico import Mosaico, Vista
+
+log = logging.getLogger(__name__)
+
+CUADROS = 120          # Cuadros que guarda el histograma
+MAX_EVENTOS = 1 << 20  # Eventos de la traza; después se dejan de grabar
+OBJETIVO_MS = 1000 / 60  # Duración de un cuadro a 60 FPS
+
+# Funciones de rasterizado que se envuelven al activar
+PRIMITIVAS = (
+    "lineaDDA", "rectangle", "circleBresenham", "drawTriangulo", "drawElipse", "drawCurvaBezier", "trazo",
+    "filled_rectangle", "filled_circle_bresenham", "filled_triangle", "filled_polygon", "flood_fill",
+    "fill_spans", "_estampar", "_estampar_disco", "_mezclar", "_puntos_dda",
+)
+
+ACTIVO = False
+contadores = {}  # nombre -> [llamadas, nanosegundos, píxeles, nanosegundos de la última]
+cuadros = deque(maxlen=CUADROS)  # Milisegundos de trabajo de los últimos cuadros
+_finales = deque(maxlen=CUADROS)  # Instante en que terminó cada cuadro, para los FPS
+_eventos = None  # (nombre, inicio, duración, hilo, píxeles) de la traza, o None si no se graba
+_origen = time.perf_counter_ns()
+
+
+def _registrar(nombre, inicio, fin, pixeles=None):
+    contador = contadores.get(nombre)
+    if contador is None:
+        contador = contadores[nombre] = [0, 0, 0, 0]
+    duracion = fin - inicio
+    contador[0] += 1
+    contador[1] += duracion
+    contador[3] = duracion
+    if pixeles:
+        contador[2] += pixeles
+    if _eventos is not None:
+        if len(_eventos) < MAX_EVENTOS:
+            _eventos.append((nombre, inicio, duracion, threading.get_ident(), pixeles))
+        elif len(_eventos) == MAX_EVENTOS:
+            _eventos.append(None)  # Marca que la traza se cortó
+            log.warning("La traza llegó a %d eventos; no se graban más", MAX_EVENTOS)
+
+
+class _Medicion:
+    __slots__ = ("nombre", "inicio")
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+
+    def __enter__(self):
+        self.inicio = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *excepcion):
+        _registrar(self.nombre, self.inicio, time.perf_counter_ns())
+
+
+_NULA = contextlib.nullcontext()
+
+
+def medir(nombre):
+    """Contexto que mide con el nombre dado lo que encierra; sin activar() no hace nada."""
+    return _Medicion(nombre) if ACTIVO else _NULA
+
+
+def _envolver(original, nombre):
+    @functools.wraps(original)
+    def envoltorio(*args, **kwargs):
+        if not ACTIVO:
+            return original(*args, **kwargs)
+        inicio = time.perf_counter_ns()
+        resultado = original(*args, **kwargs)
+        pixeles = resultado.w * resultado.h if isinstance(resultado, pygame.Rect) else None
+        _registrar(nombre, inicio, time.perf_counter_ns(), pixeles)
+        return resultado
+    envoltorio.instrumentada = True
+    return envoltorio
+
+
+def instrumentar(objeto, nombres, prefijo=None):
+    """
+    Envuelve funciones de un módulo o métodos de una clase con un cronómetro.
+
+    Las que retornan un pygame.Rect suman el área de la zona tocada al
+    contador de píxeles. Cada función se envuelve una sola vez aunque se
+    llame de nuevo, y sólo afecta a quien la busca en el módulo o la clase
+    al llamarla (prim.lineaDDA), no a quien la importó por nombre.
+
+    Args:
+        objeto: Módulo o clase que tiene las funciones
+        nombres: Nombres de las funciones o métodos
+        prefijo: Prefijo de los nombres en los contadores; por defecto el
+            nombre del módulo o de la clase
+    """
+    prefijo = prefijo or getattr(objeto, "__name__", type(objeto).__name__)
+    for nombre in nombres:
+        original = getattr(objeto, nombre)
+        if not getattr(original, "instrumentada", False):
+            setattr(objeto, nombre, _envolver(original, f"{prefijo}.{nombre}"))
+
+
+def activar(traza=False):
+    """
+    Envuelve las primitivas y el rasterizado por teselas y empieza a medir.
+
+    Args:
+        traza: además de acumular los tiempos, guarda cada medición para guardar_traza()
+    """
+    global ACTIVO, _eventos
+    instrumentar(prim, PRIMITIVAS)
+    instrumentar(escena, ("_rasterizar_lote", "_rasterizar_mezcladas"))
+    instrumentar(Mosaico, ("dibujar", "dibujar_figuras", "rasterizar", "reconstruir", "region_relleno", "guardar_png"))
+    instrumentar(Vista, ("componer",))
+    ACTIVO = True
+    if traza and _eventos is None:
+        _eventos = []
+
+
+def cuadro(segundos):
+    """Registra cuánto trabajó un cuadro del bucle principal (sin contar la espera de eventos)."""
+    cuadros.append(segundos * 1000)
+    _finales.append(time.perf_counter())
+
+
+def fps():
+    """Cuadros terminados en el último segundo."""
+    limite = time.perf_counter() - 1
+    return sum(1 for final in _finales if final > limite)
+
+
+def guardar_traza(ruta):
+    """Escribe las mediciones grabadas como traza de Chrome; retorna cuántos eventos escribió."""
+    pid = os.getpid()
+    eventos = [evento for evento in (_eventos or ()) if evento is not None]
+    with open(ruta, "w", encoding="utf-8") as archivo:
+        archivo.write('{"displayTimeUnit": "ms", "traceEvents": [\n')
+        for i, (nombre, inicio, duracion, hilo, pixeles) in enumerate(eventos):
+            evento = {"name": nombre, "ph": "X", "ts": (inicio - _origen) / 1000, "dur": duracion / 1000,
+                      "pid": pid, "tid": hilo}
+            if pixeles is not None:
+                evento["args"] = {"pixeles": pixeles}
+            archivo.write(("," if i else "") + json.dumps(evento, ensure_ascii=False) + "\n")
+        archivo.write("]}\n")
+    return len(eventos)
+
+
+class Superposicion:
+    """
+    Recuadro semitransparente con los FPS, un histograma de la duración de
+    los últimos cuadros, el tiempo de cada herramienta y las funciones que
+    más tiempo llevan.
+    """
+
+    ANCHO = 250
+    ALTO = 185
+    ALTO_HISTOGRAMA = 50
+    ESCALA_MS = 2 * OBJETIVO_MS  # Milisegundos que llenan la altura del histograma
+
+    def __init__(self, esquina):
+        """
+        Constructor de la clase Superposicion
+        :param esquina: esquina superior izquierda en la ventana
+        """
+        self.rect = pygame.Rect(esquina, (self.ANCHO, self.ALTO))
+
+    def _lineas(self, cuantas=6):
+        """Hasta 3 herramientas (la última vez que se usaron) y las funciones con más tiempo acumulado."""
+        herramientas, otras = [], []
+        for nombre, contador in contadores.items():
+            (herramientas if nombre.startswith("herramienta ") else otras).append((contador[1], nombre))
+        herramientas = sorted(herramientas, reverse=True)[:3]
+        lineas = []
+        for _, nombre in herramientas:
+            llamadas, _, _, ultima = contadores[nombre]
+            lineas.append(f"{nombre[12:]:<14}{ultima / 1e6:7.1f} ms  x{llamadas}")
+        for total, nombre in sorted(otras, reverse=True)[:cuantas - len(lineas)]:
+            pixeles = contadores[nombre][2]
+            lineas.append(f"{nombre.rpartition('.')[2][:14]:<14}{total / 1e6:7.0f} ms  {pixeles / 1e6:.1f} Mpx")
+        return lineas
+
+    def dibujar(self, pantalla):
+        """Dibuja el recuadro sobre la pantalla; retorna la zona tocada."""
+        panel = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 180))
+        fuente = recursos.fuente(None, 18)
+        blanco = (255, 255, 255)
+
+        recientes = list(cuadros)
+        ultimo = recientes[-1] if recientes else 0.0
+        maximo = max(recientes, default=0.0)
+        panel.blit(fuente.render(f"{fps()} FPS   cuadro {ultimo:.1f} ms   max {maximo:.1f} ms", True, blanco), (6, 6))
+
+        # Histograma: una barra de 2 píxeles por cuadro, roja si pasó de OBJETIVO_MS
+        base = 24 + self.ALTO_HISTOGRAMA
+        for i, ms in enumerate(recientes[-(self.ANCHO - 12) // 2:]):
+            alto = min(int(ms / self.ESCALA_MS * self.ALTO_HISTOGRAMA), self.ALTO_HISTOGRAMA)
+            color = (90, 200, 90) if ms <= OBJETIVO_MS else (230, 80, 60)
+            pygame.draw.rect(panel, color, (6 + 2 * i, base - alto, 2, max(alto, 1)))
+        objetivo = base - int(OBJETIVO_MS / self.ESCALA_MS * self.ALTO_HISTOGRAMA)
+        pygame.draw.line(panel, (200, 200, 200), (6, objetivo), (self.ANCHO - 6, objetivo))
+
+        y = base + 8
+        for linea in self._lineas():
+            panel.blit(fuente.render(linea, True, blanco), (6, y))
+            y += 16
+        pantalla.blit(panel, self.rect)
+        return self.rect
@@ -0,0 +1,1398 @@
+# Primitivas de rasterizado del programa de dibujo
+# Todas dibujan directamente sobre una superficie de pygame y retornan la zona tocada.
+
+import pygame
+import math
+import sys
+import numpy as np
+from bisect import bisect_right
+from functools import lru_cache
+
+# Motor de rasterizado ---------------
+# pygame.draw.circle con radio 1 pinta un bloque de 2x2 píxeles cuya esquina
+# inferior derecha es el centro; ésta es la huella del pincel.
+_PINCEL_DX = np.array([-1, 0, -1, 0], dtype=np.intp)
+_PINCEL_DY = np.array([-1, -1, 0, 0], dtype=np.intp)
+
+# Superficies desplazadas ---------------
+# El DDA, las curvas y las elipses redondean según dónde caen los puntos, así
+# que una figura movida unos píxeles no siempre pinta los mismos píxeles
+# movidos. Para que el Mosaico y la vista previa pinten lo mismo que una
+# superficie del documento entero, las figuras se calculan siempre en
+# coordenadas del documento y sólo los puntos enteros finales se corren a la
+# superficie donde se escriben.
+class Desplazada:
+    """
+    Superficie de pygame vista con otro origen: el punto (x, y) de las
+    figuras es su píxel (x - dx, y - dy).
+
+    Las primitivas la aceptan donde esperan una superficie; get_clip() y
+    get_rect() dan zonas en las coordenadas de las figuras.
+    """
+
+    def __init__(self, superficie, dx, dy):
+        """
+        Constructor de la clase Desplazada
+        :param superficie: superficie de pygame donde se escribe
+        :param dx, dy: punto de las figuras que cae en el píxel (0, 0)
+        """
+        self.superficie = superficie
+        self.dx = dx
+        self.dy = dy
+
+    def __getattr__(self, nombre):
+        # map_rgb, get_masks y demás no dependen de las coordenadas
+        return getattr(self.superficie, nombre)
+
+    def get_clip(self):
+        return self.superficie.get_clip().move(self.dx, self.dy)
+
+    def get_rect(self):
+        return self.superficie.get_rect().move(self.dx, self.dy)
+
+    def fill(self, color, rect=None):
+        zona = self.get_rect() if rect is None else pygame.Rect(rect)
+        return self.superficie.fill(color, zona.move(-self.dx, -self.dy)).move(self.dx, self.dy)
+
+    def get_at_mapped(self, pos):
+        return self.superficie.get_at_mapped((pos[0] - self.dx, pos[1] - self.dy))
+
+def _pixeles(screen, canales=False):
+    """
+    Arreglo de píxeles de la superficie (pixels2d, o pixels3d con canales) y
+    el punto (x0, y0) que corresponde a su elemento [0, 0].
+    """
+    x0, y0 = (screen.dx, screen.dy) if isinstance(screen, Desplazada) else (0, 0)
+    superficie = getattr(screen, "superficie", screen)
+    pixeles = pygame.surfarray.pixels3d(superficie) if canales else pygame.surfarray.pixels2d(superficie)
+    return pixeles, x0, y0
+
+def _estampar(screen, xs, ys, color):
+    """
+    Estampa el pincel en todos los puntos dados con una sola escritura
+    sobre el arreglo de píxeles de la superficie.
+    
+    Los centros se marcan en una máscara booleana que luego se dilata con la
+    huella del pincel, así cada píxel se escribe una sola vez aunque varios
+    puntos lo cubran.
+    
+    Args:
+        screen: Superficie de pygame donde se dibujará
+        xs, ys: Arreglos con las coordenadas enteras de cada punto
+        color: Color del pincel en formato RGB
+    
+    Returns:
+        pygame.Rect con la zona de la superficie que se modificó.
+    """
+    xs = np.asarray(xs, dtype=np.intp)
+    ys = np.asarray(ys, dtype=np.intp)
+
+    # Sólo interesan los puntos cuyo pincel alcanza el área de recorte
+    clip = screen.get_clip()
+    dentro = (xs >= clip.left) & (xs <= clip.right) & (ys >= clip.top) & (ys <= clip.bottom)
+    xs = xs[dentro]
+    ys = ys[dentro]
+    if len(xs) == 0:
+        return pygame.Rect(clip.left, clip.top, 0, 0)
+
+    # La máscara cubre de (x_min - 1, y_min - 1) a (x_max, y_max)
+    x_min, y_min = int(xs.min()) - 1, int(ys.min()) - 1
+    x_max, y_max = int(xs.max()), int(ys.max())
+    mascara = np.zeros((x_max - x_min + 1, y_max - y_min + 1), dtype=bool)
+    mascara[xs - x_min, ys - y_min] = True
+    mascara[:-1, :] |= mascara[1:, :]
+    mascara[:, :-1] |= mascara[:, 1:]
+
+    x0, y0 = max(x_min, clip.left), max(y_min, clip.top)
+    x1, y1 = min(x_max + 1, clip.right), min(y_max + 1, clip.bottom)
+    pixeles, ox, oy = _pixeles(screen)
+    pixeles[x0 - ox:x1 - ox, y0 - oy:y1 - oy][mascara[x0 - x_min:x1 - x_min, y0 - y_min:y1 - y_min]] = \
+        screen.map_rgb(color)
+    del pixeles  # Libera el bloqueo de la superficie
+
+    return pygame.Rect(x0, y0, x1 - x0, y1 - y0)
+
+@lru_cache(maxsize=64)
+def _semianchos_disco(radio):
+    """Semiancho de cada fila del pincel redondo, de la fila central (dy = 0) a la del borde (dy = radio)."""
+    dy = np.arange(radio + 1)
+    semianchos = np.floor(np.sqrt(radio * radio + radio - dy * dy)).astype(np.intp)
+    semianchos.flags.writeable = False
+    return semianchos
+
+def _estampar_disco(screen, xs, ys, radio, color):
+    """
+    Estampa un pincel redondo de radio dado en todos los puntos, con una
+    sola escritura sobre el arreglo de píxeles de la superficie.
+
+    Como en _estampar, los centros se marcan en una máscara que se dilata
+    con la huella del pincel. La dilatación se separa por filas: la máscara
+    se ensancha de a un píxel en x hasta cada semiancho del disco y cada
+    ensanchamiento se corre a las filas que lo usan, así que cuesta unas
+    3 * radio pasadas sobre la máscara en vez de una por píxel del disco.
+
+    Args:
+        screen: Superficie de pygame donde se dibujará
+        xs, ys: Arreglos con las coordenadas enteras de cada punto
+        radio: Radio del pincel en píxeles (0 pinta sólo el punto)
+        color: Color del pincel en formato RGB
+
+    Returns:
+        pygame.Rect con la zona de la superficie que se modificó.
+    """
+    xs = np.asarray(xs, dtype=np.intp)
+    ys = np.asarray(ys, dtype=np.intp)
+    radio = abs(int(radio))
+
+    clip = screen.get_clip()
+    dentro = ((xs >= clip.left - radio) & (xs < clip.right + radio)
+              & (ys >= clip.top - radio) & (ys < clip.bottom + radio))
+    xs = xs[dentro]
+    ys = ys[dentro]
+    if len(xs) == 0:
+        return pygame.Rect(clip.left, clip.top, 0, 0)
+
+    # La máscara cubre de (x_min, y_min) a (x_max, y_max), disco incluido
+    x_min, y_min = int(xs.min()) - radio, int(ys.min()) - radio
+    x_max, y_max = int(xs.max()) + radio, int(ys.max()) + radio
+    centros = np.zeros((x_max - x_min + 1, y_max - y_min + 1), dtype=bool)
+    centros[xs - x_min, ys - y_min] = True
+
+    semianchos = _semianchos_disco(radio)
+    ensanchadas = {0: centros}  # semiancho -> centros ensanchados en x
+    actual = centros
+    for w in range(1, int(semianchos[0]) + 1):
+        actual = actual.copy()
+        actual[1:, :] |= ensanchadas[w - 1][:-1, :]
+        actual[:-1, :] |= ensanchadas[w - 1][1:, :]
+        ensanchadas[w] = actual
+
+    mascara = ensanchadas[int(semianchos[0])].copy()
+    for dy in range(1, radio + 1):
+        fila = ensanchadas[int(semianchos[dy])]
+        mascara[:, dy:] |= fila[:, :-dy]
+        mascara[:, :-dy] |= fila[:, dy:]
+
+    x0, y0 = max(x_min, clip.left), max(y_min, clip.top)
+    x1, y1 = min(x_max + 1, clip.right), min(y_max + 1, clip.bottom)
+    if x0 >= x1 or y0 >= y1:
+        return pygame.Rect(clip.left, clip.top, 0, 0)
+    pixeles, ox, oy = _pixeles(screen)
+    pixeles[x0 - ox:x1 - ox, y0 - oy:y1 - oy][mascara[x0 - x_min:x1 - x_min, y0 - y_min:y1 - y_min]] = \
+        screen.map_rgb(color)
+    del pixeles  # Libera el bloqueo de la superficie
+
+    return pygame.Rect(x0, y0, x1 - x0, y1 - y0)
+
+def _area_tocada(screen, x, y, ancho, alto):
+    """Rectángulo (x, y, ancho, alto) recortado al área de recorte de la superficie."""
+    return pygame.Rect(x, y, ancho, alto).clip(screen.get_clip())
+
+# Calidad global de los contornos: False usa el pincel de 2x2 (rápido, con
+# escalones); True los traza con antialiasing. Se cambia con usar_suavizado().
+SUAVIZADO = False
+
+def usar_suavizado(activo=True):
+    """Activa o desactiva el antialiasing de todos los contornos."""
+    global SUAVIZADO
+    SUAVIZADO = bool(activo)
+
+def _cobertura_segmentos(x1, y1, x2, y2, recorte=None):
+    """
+    Cobertura antialiasing de varios segmentos con el grosor del pincel (2 px).
+    
+    Como en el algoritmo de Wu, se avanza de a un píxel por el eje mayor de
+    cada segmento y en el eje menor se reparte la cobertura según la parte
+    de cada píxel que tapa el trazo; todos los pasos de todos los segmentos
+    se calculan juntos. Donde varios segmentos tocan el mismo píxel se queda
+    la cobertura mayor, así las uniones no se oscurecen.
+    
+    Args:
+        x1, y1, x2, y2: Arreglos con los extremos de cada segmento (pueden
+            tener decimales)
+        recorte: pygame.Rect opcional; sólo se calculan los pasos que pueden
+            tocarlo. Cada paso se calcula aparte a partir de su posición,
+            así que los que quedan dan lo mismo que sin recortar.
+    
+    Returns:
+        Tupla (xs, ys, cobertura) sin píxeles repetidos, con cobertura en (0, 1].
+    """
+    x1, y1, x2, y2 = (np.atleast_1d(np.asarray(v, dtype=np.float64)) for v in (x1, y1, x2, y2))
+    eje_x = np.abs(x2 - x1) >= np.abs(y2 - y1)
+    # (a, b) son las coordenadas en el eje mayor y en el menor, con a1 <= a2
+    a1, b1 = np.where(eje_x, x1, y1), np.where(eje_x, y1, x1)
+    a2, b2 = np.where(eje_x, x2, y2), np.where(eje_x, y2, x2)
+    invertir = a2 < a1
+    a1, a2 = np.where(invertir, a2, a1), np.where(invertir, a1, a2)
+    b1, b2 = np.where(invertir, b2, b1), np.where(invertir, b1, b2)
+    largo = a2 - a1
+    pendiente = np.divide(b2 - b1, largo, out=np.zeros_like(largo), where=largo > 0)
+    semiancho = np.hypot(1.0, pendiente)  # Medio grosor de 1 px medido en el eje menor
+
+    # El pincel de 2x2 está centrado en (x - 0.5, y - 0.5) y cubre desde a1 - 1 hasta a2
+    m0 = np.rint(a1).astype(np.intp) - 1
+    pasos = np.rint(a2).astype(np.intp) - m0 + 1
+    if recorte is not None:
+        m0, pasos = _pasos_cobertura(a1, b1, largo, pendiente, eje_x, m0, pasos, recorte)
+    total = int(pasos.sum())
+    segmento = np.repeat(np.arange(len(pasos)), pasos)
+    m = np.repeat(m0, pasos) + np.arange(total) - np.repeat(np.cumsum(pasos) - pasos, pasos)
+    avance = np.clip(m - (a1[segmento] - 0.5), 0, largo[segmento])
+    centro = b1[segmento] - 0.5 + pendiente[segmento] * avance
+    h = semiancho[segmento]
+
+    # Hasta 4 píxeles del eje menor por paso (2 * sqrt(2) + 1 en la diagonal)
+    q = np.floor(centro - h + 0.5).astype(np.intp)[:, None] + np.arange(4)
+    cobertura = np.clip(np.minimum(q + 0.5, (centro + h)[:, None])
+                        - np.maximum(q - 0.5, (centro - h)[:, None]), 0, 1)
+    m = np.broadcast_to(m[:, None], q.shape)
+    horizontal = eje_x[segmento][:, None]
+    xs = np.where(horizontal, m, q).ravel()
+    ys = np.where(horizontal, q, m).ravel()
+    cobertura = cobertura.ravel()
+    visibles = cobertura > 0
+    xs, ys, cobertura = xs[visibles], ys[visibles], cobertura[visibles]
+    if len(xs) == 0:
+        return xs, ys, cobertura
+
+    # Un solo valor por píxel: el máximo de las coberturas que lo tocan
+    x_min, y_min = xs.min(), ys.min()
+    claves = (ys - y_min) * (xs.max() - x_min + 1) + (xs - x_min)
+    orden = np.argsort(claves, kind="stable")
+    claves = claves[orden]
+    inicios = np.flatnonzero(np.concatenate(([True], claves[1:] != claves[:-1])))
+    cobertura = np.maximum.reduceat(cobertura[orden], inicios)
+    return xs[orden][inicios], ys[orden][inicios], cobertura
+
+def _pasos_cobertura(a1, b1, largo, pendiente, eje_x, m0, pasos, recorte):
+    """
+    Recorta los pasos m0 <= m < m0 + pasos de _cobertura_segmentos a los que
+    pueden tocar recorte: m dentro de recorte en el eje mayor, y en el eje
+    menor un centro del trazo a menos de 3 píxeles de él.
+
+    Returns:
+        Tupla (m0, pasos) recortada; pasos es 0 en los segmentos que no lo tocan.
+    """
+    lo_a = np.where(eje_x, recorte.left, recorte.top) - 1
+    hi_a = np.where(eje_x, recorte.right, recorte.bottom)
+    lo_b = np.where(eje_x, recorte.top, recorte.left) - 3 - (b1 - 0.5)
+    hi_b = np.where(eje_x, recorte.bottom, recorte.right) + 3 - (b1 - 0.5)
+    # El centro es b1 - 0.5 + pendiente * avance con avance = m - (a1 - 0.5)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t0, t1 = lo_b / pendiente, hi_b / pendiente
+    plano = pendiente == 0
+    adentro = (lo_b <= 0) & (hi_b >= 0)
+    desde = np.where(plano, np.where(adentro, -np.inf, np.inf), np.minimum(t0, t1)) + a1 - 0.5
+    hasta = np.where(plano, np.where(adentro, np.inf, -np.inf), np.maximum(t0, t1)) + a1 - 0.5
+    fin = m0 + pasos
+    inicio = np.maximum(np.maximum(m0, lo_a), np.clip(np.floor(desde) - 1, m0, fin).astype(np.intp))
+    fin = np.minimum(np.minimum(fin, hi_a + 1), np.clip(np.ceil(hasta) + 2, m0, fin).astype(np.intp))
+    return inicio, np.maximum(fin - inicio, 0)
+
+def _mezclar(screen, xs, ys, cobertura, color):
+    """
+    Mezcla el color sobre los píxeles dados según su cobertura (alfa), con
+    una sola lectura y una sola escritura del arreglo de píxeles.
+    
+    Returns:
+        pygame.Rect con la zona de la superficie que se modificó.
+    """
+    clip = screen.get_clip()
+    dentro = (xs >= clip.left) & (xs < clip.right) & (ys >= clip.top) & (ys < clip.bottom)
+    xs, ys, cobertura = xs[dentro], ys[dentro], cobertura[dentro]
+    if len(xs) == 0:
+        return pygame.Rect(clip.left, clip.top, 0, 0)
+
+    pixeles, ox, oy = _pixeles(screen, canales=True)
+    actual = pixeles[xs - ox, ys - oy].astype(np.float32)
+    alfa = cobertura.astype(np.float32)[:, None]
+    pixeles[xs - ox, ys - oy] = np.rint(actual + (np.asarray(color[:3], dtype=np.float32) - actual) * alfa)
+    del pixeles  # Libera el bloqueo de la superficie
+
+    x0, y0 = int(xs.min()), int(ys.min())
+    return pygame.Rect(x0, y0, int(xs.max()) - x0 + 1, int(ys.max()) - y0 + 1)
+
+# Recorte ---------------
+# Antes de rasterizar, la geometría se recorta contra el área de recorte de
+# la superficie agrandada lo que alcanza el pincel, así que una figura que se
+# sale del lienzo sólo calcula los píxeles que se ven. El recorte elige qué
+# píxeles se calculan pero no cambia ninguno: el DDA sigue acumulando desde
+# el punto inicial, los rellenos sólo descartan filas y los círculos toman
+# partes de su tabla, así que el resultado es idéntico al de no recortar.
+_IZQUIERDA, _DERECHA, _ARRIBA, _ABAJO = 1, 2, 4, 8
+
+def _alcance(rect, radio):
+    """rect agrandado radio píxeles por lado: donde puede estar el centro de un pincel que lo toca."""
+    return pygame.Rect(rect).inflate(2 * radio, 2 * radio)
+
+def _codigos(x, y, rect):
+    """Códigos de Cohen-Sutherland de cada punto: un bit por cada lado de rect del que queda afuera."""
+    return (np.where(x < rect.left, _IZQUIERDA, 0) | np.where(x >= rect.right, _DERECHA, 0)
+            | np.where(y < rect.top, _ARRIBA, 0) | np.where(y >= rect.bottom, _ABAJO, 0))
+
+def _pasos_visibles(x1, y1, Xinc, Yinc, pasos, rect):
+    """
+    Pasos del DDA de cada segmento que pueden caer en rect.
+
+    Con los códigos de Cohen-Sutherland de los extremos se descartan de una
+    vez los segmentos que quedan enteros de un mismo lado de rect y se
+    dejan enteros los que quedan adentro. A los demás se les recorta el
+    parámetro como en Liang-Barsky, con el número de paso k como parámetro
+    (x = x1 + k * Xinc). Se deja un píxel y un paso de margen por el redondeo.
+
+    Returns:
+        Tupla (desde, hasta) con los pasos desde <= k < hasta de cada
+        segmento que pueden caer en rect; hasta <= desde si ninguno.
+    """
+    rect = rect.inflate(2, 2)
+    ultimo = (pasos - 1).astype(np.float64)
+    codigos = _codigos(x1, y1, rect)
+    finales = _codigos(x1 + ultimo * Xinc, y1 + ultimo * Yinc, rect)
+    fuera = (codigos & finales) != 0
+    desde = np.zeros_like(pasos)
+    hasta = np.where(fuera, 0, pasos)
+    cruzan = np.flatnonzero(((codigos | finales) != 0) & ~fuera)
+    if not len(cruzan):
+        return desde, hasta
+
+    k0 = np.zeros(len(cruzan))
+    k1 = ultimo[cruzan]
+    for origen, paso, lo, hi in ((x1, Xinc, rect.left, rect.right), (y1, Yinc, rect.top, rect.bottom)):
+        o, d = origen[cruzan], paso[cruzan]
+        quieto = d == 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            a = (lo - o) / d
+            b = (hi - o) / d
+        # Un segmento paralelo a este eje queda entero adentro o entero afuera
+        adentro = (o >= lo) & (o < hi)
+        k0 = np.maximum(k0, np.where(quieto, np.where(adentro, -np.inf, np.inf), np.minimum(a, b)))
+        k1 = np.minimum(k1, np.where(quieto, np.where(adentro, np.inf, -np.inf), np.maximum(a, b)))
+    visibles = k0 <= k1
+    k0 = np.where(visibles, k0, 0)
+    k1 = np.where(visibles, k1, -2)
+    desde[cruzan] = np.clip(np.floor(k0) - 1, 0, pasos[cruzan]).astype(pasos.dtype)
+    hasta[cruzan] = np.clip(np.ceil(k1) + 2, 0, pasos[cruzan]).astype(pasos.dtype)
+    return desde, hasta
+
+def _trazar(screen, x1, y1, x2, y2, color):
+    """Dibuja segmentos con el pincel o con antialiasing, según SUAVIZADO, recortados al área de recorte."""
+    clip = screen.get_clip()
+    if SUAVIZADO:
+        return _mezclar(screen, *_cobertura_segmentos(x1, y1, x2, y2, clip), color)
+    x, y = _puntos_dda(x1, y1, x2, y2, recorte=_alcance(clip, 1))
+    return _estampar(screen, x, y, color)
+
+# Máximo de celdas (segmentos x pasos) que se acumulan de una vez en _puntos_dda
+_MAX_CELDAS_DDA = 1 << 20
+
+def _acumular_dda(x1, y1, Xinc, Yinc, pasos, desde=None):
+    """
+    Acumula los pasos de un bloque de segmentos en una matriz rellenada.
+
+    Con desde (uno por segmento) se conservan sólo los pasos desde <= k < pasos.
+
+    Returns:
+        Tupla (xs, ys, filas) con el segmento de cada paso en filas.
+    """
+    # cumsum suma en orden, igual que el x += Xinc del bucle original,
+    # por lo que el redondeo de cada paso coincide exactamente; por eso los
+    # pasos recortados del principio se acumulan igual, aunque no se usen
+    ancho = int(pasos.max())
+    x = np.repeat(Xinc[:, None], ancho, axis=1)
+    y = np.repeat(Yinc[:, None], ancho, axis=1)
+    x[:, 0] = x1
+    y[:, 0] = y1
+    k = np.arange(ancho)
+    validos = k < pasos[:, None]
+    if desde is not None:
+        validos &= k >= desde[:, None]
+        pasos = pasos - desde
+    x = np.rint(np.cumsum(x, axis=1)[validos]).astype(np.intp)
+    y = np.rint(np.cumsum(y, axis=1)[validos]).astype(np.intp)
+    return x, y, np.repeat(np.arange(len(pasos)), pasos)
+
+def _puntos_dda(x1, y1, x2, y2, etiquetas=None, recorte=None):
+    """
+    Calcula con NumPy los pasos DDA de varios segmentos a la vez.
+    
+    Igual que el DDA clásico, cada segmento incluye su punto inicial pero no
+    el final; un segmento de longitud cero aporta sólo su punto inicial.
+    
+    Args:
+        x1, y1: Arreglos con los puntos iniciales de cada segmento
+        x2, y2: Arreglos con los puntos finales de cada segmento
+        etiquetas: Arreglo opcional con un valor por segmento (por ejemplo,
+            la figura a la que pertenece)
+        recorte: pygame.Rect opcional; los pasos que seguro caen fuera de
+            él no se calculan (ver _pasos_visibles)
+    
+    Returns:
+        Tupla (xs, ys) con las coordenadas enteras de todos los pasos; con
+        etiquetas, (xs, ys, etiquetas) con la del segmento de cada paso.
+    """
+    x1 = np.atleast_1d(np.asarray(x1, dtype=np.float64))
+    y1 = np.atleast_1d(np.asarray(y1, dtype=np.float64))
+    dx = np.asarray(x2, dtype=np.float64) - x1
+    dy = np.asarray(y2, dtype=np.float64) - y1
+
+    steps = np.maximum(np.abs(dx), np.abs(dy)).astype(np.intp)
+    pasos = np.maximum(steps, 1)
+    Xinc = np.where(steps > 0, dx / pasos, 0.0)
+    Yinc = np.where(steps > 0, dy / pasos, 0.0)
+
+    desde = None
+    if recorte is not None and len(x1):
+        desde, pasos = _pasos_visibles(x1, y1, Xinc, Yinc, pasos, recorte)
+        visibles = np.flatnonzero(pasos > desde)
+        if len(visibles) < len(x1):
+            x1, y1, Xinc, Yinc = x1[visibles], y1[visibles], Xinc[visibles], Yinc[visibles]
+            desde, pasos = desde[visibles], pasos[visibles]
+            if etiquetas is not None:
+                etiquetas = np.asarray(etiquetas)[visibles]
+    if len(x1) == 0:
+        vacio = np.empty(0, dtype=np.intp)
+        return (vacio, vacio) if etiquetas is None else (vacio, vacio, np.asarray(etiquetas)[:0])
+
+    if len(pasos) * int(pasos.max()) <= _MAX_CELDAS_DDA:
+        x, y, filas = _acumular_dda(x1, y1, Xinc, Yinc, pasos, desde)
+        return (x, y) if etiquetas is None else (x, y, np.asarray(etiquetas)[filas])
+
+    # Con muchos segmentos de longitudes dispares se agrupan por potencia de
+    # dos de su longitud, así el relleno de cada bloque es como mucho el doble
+    grupos = np.ceil(np.log2(pasos)).astype(np.intp)
+    xs = []
+    ys = []
+    segmentos = []
+    for g in np.unique(grupos):
+        indices = np.flatnonzero(grupos == g)
+        filas = max(1, _MAX_CELDAS_DDA >> int(g))
+        for i in range(0, len(indices), filas):
+            sel = indices[i:i + filas]
+            x, y, fila = _acumular_dda(x1[sel], y1[sel], Xinc[sel], Yinc[sel], pasos[sel],
+                                       None if desde is None else desde[sel])
+            xs.append(x)
+            ys.append(y)
+            segmentos.append(sel[fila])
+    if etiquetas is None:
+        return np.concatenate(xs), np.concatenate(ys)
+    return np.concatenate(xs), np.concatenate(ys), np.asarray(etiquetas)[np.concatenate(segmentos)]
+
+def _segmentos_poligono(vertices):
+    """Segmentos (x1, y1, x2, y2) que cierran el polígono dado por sus vértices."""
+    inicio = np.asarray(vertices, dtype=np.float64).reshape(-1, 2)
+    fin = np.roll(inicio, -1, axis=0)
+    return inicio[:, 0], inicio[:, 1], fin[:, 0], fin[:, 1]
+
+def _segmentos_polilinea(xs, ys, etiquetas=None):
+    """
+    Segmentos (x1, y1, x2, y2) que unen puntos consecutivos de una o varias
+    polilíneas (una por fila). Al final de cada una se añade un segmento de
+    longitud cero, porque el DDA no pinta el extremo final. Con etiquetas
+    (una por polilínea) se añade a la tupla la de cada segmento.
+    """
+    xs = np.asarray(xs)
+    ys = np.asarray(ys)
+    x2 = np.concatenate([xs[..., 1:], xs[..., -1:]], axis=-1)
+    y2 = np.concatenate([ys[..., 1:], ys[..., -1:]], axis=-1)
+    if etiquetas is None:
+        return xs.ravel(), ys.ravel(), x2.ravel(), y2.ravel()
+    return xs.ravel(), ys.ravel(), x2.ravel(), y2.ravel(), np.repeat(etiquetas, xs.shape[-1])
+
+def _etiquetas_filas(etiquetas, sel):
+    """Etiquetas de las filas elegidas por sel, o None si no hay etiquetas."""
+    return None if etiquetas is None else np.asarray(etiquetas)[sel]
+
+def simplificar_polilinea(xs, ys, tolerancia):
+    """
+    Simplifica una polilínea con el algoritmo de Ramer-Douglas-Peucker.
+
+    Se conservan los extremos y, de cada tramo, el punto más alejado de la
+    cuerda mientras esa distancia supere la tolerancia; así la polilínea
+    simplificada nunca se aparta más de tolerancia píxeles de la original.
+
+    Args:
+        xs, ys: Coordenadas de los puntos, en orden
+        tolerancia: Desviación máxima permitida en píxeles
+
+    Returns:
+        Arreglo con los índices de los puntos que se conservan, en orden.
+    """
+    puntos = np.column_stack([xs, ys]).astype(np.float64)
+    n = len(puntos)
+    if n < 3:
+        return np.arange(n)
+
+    conservar = np.zeros(n, dtype=bool)
+    conservar[[0, -1]] = True
+    pendientes = [(0, n - 1)]
+    while pendientes:
+        i, j = pendientes.pop()
+        if j - i < 2:
+            continue
+        a = puntos[i]
+        cuerda = puntos[j] - a
+        relativos = puntos[i + 1:j] - a
+        largo = math.hypot(*cuerda)
+        if largo > 0:
+            distancias = np.abs(cuerda[0] * relativos[:, 1] - cuerda[1] * relativos[:, 0]) / largo
+        else:
+            distancias = np.hypot(relativos[:, 0], relativos[:, 1])  # Tramo cerrado: distancia al extremo
+        k = int(np.argmax(distancias))
+        if distancias[k] > tolerancia:
+            m = i + 1 + k
+            conservar[m] = True
+            pendientes += [(i, m), (m, j)]
+    return np.flatnonzero(conservar)
+
+def _concatenar_segmentos(segmentos):
+    """Une una lista de tuplas (x1, y1, x2, y2) en una sola tupla de arreglos."""
+    return tuple(np.concatenate(columna) for columna in zip(*segmentos))
+
+# Teselado adaptativo de curvas
+TOLERANCIA_CURVA = 0.25  # Desviación máxima en píxeles entre curva y cuerdas
+MIN_MUESTRAS = 8
+MAX_MUESTRAS = 4096
+
+def _limitar_muestras(n):
+    return np.clip(np.ceil(n), MIN_MUESTRAS, MAX_MUESTRAS).astype(np.intp)
+
+@lru_cache(maxsize=64)
+def _base_bezier(n):
+    """Matriz (n, 4) de polinomios de Bernstein cúbicos evaluados en n valores de t."""
+    t = np.linspace(0, 1, n)
+    s = 1 - t
+    base = np.stack([s**3, 3 * s**2 * t, 3 * s * t**2, t**3], axis=1)
+    base.flags.writeable = False
+    return base
+
+@lru_cache(maxsize=64)
+def _tabla_elipse(n):
+    """Tablas de coseno y seno para n valores de t en [0, 2π]."""
+    t = np.linspace(0, 2 * np.pi, n)
+    cos_t, sin_t = np.cos(t), np.sin(t)
+    cos_t.flags.writeable = False
+    sin_t.flags.writeable = False
+    return cos_t, sin_t
+
+def _muestras_bezier(cx, cy):
+    """
+    Elige el número de muestras de cada Bézier cúbica con la cota de planitud:
+    con n cuerdas uniformes el error es como mucho |B''|max / (8 n²), y
+    |B''| <= 6 * max(|p0 - 2p1 + p2|, |p1 - 2p2 + p3|).
+    """
+    d = np.maximum(
+        np.hypot(cx[:, 0] - 2 * cx[:, 1] + cx[:, 2], cy[:, 0] - 2 * cy[:, 1] + cy[:, 2]),
+        np.hypot(cx[:, 1] - 2 * cx[:, 2] + cx[:, 3], cy[:, 1] - 2 * cy[:, 2] + cy[:, 3]),
+    )
+    return _limitar_muestras(np.sqrt(6 * d / (8 * TOLERANCIA_CURVA)) + 1)
+
+def _muestras_elipse(rx, ry):
+    """
+    Elige el número de muestras de cada elipse: con paso angular h el error de
+    cada cuerda es como mucho max(rx, ry) * h² / 8.
+    """
+    radio = np.maximum(np.abs(rx), np.abs(ry))
+    return _limitar_muestras(2 * np.pi * np.sqrt(radio / (8 * TOLERANCIA_CURVA)) + 1)
+
+def _segmentos_elipses(xc, yc, rx, ry, redondear=True, etiquetas=None):
+    """
+    Segmentos (x1, y1, x2, y2) de las polilíneas que aproximan varias elipses.
+    Las elipses con el mismo número de muestras se evalúan juntas. Con
+    redondear=False las muestras conservan sus decimales (para el antialiasing).
+    Con etiquetas (una por elipse) se añade a la tupla la de cada segmento.
+    """
+    xc, yc, rx, ry = (np.atleast_1d(np.asarray(v, dtype=np.float64))[:, None] for v in (xc, yc, rx, ry))
+    muestras = _muestras_elipse(rx[:, 0], ry[:, 0])
+
+    segmentos = []
+    for n in np.unique(muestras).tolist():
+        sel = muestras == n
+        cos_t, sin_t = _tabla_elipse(n)
+        x = xc[sel] + rx[sel] * cos_t
+        y = yc[sel] + ry[sel] * sin_t
+        if redondear:
+            x, y = np.rint(x).astype(np.intp), np.rint(y).astype(np.intp)
+        segmentos.append(_segmentos_polilinea(x, y, _etiquetas_filas(etiquetas, sel)))
+    return _concatenar_segmentos(segmentos)
+
+def _segmentos_beziers(cx, cy, redondear=True, etiquetas=None):
+    """
+    Segmentos (x1, y1, x2, y2) de las polilíneas que aproximan varias Bézier
+    cúbicas. cx y cy tienen una fila (x0, x1, x2, x3) por curva; las curvas
+    con el mismo número de muestras se evalúan juntas. Con redondear=False
+    las muestras conservan sus decimales (para el antialiasing). Con
+    etiquetas (una por curva) se añade a la tupla la de cada segmento.
+    """
+    cx = np.asarray(cx, dtype=np.float64).reshape(-1, 4)
+    cy = np.asarray(cy, dtype=np.float64).reshape(-1, 4)
+    muestras = _muestras_bezier(cx, cy)
+
+    segmentos = []
+    for n in np.unique(muestras).tolist():
+        sel = muestras == n
+        base = _base_bezier(n)
+        px, py = cx[sel], cy[sel]
+        x = px[:, 0:1] * base[:, 0] + px[:, 1:2] * base[:, 1] + px[:, 2:3] * base[:, 2] + px[:, 3:4] * base[:, 3]
+        y = py[:, 0:1] * base[:, 0] + py[:, 1:2] * base[:, 1] + py[:, 2:3] * base[:, 2] + py[:, 3:4] * base[:, 3]
+        if redondear:
+            x, y = np.rint(x).astype(np.intp), np.rint(y).astype(np.intp)
+        segmentos.append(_segmentos_polilinea(x, y, _etiquetas_filas(etiquetas, sel)))
+    return _concatenar_segmentos(segmentos)
+
+@lru_cache(maxsize=256)
+def _bresenham_circulo(r):
+    """
+    Estados (x, y) por los que pasa el algoritmo de Bresenham en el primer
+    octante de un círculo de radio r: de (0, r) hasta el primero con x > y,
+    que el bucle calcula pero ya no dibuja.
+
+    El criterio d < 0 del bucle es 2(x+1)² + y² + (y-1)² < 2r², así que cada
+    y se despeja sin recorrer los anteriores y todos se calculan juntos. El
+    resultado se comprueba contra el criterio paso a paso (también
+    vectorizado); si algo no coincide se recorre el bucle.
+    """
+    r = int(r)
+    if r > 0:
+        x = np.arange(int(r / math.sqrt(2)) + 3, dtype=np.int64)
+        # y(x) = el mayor y con y² + (y-1)² < 2r² - 2x², sin pasar de r
+        limite = 2 * r * r - 2 * x * x
+        y = np.floor((1 + np.sqrt(np.maximum(2 * limite - 1, 0))) / 2).astype(np.int64)
+        y -= 2 * y * y - 2 * y + 1 >= limite
+        y += 2 * y * y + 2 * y + 1 < limite
+        y = np.minimum(y, r)
+        pasados = np.flatnonzero(x > y)
+        if len(pasados):
+            x, y = x[:pasados[0] + 1], y[:pasados[0] + 1]
+            d = 2 * (x[:-1] + 1) ** 2 + y[:-1] ** 2 + (y[:-1] - 1) ** 2 - 2 * r * r
+            if y[0] == r and np.array_equal(y[1:], y[:-1] - (d >= 0)):
+                x, y = x.astype(np.intp), y.astype(np.intp)
+                x.flags.writeable = False
+                y.flags.writeable = False
+                return x, y
+
+    x = 0
+    y = r
+    d = 3 - 2 * r
+    xs = [x]
+    ys = [y]
+    while x <= y:
+        if d < 0:
+            d = d + 4 * x + 6
+        else:
+            d = d + 4 * (x - y) + 10
+            y -= 1
+        x += 1
+        xs.append(x)
+        ys.append(y)
+    xs = np.array(xs, dtype=np.intp)
+    ys = np.array(ys, dtype=np.intp)
+    xs.flags.writeable = False
+    ys.flags.writeable = False
+    return xs, ys
+
+@lru_cache(maxsize=256)
+def _octantes_circulo(r):
+    """
+    Desplazamientos (dx, dy) de los puntos del contorno de un círculo de radio r
+    centrado en el origen, en el mismo orden en que los genera Bresenham.
+    """
+    x, y = _bresenham_circulo(r)
+    x, y = x[:-1, None], y[:-1, None]
+    dx = np.hstack((x, -x, x, -x, y, -y, y, -y)).ravel()
+    dy = np.hstack((y, y, -y, -y, x, x, -x, -x)).ravel()
+    dx.flags.writeable = False
+    dy.flags.writeable = False
+    return dx, dy
+
+def _puntos_circulo(xc, yc, r, recorte):
+    """
+    Puntos del contorno de Bresenham de un círculo que caen en recorte.
+
+    En cada octante una de las dos coordenadas es el x del paso, que avanza
+    de a uno, así que los pasos que la dejan dentro de recorte son una
+    rebanada de la tabla; la otra coordenada se filtra en la rebanada. El
+    costo crece con el lado del recorte y no con el radio.
+
+    Returns:
+        Tupla (xs, ys), sin el orden de _octantes_circulo.
+    """
+    x, y = _bresenham_circulo(r)
+    x, y = x[:-1], y[:-1]
+    xs, ys = [], []
+    for sx, sy in ((1, 1), (-1, 1), (1, -1), (-1, -1)):
+        for girado in (False, True):
+            # Coordenada que sigue al x del paso: la x del punto o, girado, la y
+            s, c, lo, hi = (sy, yc, recorte.top, recorte.bottom) if girado else (sx, xc, recorte.left, recorte.right)
+            k0, k1 = (lo - c, hi - c) if s > 0 else (c - hi + 1, c - lo + 1)
+            k0, k1 = max(k0, 0), min(k1, len(x))
+            if k0 >= k1:
+                continue
+            a, b = x[k0:k1], y[k0:k1]
+            px, py = (xc + sx * b, yc + sy * a) if girado else (xc + sx * a, yc + sy * b)
+            otra, lo, hi = (px, recorte.left, recorte.right) if girado else (py, recorte.top, recorte.bottom)
+            dentro = (otra >= lo) & (otra < hi)
+            xs.append(px[dentro])
+            ys.append(py[dentro])
+    if not xs:
+        vacio = np.empty(0, dtype=np.intp)
+        return vacio, vacio
+    return np.concatenate(xs), np.concatenate(ys)
+
+def _puntos_circulos(xc, yc, r, recorte):
+    """
+    Puntos del contorno de varios círculos del mismo radio que pueden caer en recorte.
+
+    Los círculos cuya caja no toca recorte se descartan. Si el radio es
+    grande comparado con recorte cada círculo recorta sus octantes con
+    _puntos_circulo; si no, se suman los centros a la tabla de desplazamientos.
+
+    Returns:
+        Tupla (xs, ys, circulo) con el índice en xc del círculo de cada punto.
+    """
+    xc = np.asarray(xc, dtype=np.intp).ravel()
+    yc = np.asarray(yc, dtype=np.intp).ravel()
+    cerca = np.flatnonzero((xc + r >= recorte.left) & (xc - r < recorte.right)
+                           & (yc + r >= recorte.top) & (yc - r < recorte.bottom))
+    if r > recorte.width + recorte.height:
+        partes = [_puntos_circulo(int(xc[i]), int(yc[i]), r, recorte) for i in cerca.tolist()]
+        if not partes:
+            vacio = np.empty(0, dtype=np.intp)
+            return vacio, vacio, vacio
+        xs, ys = (np.concatenate(columna) for columna in zip(*partes))
+        return xs, ys, np.repeat(cerca, [len(px) for px, _ in partes])
+    dx, dy = _octantes_circulo(r)
+    return ((xc[cerca, None] + dx).ravel(), (yc[cerca, None] + dy).ravel(),
+            np.repeat(cerca, len(dx)))
+
+# Funciones de dibujo ---------------
+def lineaDDA(screen, x1, y1, x2, y2, color):
+    """
+    Implementa el algoritmo DDA (Digital Differential Analyzer) para dibujar una línea.
+    
+    Todos los pasos se calculan de una vez con NumPy y se escriben juntos
+    en la superficie mediante _estampar, o se mezclan con antialiasing si
+    SUAVIZADO está activo.
+    
+    Args:
+        screen: Superficie de pygame donde se dibujará
+        x1, y1: Coordenadas del punto inicial
+        x2, y2: Coordenadas del punto final
+        color: Color de la línea en formato RGB
+    
+    Returns:
+        pygame.Rect con la zona de la superficie que se modificó.
+    """
+    return _trazar(screen, x1, y1, x2, y2, color)
+    
+def polygon(screen, vertices, color):
+    """
+    Dibuja un polígono conectando una lista de vértices.
+    
+    Args:
+        screen: Superficie de pygame donde se dibujará
+        vertices: Lista de tuplas (x,y) que representan los vértices
+        color: Color del polígono en formato RGB
+    
+    Returns:
+        pygame.Rect con la zona de la superficie que se modificó.
+    """
+    # Todas las aristas (i, i+1) se rasterizan juntas en una sola pasada
+    return _trazar(screen, *_segmentos_poligono(vertices), color)
+
+def rectangle(screen, x, y, width, height, color):
+    """
+    Dibuja un rectángulo usando el algoritmo de línea DDA.
+    
+    Args:
+        screen: Superficie de pygame donde se dibujará
+        x, y: Coordenadas de la esquina superior izquierda
+        width: Ancho del rectángulo
+        height: Alto del rectángulo
+        color: Color del rectángulo en formato RGB
+    
+    Returns:
+        pygame.Rect con la zona de la superficie que se modificó.
+    """
+    vertices = [
+        (x, y), (x + width, y),
+        (x + width, y + height), (x, y + height)
+    ]
+    return polygon(screen, vertices, color)
+
+def circleBresenham(screen, xc, yc, r, color):
+    """
+    Implementa el algoritmo de Bresenham para dibujar círculos.
+    
+    Args:
+        screen: Superficie de pygame donde se dibujará
+        xc, yc: Coordenadas del centro del círculo
+        r: Radio del círculo
+        color: Color del círculo en formato RGB
+    
+    Returns:
+        pygame.Rect con la zona de la superficie que se modificó.
+    """
+    if SUAVIZADO:
+        # Con antialiasing el círculo es una elipse de radios iguales
+        return _trazar(screen, *_segmentos_elipses(xc, yc, r, r, redondear=False), color)
+    return _estampar(screen, *_puntos_circulo(xc, yc, r, _alcance(screen.get_clip(), 1)), color)
+
+def drawTriangulo(screen, vertices, color):
+    """
+    Dibuja un triángulo usando el algoritmo de línea DDA.
+    
+    Args:
+        screen: Superficie de pygame donde se dibujará
+        vertices: Lista de 3 tuplas (x,y) que representan los vértices
+        color: Color del triángulo en formato RGB
+    
+    Returns:
+        pygame.Rect con la zona de la superficie que se modificó.
+    """
+    return polygon(screen, vertices, color)
+
+def drawElipse(screen, xc, yc, rx, ry, color):
+    """
+    Dibuja una elipse usando parametrización.
+    
+    El número de muestras se adapta al tamaño de la elipse y las muestras
+    consecutivas se unen con segmentos DDA, así que no quedan huecos.
+    
+    Args:
+        screen: Superficie de pygame donde se dibujará
+        xc, yc: Coordenadas del centro de la elipse
+        rx: Radio en el eje x
+        ry: Radio en el eje y
+        color: Color de la elipse en formato RGB
+    
+    Returns:
+        pygame.Rect con la zona de la superficie que se modificó.
+    """
+    return _trazar(screen, *_segmentos_elipses(xc, yc, rx, ry, redondear=not SUAVIZADO), color)
+
+def drawCurvaBezier(screen, p0, p1, p2, p3, color):
+    """
+    Dibuja una curva de Bézier cúbica.
+    
+    El número de muestras se elige con una cota de planitud y las muestras
+    consecutivas se unen con segmentos DDA, así que no quedan huecos.
+    
+    Args:
+        screen: Superficie de pygame donde se dibujará
+        p0: Punto inicial (x,y)
+        p1, p2: Puntos de control (x,y)
+        p3: Punto final (x,y)
+        color: Color de la curva en formato RGB
+    
+    Returns:
+        pygame.Rect con la zona de la superficie que se modificó.
+    """
+    segmentos = _segmentos_beziers([p0[0], p1[0], p2[0], p3[0]], [p0[1], p1[1], p2[1], p3[1]],
+                                   redondear=not SUAVIZADO)
+    return _trazar(screen, *segmentos, color)
+
+def trazo(screen, xs, ys, radio, color):
+    """
+    Dibuja una polilínea a mano alzada con un pincel redondo.
+
+    Todos los segmentos se recorren juntos con el DDA y en cada paso se
+    estampa el disco del pincel, así que los extremos y las uniones quedan
+    redondeados sin calcularlos aparte. El pincel tiene borde duro también
+    con SUAVIZADO activo: dos trazos que se pisan no se oscurecen.
+
+    Args:
+        screen: Superficie de pygame donde se dibujará
+        xs, ys: Coordenadas de los puntos de la polilínea, en orden
+        radio: Radio del pincel en píxeles
+        color: Color del trazo en formato RGB
+
+    Returns:
+        pygame.Rect con la zona de la superficie que se modificó.
+    """
+    x, y = _puntos_dda(*_segmentos_polilinea(xs, ys), recorte=_alcance(screen.get_clip(), abs(int(radio))))
+    return _estampar_disco(screen, x, y, radio, color)
+
+# Rellenos --------
+# Un tramo escrito con su propia rebanada cuesta lo que unas 32 celdas de la máscara de cobertura
+_CELDAS_POR_TRAMO = 32
+
+def _disjuntos(ys, x_inicio, x_fin):
+    """True si ningún par de tramos [x_inicio, x_fin) de la misma fila se pisa."""
+    orden = np.lexsort((x_inicio, ys))
+    ys, x_inicio, x_fin = ys[orden], x_inicio[orden], x_fin[orden]
+    misma_fila = ys[1:] == ys[:-1]
+    return not np.any(misma_fila & (x_inicio[1:] < x_fin[:-1]))
+
+def fill_spans(screen, spans, color):
+    """
+    Rellena una lista de tramos horizontales escribiendo cada uno como una
+    asignación de rebanada sobre el arreglo de píxeles de la superficie.
+    
+    Los tramos se recortan contra el área de recorte de la superficie una sola
+    vez al principio, así que ningún píxel fuera de ella llega a escribirse.
+    
+    Args:
+        screen: Superficie de pygame donde se dibujará.
+        spans: Secuencia de tuplas (y, x_inicio, x_fin), extremos incluidos.
+        color: Color del relleno en formato RGB.
+    
+    Returns:
+        Cantidad de píxeles escritos.
+    """
+    spans = np.asarray(spans, dtype=np.intp).reshape(-1, 3)
+    ys = spans[:, 0]
+    x_inicio = np.minimum(spans[:, 1], spans[:, 2])
+    x_fin = np.maximum(spans[:, 1], spans[:, 2])
+
+    clip = screen.get_clip()
+    x_inicio = np.maximum(x_inicio, clip.left)
+    x_fin = np.minimum(x_fin, clip.right - 1)
+    visibles = (ys >= clip.top) & (ys < clip.bottom) & (x_inicio <= x_fin)
+    if not visibles.any():
+        return 0
+
+    ys = ys[visibles]
+    x_inicio = x_inicio[visibles]
+    x_fin = x_fin[visibles] + 1
+
+    pixeles, ox, oy = _pixeles(screen)
+    valor = screen.map_rgb(color)
+    ys, x_inicio, x_fin = ys - oy, x_inicio - ox, x_fin - ox
+
+    y_min, y_max = int(ys.min()), int(ys.max())
+    x_min, x_max = int(x_inicio.min()), int(x_fin.max())
+    if len(ys) <= y_max - y_min + 1 or (
+            len(ys) * _CELDAS_POR_TRAMO <= (x_max - x_min) * (y_max - y_min + 1)
+            and _disjuntos(ys, x_inicio, x_fin)):
+        # Tramos que no se pisan (por ejemplo, uno por fila): cada uno es una
+        # asignación de rebanada y cada píxel se escribe una sola vez
+        escritos = 0
+        for y, x0, x1 in zip(ys.tolist(), x_inicio.tolist(), x_fin.tolist()):
+            pixeles[x0:x1, y] = valor
+            escritos += x1 - x0
+    else:
+        # Tramos superpuestos: se marcan +1/-1 sus extremos y la suma acumulada
+        # por fila da la cobertura, así cada píxel se escribe una sola vez
+        ancho, alto = x_max - x_min + 1, y_max - y_min + 1
+        filas = (ys - y_min) * ancho
+        bordes = np.bincount(filas + (x_inicio - x_min), minlength=ancho * alto)
+        bordes -= np.bincount(filas + (x_fin - x_min), minlength=ancho * alto)
+        cubiertos = np.cumsum(bordes.reshape(alto, ancho)[:, :-1], axis=1) > 0
+        pixeles[x_min:x_max, y_min:y_max + 1][cubiertos.T] = valor
+        escritos = int(np.count_nonzero(cubiertos))
+    del pixeles  # Libera el bloqueo de la superficie
+
+    return escritos
+
+def _spans_rectangulo(x, y, width, height, filas=None):
+    """
+    Tramos (y, x_inicio, x_fin) de un rectángulo relleno, uno por fila; con
+    filas=(desde, hasta) sólo los de las filas desde <= y < hasta.
+    """
+    desde, hasta = y, y + height
+    if filas is not None:
+        desde, hasta = max(desde, filas[0]), min(hasta, filas[1])
+    filas = np.arange(desde, hasta)
+    spans = np.empty((len(filas), 3), dtype=np.intp)
+    spans[:, 0] = filas
+    spans[:, 1] = x
+    spans[:, 2] = x + width - 1
+    return spans
+
+def filled_rectangle(screen, x, y, width, height, color):
+    """
+    Dibuja un rectángulo RELLENO trazando líneas horizontales,
+    evitando pygame.draw y Surface.blit.
+    
+    Args:
+        screen: Superficie de pygame donde se dibujará.
+        x, y: Coordenadas de la esquina superior izquierda.
+        width: Ancho del rectángulo.
+        height: Alto del rectángulo.
+        color: Color del rectángulo en formato RGB.
+    
+    Returns:
+        pygame.Rect con la zona de la superficie que se modificó.
+    """
+    clip = screen.get_clip()
+    fill_spans(screen, _spans_rectangulo(x, y, width, height, (clip.top, clip.bottom)), color)
+
+    x_min = min(x, x + width - 1)
+    return _area_tocada(screen, x_min, y, abs(width - 1) + 1, max(height, 0))
+
+def line(screen, x1, y1, x2, y2, color):
+    """
+    Dibuja una línea horizontal de (x1, y1) a (x2, y2) usando fill_spans().
+    """
+    if y1 != y2:
+        return 
+
+    fill_spans(screen, [(y1, x1, x2)], color)
+
+@lru_cache(maxsize=256)
+def _semianchos_circulo(r):
+    """
+    Calcula, para un radio dado, la mitad del ancho del tramo de cada fila
+    del círculo relleno recorriendo una vez el algoritmo de Bresenham.
+    
+    Cada paso de Bresenham aporta tramos a cuatro filas simétricas; aquí se
+    guarda sólo el más ancho de cada fila, que es el que cubre a los demás.
+    
+    Args:
+        r: Radio del círculo.
+    
+    Returns:
+        Arreglo de solo lectura donde el índice i es la distancia vertical al
+        centro y el valor es la mitad del ancho del tramo en esa fila.
+    """
+    # Cada estado (x, y) aporta la fila y con semiancho x y la fila x con
+    # semiancho y; la fila central tiene semiancho r
+    x, y = _bresenham_circulo(r)
+    filas = np.abs(np.concatenate([y, x, [0]]))
+    mitades = np.abs(np.concatenate([x, y, [r]]))
+    tabla = np.zeros(int(filas.max()) + 1, dtype=np.intp)
+    np.maximum.at(tabla, filas, mitades)
+    tabla.flags.writeable = False
+    return tabla
+
+def _spans_circulo(xc, yc, r, filas=None):
+    """
+    Tramos (y, x_inicio, x_fin) de un círculo relleno, uno por fila; con
+    filas=(desde, hasta) sólo los de las filas desde <= y < hasta.
+    """
+    semiancho = _semianchos_circulo(r)
+    alto = len(semiancho) - 1
+    desde, hasta = -alto, alto + 1
+    if filas is not None:
+        desde, hasta = max(desde, filas[0] - yc), min(hasta, filas[1] - yc)
+    filas = np.arange(desde, hasta)
+    mitad = semiancho[np.abs(filas)]
+
+    spans = np.empty((len(filas), 3), dtype=np.intp)
+    spans[:, 0] = yc + filas
+    spans[:, 1] = xc - mitad
+    spans[:, 2] = xc + mitad
+    return spans
+
+def _spans_circulos(xc, yc, r, filas):
+    """
+    Tramos de varios círculos rellenos del mismo radio en las filas
+    desde <= y < hasta de filas=(desde, hasta).
+
+    Como _puntos_circulos: si el círculo es más alto que las filas pedidas
+    cada uno se recorta con _spans_circulo; si no, se suman los centros a la
+    tabla de tramos de un círculo en el origen.
+
+    Returns:
+        Tupla (tramos, circulo) con el índice en xc del círculo de cada tramo.
+    """
+    xc = np.asarray(xc, dtype=np.intp).ravel()
+    yc = np.asarray(yc, dtype=np.intp).ravel()
+    alto = len(_semianchos_circulo(r)) - 1
+    cerca = np.flatnonzero((yc + alto >= filas[0]) & (yc - alto < filas[1]))
+    if 2 * alto + 1 > filas[1] - filas[0]:
+        partes = [_spans_circulo(int(xc[i]), int(yc[i]), r, filas) for i in cerca.tolist()]
+        if not partes:
+            return np.empty((0, 3), dtype=np.intp), np.empty(0, dtype=np.intp)
+        return np.concatenate(partes), np.repeat(cerca, [len(tramos) for tramos in partes])
+    tramos = _spans_circulo(0, 0, r)
+    return np.stack([
+        (yc[cerca, None] + tramos[:, 0]).ravel(),
+        (xc[cerca, None] + tramos[:, 1]).ravel(),
+        (xc[cerca, None] + tramos[:, 2]).ravel(),
+    ], axis=1), np.repeat(cerca, len(tramos))
+
+def filled_circle_bresenham(screen, xc, yc, r, color):
+    """
+    Implementa el algoritmo de Bresenham para dibujar círculos RELLENOS.
+    
+    La tabla de semianchos de cada radio se calcula una vez y se reutiliza,
+    así que cada fila del círculo se escribe exactamente una vez.
+    
+    Args:
+        screen: Superficie de pygame donde se dibujará.
+        xc, yc: Coordenadas del centro del círculo.
+        r: Radio del círculo.
+        color: Color del círculo en formato RGB.
+    
+    Returns:
+        pygame.Rect con la zona de la superficie que se modificó.
+    """
+    clip = screen.get_clip()
+    fill_spans(screen, _spans_circulo(xc, yc, r, (clip.top, clip.bottom)), color)
+
+    semiancho = _semianchos_circulo(r)
+    alto = len(semiancho) - 1
+    ancho = int(semiancho.max())
+    return _area_tocada(screen, xc - ancho, yc - alto, 2 * ancho + 1, 2 * alto + 1)
+
+# Relleno de polígonos por líneas de barrido ---------------
+REGLA_PAR_IMPAR = "par-impar"  # Dentro si se cruza un número impar de aristas
+REGLA_NO_CERO = "no-cero"      # Dentro si el número de vueltas no es cero
+
+def _spans_poligonos(vx, vy, regla=REGLA_PAR_IMPAR, etiquetas=None, filas=None):
+    """
+    Tramos (y, x_inicio, x_fin) del interior de uno o varios polígonos.
+
+    Tabla de aristas: cada arista no horizontal cubre las filas
+    min(y) <= y < max(y) (semiabierto, así un vértice compartido cuenta una
+    sola vez). Lista activa: las aristas que cubren cada fila, con la x donde
+    la cortan; en vez de recorrer las filas una por una, todas las
+    intersecciones se generan de una vez y se ordenan por (polígono, fila, x).
+    Un píxel x de la fila queda dentro entre dos cortes xa <= x < xb.
+
+    Args:
+        vx, vy: Matrices (n, k) con las coordenadas enteras de los k vértices
+            de n polígonos (o vectores de un solo polígono)
+        regla: REGLA_PAR_IMPAR o REGLA_NO_CERO
+        etiquetas: Arreglo opcional con un valor por polígono
+        filas: Tupla opcional (desde, hasta): sólo se calculan los cortes de
+            las filas desde <= y < hasta. Cada fila conserva todas sus
+            aristas, así que sus tramos son los mismos que sin recortar.
+
+    Returns:
+        Matriz (m, 3) de tramos, a lo sumo uno por cada par de cortes; con
+        etiquetas, tupla (tramos, etiqueta del polígono de cada tramo).
+    """
+    if regla not in (REGLA_PAR_IMPAR, REGLA_NO_CERO):
+        raise ValueError(f"Regla de relleno desconocida: {regla}")
+    vx = np.atleast_2d(np.asarray(vx, dtype=np.intp))
+    vy = np.atleast_2d(np.asarray(vy, dtype=np.intp))
+    x0, y0 = vx.ravel(), vy.ravel()
+    x1, y1 = np.roll(vx, -1, axis=1).ravel(), np.roll(vy, -1, axis=1).ravel()
+    poligono = np.repeat(np.arange(vx.shape[0]), vx.shape[1])
+
+    # Tabla de aristas: se descartan las horizontales y se orienta cada una hacia abajo
+    sentido = np.sign(y1 - y0)
+    validas = sentido != 0
+    x0, y0, x1, y1 = x0[validas], y0[validas], x1[validas], y1[validas]
+    sentido, poligono = sentido[validas], poligono[validas]
+    abajo = sentido < 0
+    x0, x1 = np.where(abajo, x1, x0), np.where(abajo, x0, x1)
+    y0, y1 = np.where(abajo, y1, y0), np.where(abajo, y0, y1)
+
+    alto = y1 - y0
+    primera, cubiertas = y0, alto
+    if filas is not None:
+        primera = np.clip(y0, filas[0], filas[1])
+        cubiertas = np.clip(y1, filas[0], filas[1]) - primera
+    total = int(cubiertas.sum())
+    if total == 0:
+        vacios = np.empty((0, 3), dtype=np.intp)
+        return vacios if etiquetas is None else (vacios, np.asarray(etiquetas)[:0])
+
+    # Un corte por arista y fila cubierta
+    arista = np.repeat(np.arange(len(alto)), cubiertas)
+    y = np.repeat(primera, cubiertas) + np.arange(total) - np.repeat(np.cumsum(cubiertas) - cubiertas, cubiertas)
+    dx, dy = (x1 - x0)[arista], alto[arista]
+    numerador = (y - y0[arista]) * dx
+    x = x0[arista] + numerador / dy
+    # ceil(x) exacto con enteros: el primer píxel con x >= corte
+    x_techo = x0[arista] - (-numerador // dy)
+
+    orden = np.lexsort((x, y, poligono[arista]))
+    y, x_techo, sentido = y[orden], x_techo[orden], sentido[arista][orden]
+    poligono = poligono[arista][orden]
+
+    if regla == REGLA_PAR_IMPAR:
+        # Cada fila de un polígono cerrado tiene un número par de cortes
+        filas, entra, sale = y[0::2], x_techo[0::2], x_techo[1::2]
+        poligono = poligono[0::2]
+    else:
+        # El número de vueltas vuelve a cero al final de cada fila, así que
+        # una sola suma acumulada sirve para todas
+        vueltas = np.cumsum(sentido)
+        antes = vueltas - sentido
+        abre = (antes == 0) & (vueltas != 0)
+        cierra = (vueltas == 0) & (antes != 0)
+        filas, entra, sale = y[abre], x_techo[abre], x_techo[cierra]
+        poligono = poligono[abre]
+
+    llenos = sale > entra
+    spans = np.stack([filas[llenos], entra[llenos], sale[llenos] - 1], axis=1)
+    return spans if etiquetas is None else (spans, np.asarray(etiquetas)[poligono[llenos]])
+
+def filled_polygon(screen, vertices, color, regla=REGLA_PAR_IMPAR):
+    """
+    Dibuja un polígono RELLENO, cóncavo o que se corta a sí mismo, por líneas
+    de barrido con tabla de aristas.
+    
+    Todos los tramos se escriben juntos con fill_spans, así que el costo
+    crece con el área rellena y no con el número de filas.
+    
+    Args:
+        screen: Superficie de pygame donde se dibujará.
+        vertices: Lista de tuplas (x,y) enteras con los vértices.
+        color: Color del relleno en formato RGB.
+        regla: REGLA_PAR_IMPAR o REGLA_NO_CERO para decidir qué está dentro.
+    
+    Returns:
+        pygame.Rect con la zona de la superficie que se modificó.
+    """
+    vertices = np.asarray(vertices, dtype=np.intp).reshape(-1, 2)
+    clip = screen.get_clip()
+    spans = _spans_poligonos(vertices[:, 0], vertices[:, 1], regla, filas=(clip.top, clip.bottom))
+    if not len(spans):
+        return _area_tocada(screen, 0, 0, 0, 0)
+
+    fill_spans(screen, spans, color)
+
+    x_min, y_min = int(spans[:, 1].min()), int(spans[:, 0].min())
+    ancho = int(spans[:, 2].max()) - x_min + 1
+    alto = int(spans[:, 0].max()) - y_min + 1
+    return _area_tocada(screen, x_min, y_min, ancho, alto)
+
+def filled_triangle(screen, vertices, color):
+    """
+    Dibuja un triángulo RELLENO con el mismo relleno por líneas de barrido
+    que filled_polygon.
+    
+    Args:
+        screen: Superficie de pygame donde se dibujará.
+        vertices: Lista de 3 tuplas (x,y) que representan los vértices.
+        color: Color del triángulo en formato RGB.
+    
+    Returns:
+        pygame.Rect con la zona de la superficie que se modificó.
+    """
+    return filled_polygon(screen, vertices, color)
+
+# Relleno por inundación (balde) ---------------
+def _byte_del_canal(corrimiento):
+    """Posición en memoria del byte de un canal de 8 bits, según el orden de bytes de la máquina."""
+    return corrimiento // 8 if sys.byteorder == "little" else 3 - corrimiento // 8
+
+def _parecidos(screen, rect, semilla, tolerancia):
+    """
+    Máscara (alto, ancho) de los píxeles de la zona rect cuyo color se
+    parece al valor de píxel semilla: iguales con tolerancia 0, o con cada
+    canal a no más de tolerancia.
+    """
+    # Filas primero, comparando los valores enteros de los píxeles
+    pixeles, ox, oy = _pixeles(screen)
+    pixeles = pixeles[rect.left - ox:rect.right - ox, rect.top - oy:rect.bottom - oy].T
+    alto, ancho = pixeles.shape
+    mascaras = screen.get_masks()[:3]
+    if tolerancia <= 0:
+        rgb = mascaras[0] | mascaras[1] | mascaras[2]
+        parecidos = (pixeles & rgb) == (semilla & rgb)
+    else:
+        # Cada canal se lee como bytes y se compara con una tabla de 256 entradas
+        bytes_ = pixeles.view(np.uint8).reshape(alto, ancho, screen.get_bytesize())
+        parecidos = np.ones((alto, ancho), dtype=np.bool_)
+        for mascara, corrimiento in zip(mascaras, screen.get_shifts()):
+            valor = (semilla & mascara) >> corrimiento
+            tabla = np.abs(np.arange(256) - valor) <= tolerancia
+            parecidos &= tabla[bytes_[:, :, _byte_del_canal(corrimiento)]]
+        del bytes_
+    del pixeles  # Libera el bloqueo de la superficie
+    return parecidos
+
+class _Corridas:
+    """
+    Corridas horizontales de píxeles parecidos de una máscara, y cuáles
+    alcanzó ya el relleno.
+
+    Las corridas quedan ordenadas por fila y luego por x; primera[f] es la
+    primera de la fila f. alcanzar() las recorre con una cola de tramos y
+    se puede llamar varias veces con semillas nuevas (cuando el relleno
+    llega desde otra tesela): las ya alcanzadas no se vuelven a visitar.
+    """
+
+    def __init__(self, parecidos):
+        alto, ancho = parecidos.shape
+        self.alto, self.ancho = alto, ancho
+        libre = np.zeros((alto, ancho + 2), dtype=np.int8)  # Con un borde bloqueado a cada lado
+        libre[:, 1:-1] = parecidos
+
+        bordes = np.diff(libre, axis=1).ravel()
+        cambios = np.flatnonzero(bordes)
+        abre = bordes[cambios] == 1
+        filas, x_inicio = np.divmod(cambios[abre], ancho + 1)
+        x_fin = cambios[~abre] % (ancho + 1)
+        self.primera = np.searchsorted(filas, np.arange(alto + 1)).tolist()
+        self.filas, self.x_inicio, self.x_fin = filas.tolist(), x_inicio.tolist(), x_fin.tolist()
+        self.alcanzada = bytearray(len(self.filas))
+
+    def _solapadas(self, fila, x0, x1):
+        """Corridas de la fila que se solapan con [x0, x1), de derecha a izquierda."""
+        # Desde la última que empieza antes de x1 hacia atrás mientras terminen después de x0
+        inicio = self.primera[fila]
+        j = bisect_right(self.x_inicio, x1 - 1, inicio, self.primera[fila + 1]) - 1
+        while j >= inicio and self.x_fin[j] > x0:
+            yield j
+            j -= 1
+
+    def alcanzar(self, semillas):
+        """
+        Extiende el relleno desde las corridas que tocan los tramos semillas.
+
+        Args:
+            semillas: Tramos (fila, x0, x1), x1 excluido
+
+        Returns:
+            Índices de las corridas alcanzadas por primera vez.
+        """
+        alcanzada = self.alcanzada
+        nuevas = []
+        for fila, x0, x1 in semillas:
+            for j in self._solapadas(fila, x0, x1):
+                if not alcanzada[j]:
+                    alcanzada[j] = 1
+                    nuevas.append(j)
+        pendientes = list(nuevas)
+        while pendientes:
+            k = pendientes.pop()
+            fy, x0, x1 = self.filas[k], self.x_inicio[k], self.x_fin[k]
+            for vy in (fy - 1, fy + 1):
+                if 0 <= vy < self.alto:
+                    for j in self._solapadas(vy, x0, x1):
+                        if not alcanzada[j]:
+                            alcanzada[j] = 1
+                            pendientes.append(j)
+                            nuevas.append(j)
+        return nuevas
+
+    def tramos(self, dx=0, dy=0):
+        """Tramos (y, x_inicio, x_fin) de las corridas alcanzadas, extremos incluidos, corridos en (dx, dy)."""
+        elegidas = np.frombuffer(bytes(self.alcanzada), dtype=np.bool_)
+        return np.stack([
+            np.asarray(self.filas, dtype=np.intp)[elegidas] + dy,
+            np.asarray(self.x_inicio, dtype=np.intp)[elegidas] + dx,
+            np.asarray(self.x_fin, dtype=np.intp)[elegidas] + dx - 1,
+        ], axis=1)
+
+def _caja_tramos(spans):
+    """pygame.Rect que cubre unos tramos (y, x_inicio, x_fin) no vacíos."""
+    x_min, y_min = int(spans[:, 1].min()), int(spans[:, 0].min())
+    return pygame.Rect(x_min, y_min, int(spans[:, 2].max()) - x_min + 1, int(spans[:, 0].max()) - y_min + 1)
+
+def flood_fill(screen, x, y, color, tolerancia=0):
+    """
+    Rellena la región conexa (4 vecinos) de colores parecidos al del punto
+    (x, y), como el balde de pintura.
+    
+    Rellena por tramos, no píxel por píxel: primero se calculan con NumPy
+    todas las corridas horizontales de píxeles parecidos, y luego una cola
+    de tramos pasa de cada corrida a las que la tocan en las filas de arriba
+    y de abajo. Al final los tramos alcanzados se escriben con fill_spans.
+    
+    Args:
+        screen: Superficie de pygame donde se dibujará.
+        x, y: Punto de partida.
+        color: Color del relleno en formato RGB.
+        tolerancia: Diferencia máxima por canal (0 a 255) con el color del
+            punto de partida para que un píxel se rellene.
+    
+    Returns:
+        pygame.Rect con la zona de la superficie que se modificó.
+    """
+    clip = screen.get_clip()
+    if not clip.collidepoint(x, y):
+        return _area_tocada(screen, x, y, 0, 0)
+
+    corridas = _Corridas(_parecidos(screen, clip, screen.get_at_mapped((x, y)), tolerancia))
+    corridas.alcanzar([(y - clip.top, x - clip.left, x - clip.left + 1)])
+    spans = corridas.tramos(clip.left, clip.top)
+    fill_spans(screen, spans, color)
+    return _caja_tramos(spans)
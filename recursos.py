@@ -0,0 +1,123 @@
+# Caché de imágenes y fuentes del programa de dibujo
+# Cada recurso se decodifica una sola vez por (ruta, tamaño) y lo comparten
+# todos los botones que lo usan. Los iconos pueden decodificarse en un hilo
+# aparte para que la ventana aparezca sin esperar a los archivos.
+
+import threading
+import time
+
+import pygame
+
+_imagenes = {}      # (ruta, tamaño) -> Surface ya escalada
+_fuentes = {}       # (nombre, tamaño) -> Font
+_pendientes = {}    # (ruta, tamaño) -> Surface decodificada en segundo plano, aún sin convertir
+_candado = threading.Lock()
+_hilo = None
+
+# Tiempo acumulado en segundos por etapa, para el informe de arranque
+tiempos = {}
+
+# Evento que se publica cuando el hilo termina de decodificar iconos
+ICONOS_LISTOS = pygame.event.custom_type()
+
+
+def _medir(etapa, inicio):
+    tiempos[etapa] = tiempos.get(etapa, 0.0) + time.perf_counter() - inicio
+
+
+def _decodificar(ruta, tamano):
+    """Lee y escala una imagen; no toca la ventana, así que sirve en cualquier hilo."""
+    return pygame.transform.scale(pygame.image.load(ruta), tamano)
+
+
+def _preparar(superficie):
+    """Pasa la superficie al formato de la ventana, si hay una abierta."""
+    if pygame.display.get_surface():
+        if superficie.get_flags() & pygame.SRCALPHA:
+            return superficie.convert_alpha()
+        return superficie.convert()
+    return superficie
+
+
+def imagen(ruta, tamano):
+    """
+    Retorna la imagen de ruta escalada a tamano, decodificándola sólo la primera vez.
+
+    Args:
+        ruta: Archivo de la imagen
+        tamano: Tupla (ancho, alto)
+
+    Returns:
+        pygame.Surface compartida; no se debe modificar.
+    """
+    clave = (ruta, tuple(tamano))
+    superficie = imagen_lista(ruta, tamano)
+    if superficie is None:
+        inicio = time.perf_counter()
+        superficie = _preparar(_decodificar(ruta, clave[1]))
+        _imagenes[clave] = superficie
+        _medir("imagenes", inicio)
+    return superficie
+
+
+def imagen_lista(ruta, tamano):
+    """Retorna la imagen si ya está decodificada (también en segundo plano), o None."""
+    clave = (ruta, tuple(tamano))
+    superficie = _imagenes.get(clave)
+    if superficie is None:
+        with _candado:
+            superficie = _pendientes.pop(clave, None)
+        if superficie is not None:
+            superficie = _imagenes[clave] = _preparar(superficie)
+    return superficie
+
+
+def precargar(pedidos):
+    """
+    Decodifica imágenes en un hilo aparte.
+
+    Al terminar publica un evento ICONOS_LISTOS; hasta entonces imagen_lista()
+    retorna None para las que falten y los botones muestran su marcador.
+
+    Args:
+        pedidos: Iterable de pares (ruta, tamaño)
+    """
+    global _hilo
+    pedidos = [(ruta, tuple(tamano)) for ruta, tamano in pedidos if (ruta, tuple(tamano)) not in _imagenes]
+
+    def trabajar():
+        inicio = time.perf_counter()
+        for clave in pedidos:
+            superficie = _decodificar(*clave)
+            with _candado:
+                _pendientes[clave] = superficie
+        _medir("imagenes (segundo plano)", inicio)
+        if pygame.display.get_init():
+            pygame.event.post(pygame.event.Event(ICONOS_LISTOS))
+
+    _hilo = threading.Thread(target=trabajar, name="precarga-iconos", daemon=True)
+    _hilo.start()
+
+
+def esperar_precarga():
+    """Espera a que termine la decodificación en segundo plano, si hay una en curso."""
+    if _hilo is not None:
+        _hilo.join()
+
+
+def fuente(nombre=None, tamano=36):
+    """Retorna una fuente compartida; nombre None es la fuente por defecto de pygame."""
+    clave = (nombre, tamano)
+    if clave not in _fuentes:
+        inicio = time.perf_counter()
+        _fuentes[clave] = pygame.font.Font(nombre, tamano)
+        _medir("fuentes", inicio)
+    return _fuentes[clave]
+
+
+def vaciar():
+    """Olvida los recursos cargados (por ejemplo, tras cambiar de ventana)."""
+    esperar_precarga()
+    _imagenes.clear()
+    _fuentes.clear()
+    _pendientes.clear()
@@ -0,0 +1,254 @@
+# Renderizado sin ventana del programa de dibujo
+# Lee una lista de figuras desde JSON o CSV y la dibuja en una superficie fuera
+# de pantalla, para guardarla como PNG o usarla como arreglo de NumPy.
+#
+# Uso:
+#   python renderizador.py figuras.json [otras.csv ...] [-o salida]
+#   python renderizador.py cartel.json --procesos 4    # por teselas, para imágenes grandes
+#   python renderizador.py figuras.csv -o figuras.svg   # a SVG, sin rasterizar
+#
+# JSON: una lista de figuras, o un objeto {"ancho", "alto", "fondo", "figuras"}.
+# Cada figura es {"tipo": "circulo", "xc": 100, "yc": 80, "r": 30, "color": [255, 0, 0]}
+# o bien {"tipo": "circulo", "parametros": [100, 80, 30]}; el color por defecto es negro.
+#
+# CSV: una figura por fila con las columnas tipo, rojo, verde, azul y los
+# parámetros en el orden de escena.PARAMETROS. Se ignoran las filas vacías,
+# las que empiezan con '#' y una cabecera cuya primera celda sea "tipo".
+#
+# SVG: los que escribe el graficador (ver vectorial.py) y figuras simples de otros.
+
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+
+import numpy as np
+import pygame
+
+import primitivas as prim
+from escena import Escena, FIGURA, PARAMETROS, TIPOS
+from mosaico import Mosaico
+from vectorial import escribir_svg, leer_svg
+
+TAMANO = (1020, 650)
+FONDO = (255, 255, 255)
+LADO_TESELA = 1024  # Teselas grandes: cada figura se repite en menos teselas
+_LIMITES = np.iinfo(FIGURA["parametros"].base)  # Rango de los parámetros guardados en la escena
+
+
+def _agregar(escena, nombre, parametros, color, origen):
+    """Añade una figura leída de un archivo, con un error claro si está mal formada."""
+    if nombre not in TIPOS:
+        raise ValueError(f"{origen}: tipo de figura desconocido '{nombre}'")
+    tipo = TIPOS[nombre]
+    if not isinstance(parametros, (list, tuple)) or len(parametros) != len(PARAMETROS[tipo]):
+        raise ValueError(f"{origen}: '{nombre}' necesita los parámetros {', '.join(PARAMETROS[tipo])}")
+    enteros = []
+    for clave, valor in zip(PARAMETROS[tipo], parametros):
+        try:
+            numero = float(valor)
+        except (TypeError, ValueError):
+            raise ValueError(f"{origen}: el parámetro {clave} no es un número: {valor!r}") from None
+        if not math.isfinite(numero) or not _LIMITES.min <= round(numero) <= _LIMITES.max:
+            raise ValueError(f"{origen}: el parámetro {clave} está fuera de rango: {valor!r}")
+        enteros.append(int(round(numero)))
+    if not isinstance(color, (list, tuple)) or len(color) != 3:
+        raise ValueError(f"{origen}: el color debe tener tres componentes (rojo, verde, azul)")
+    componentes = []
+    for valor in color:
+        try:
+            componente = int(valor)
+        except (TypeError, ValueError):
+            raise ValueError(f"{origen}: componente de color no válida: {valor!r}") from None
+        if not 0 <= componente <= 255:
+            raise ValueError(f"{origen}: las componentes del color van de 0 a 255, no {valor!r}")
+        componentes.append(componente)
+    escena.agregar(tipo, enteros, tuple(componentes))
+
+
+def figuras_desde_json(datos):
+    """
+    Construye una escena a partir de datos JSON ya decodificados.
+
+    Args:
+        datos: Lista de figuras u objeto con la clave "figuras"
+
+    Returns:
+        Tupla (escena, opciones) donde opciones tiene "ancho", "alto" y "fondo"
+        si el objeto los indicaba.
+    """
+    opciones = {}
+    if isinstance(datos, dict):
+        opciones = {clave: datos[clave] for clave in ("ancho", "alto", "fondo") if clave in datos}
+        datos = datos.get("figuras", [])
+    if not isinstance(datos, list):
+        raise ValueError("se esperaba una lista de figuras")
+
+    escena = Escena(max(len(datos), 1))
+    for i, figura in enumerate(datos):
+        if not isinstance(figura, dict):
+            raise ValueError(f"figura {i}: se esperaba un objeto con 'tipo' y sus parámetros")
+        nombre = figura.get("tipo")
+        if "parametros" in figura:
+            parametros = figura["parametros"]
+        else:
+            nombres = PARAMETROS.get(TIPOS.get(nombre), ())
+            faltan = [n for n in nombres if n not in figura]
+            if faltan:
+                raise ValueError(f"figura {i}: faltan los parámetros {', '.join(faltan)}")
+            parametros = [figura[n] for n in nombres]
+        _agregar(escena, nombre, parametros, figura.get("color", (0, 0, 0)), f"figura {i}")
+    return escena, opciones
+
+
+def figuras_desde_csv(filas):
+    """
+    Construye una escena a partir de filas CSV (cualquier iterable de líneas).
+
+    Returns:
+        Tupla (escena, opciones) con opciones siempre vacío.
+    """
+    escena = Escena()
+    for numero, fila in enumerate(csv.reader(filas), start=1):
+        fila = [celda.strip() for celda in fila]
+        if not fila or not fila[0] or fila[0].startswith("#") or (numero == 1 and fila[0] == "tipo"):
+            continue
+        if len(fila) < 4:
+            raise ValueError(f"fila {numero}: se esperaba tipo, rojo, verde, azul y parámetros")
+        parametros = [celda for celda in fila[4:] if celda]
+        _agregar(escena, fila[0], parametros, fila[1:4], f"fila {numero}")
+    return escena, {}
+
+
+def leer_figuras(ruta):
+    """Lee un archivo .json, .csv o .svg de figuras; retorna (escena, opciones)."""
+    if ruta.lower().endswith(".svg"):
+        return leer_svg(ruta)
+    with open(ruta, newline="", encoding="utf-8") as archivo:
+        if ruta.lower().endswith(".csv"):
+            return figuras_desde_csv(archivo)
+        return figuras_desde_json(json.load(archivo))
+
+
+def renderizar_escena(escena, tamano=TAMANO, fondo=FONDO):
+    """
+    Dibuja una escena en una superficie nueva fuera de pantalla.
+
+    Args:
+        escena: Escena con las figuras a dibujar
+        tamano: Tupla (ancho, alto) de la imagen
+        fondo: Color de fondo en formato RGB
+
+    Returns:
+        pygame.Surface de 32 bits con el dibujo.
+    """
+    superficie = pygame.Surface(tamano, 0, 32)
+    escena.renderizar(superficie, tuple(fondo))
+    return superficie
+
+
+def renderizar_mosaico(escena, tamano=TAMANO, fondo=FONDO, procesos=None):
+    """
+    Dibuja una escena por teselas, repartidas entre varios procesos.
+
+    Args:
+        escena: Escena con las figuras a dibujar
+        tamano: Tupla (ancho, alto) de la imagen
+        fondo: Color de fondo en formato RGB
+        procesos: Procesos del pool; None elige según los núcleos
+
+    Returns:
+        Mosaico con el dibujo; se guarda con guardar_png() sin armar la imagen entera.
+    """
+    mosaico = Mosaico(*tamano, lado=LADO_TESELA, fondo=fondo)
+    mosaico.rasterizar(escena, procesos)
+    return mosaico
+
+
+def a_arreglo(superficie):
+    """Copia la superficie a un arreglo de NumPy (alto, ancho, 3) en RGB."""
+    return np.ascontiguousarray(pygame.surfarray.array3d(superficie).swapaxes(0, 1))
+
+
+def _destinos(entradas, carpeta=None):
+    """
+    Ruta del .png de cada entrada: junto a ella o en carpeta, con su nombre.
+
+    Si dos entradas darían el mismo archivo (figuras.json y figuras.csv) se
+    conserva la extensión en el nombre (figuras.json.png); las que aun así
+    coinciden se informan como error antes de dibujar nada.
+    """
+    def ruta(entrada, nombre):
+        return os.path.normpath(os.path.join(carpeta or os.path.dirname(entrada), nombre + ".png"))
+
+    destinos = [ruta(entrada, os.path.splitext(os.path.basename(entrada))[0]) for entrada in entradas]
+    repetidas = {destino for destino in destinos if destinos.count(destino) > 1}
+    destinos = [ruta(entrada, os.path.basename(entrada)) if destino in repetidas else destino
+                for entrada, destino in zip(entradas, destinos)]
+    repetidas = sorted({destino for destino in destinos if destinos.count(destino) > 1})
+    if repetidas:
+        raise ValueError(f"varias entradas se guardarían en {', '.join(repetidas)}")
+    return destinos
+
+
+def main(argv=None):
+    """Punto de entrada de la línea de comandos; retorna el código de salida."""
+    parser = argparse.ArgumentParser(description="Renderiza listas de figuras a PNG sin abrir ventana.")
+    parser.add_argument("entradas", nargs="+", help="archivos .json, .csv o .svg con figuras")
+    parser.add_argument("-o", "--salida",
+                        help="archivo .png o .svg (con una sola entrada) o carpeta de salida; "
+                             "por defecto, un .png junto a cada entrada")
+    parser.add_argument("--ancho", type=int, help=f"ancho de la imagen (por defecto {TAMANO[0]})")
+    parser.add_argument("--alto", type=int, help=f"alto de la imagen (por defecto {TAMANO[1]})")
+    parser.add_argument("--procesos", type=int, metavar="N",
+                        help="dibuja por teselas en N procesos (0: según los núcleos); "
+                             "para imágenes grandes, que nunca se arman enteras en memoria")
+    parser.add_argument("--suavizado", action="store_true",
+                        help="dibuja líneas, círculos y curvas con bordes suavizados")
+    args = parser.parse_args(argv)
+    prim.usar_suavizado(args.suavizado)
+
+    una_imagen = args.salida and args.salida.lower().endswith((".png", ".svg"))
+    if una_imagen and len(args.entradas) > 1:
+        parser.error("con varias entradas --salida debe ser una carpeta")
+
+    if una_imagen:
+        destinos = [args.salida]
+    else:
+        try:
+            destinos = _destinos(args.entradas, args.salida)
+        except ValueError as error:
+            parser.error(str(error))
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.init()
+
+    errores = 0
+    for entrada, destino in zip(args.entradas, destinos):
+        try:
+            escena, opciones = leer_figuras(entrada)
+        except (OSError, ValueError) as error:
+            print(f"{entrada}: {error}", file=sys.stderr)
+            errores += 1
+            continue
+
+        tamano = (args.ancho or opciones.get("ancho", TAMANO[0]),
+                  args.alto or opciones.get("alto", TAMANO[1]))
+        fondo = opciones.get("fondo", FONDO)
+        if not una_imagen and os.path.dirname(destino):
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+        if destino.lower().endswith(".svg"):
+            escribir_svg(destino, escena, *tamano, fondo)
+        elif args.procesos is not None:
+            renderizar_mosaico(escena, tamano, fondo, args.procesos or None).guardar_png(destino)
+        else:
+            pygame.image.save(renderizar_escena(escena, tamano, fondo), destino)
+
+    pygame.quit()
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+# Reproducción sin ventana de sesiones grabadas del programa de dibujo
+# Pasa los eventos guardados con "graficador.py --grabar" por la misma lógica
+# de la ventana (Graficador.procesar) tan rápido como se pueda, sin esperar
+# al ritmo de 60 FPS, y mide cuánto tarda cada herramienta.
+#
+# Uso:
+#   python reproductor.py sesion.jsonl [-o informe.json] [--hash ESPERADO] [--verboso]
+#
+# La sesión se reproduce con las opciones grabadas en su cabecera (tamaño del
+# documento, tolerancia, suavizado y dibujo abierto); el dibujo se abre pero
+# nunca se sobrescribe.
+#
+# Sirve como prueba de rendimiento: el hash del lienzo final debe coincidir
+# entre corridas y los tiempos se pueden comparar con versiones anteriores.
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+
+import pygame
+
+import primitivas as prim
+from graficador import Graficador
+from sesion import leer_sesion
+
+TAMANO = (1020, 650)
+
+log = logging.getLogger(__name__)
+
+
+def huella_lienzo(superficie):
+    """SHA-256 de los píxeles RGB de la superficie."""
+    return hashlib.sha256(pygame.image.tobytes(superficie, "RGB")).hexdigest()
+
+
+def _percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(p * len(ordenados)))]
+
+
+def _abrir_graficador(opciones):
+    """Graficador fuera de pantalla configurado como en la grabación."""
+    documento = opciones.get("documento")
+    app = Graficador(pygame.Surface(TAMANO, 0, 32), tolerancia=opciones.get("tolerancia", 0),
+                     documento=tuple(documento) if documento else None)
+    archivo = opciones.get("archivo")
+    if archivo and os.path.exists(archivo):
+        # Sin app.archivo, Ctrl+S en la sesión no pisa el dibujo
+        app.abrir(archivo)
+    elif archivo:
+        log.warning("No existe %s; la sesión se reproduce sobre un dibujo vacío", archivo)
+    return app
+
+
+def reproducir(vueltas, opciones=None):
+    """
+    Reproduce una sesión sobre un Graficador fuera de pantalla.
+
+    Cada vuelta se atribuye a la herramienta activa cuando confirma una figura
+    (suelta el botón del mouse) o a su vista previa cuando sólo arrastra.
+
+    Args:
+        vueltas: Lista de listas de eventos, como la que retorna leer_sesion
+        opciones: Diccionario de opciones de la grabación, como el que retorna leer_sesion
+
+    Returns:
+        Diccionario con el tiempo total, las latencias por herramienta y el
+        hash del lienzo final.
+    """
+    opciones = opciones or {}
+    anterior = prim.SUAVIZADO
+    prim.usar_suavizado(bool(opciones.get("suavizado", False)))
+    try:
+        return _reproducir(_abrir_graficador(opciones), vueltas)
+    finally:
+        prim.usar_suavizado(anterior)
+
+
+def _reproducir(app, vueltas):
+    app.dibujar_paneles(app.screen)
+    tiempos = {}
+    eventos = 0
+
+    total = time.perf_counter()
+    for vuelta in vueltas:
+        if not app.running:
+            break
+        arrastrando = app.arrastrando
+        antes = app.herramienta
+        t = time.perf_counter()
+        app.procesar(vuelta)
+        t = time.perf_counter() - t
+        eventos += len(vuelta)
+
+        tipos = {evento.type for evento in vuelta}
+        herramienta = app.herramienta or antes or "ninguna"  # vaciar se desactiva al usarse
+        if pygame.MOUSEBUTTONUP in tipos:
+            categoria = herramienta
+        elif arrastrando and pygame.MOUSEMOTION in tipos:
+            categoria = f"{herramienta} (vista previa)"
+        else:
+            categoria = "otros"
+        tiempos.setdefault(categoria, []).append(t)
+    total = time.perf_counter() - total
+
+    herramientas = {
+        nombre: {
+            "vueltas": len(valores),
+            "media_ms": 1000 * sum(valores) / len(valores),
+            "p95_ms": 1000 * _percentil(valores, 0.95),
+            "max_ms": 1000 * max(valores),
+        }
+        for nombre, valores in sorted(tiempos.items())
+    }
+    return {
+        "total_s": total,
+        "vueltas": len(vueltas),
+        "eventos": eventos,
+        "figuras": len(app.escena),
+        "herramientas": herramientas,
+        "hash": huella_lienzo(app.lienzo),
+    }
+
+
+def _resumen(informe):
+    lineas = [
+        f"{informe['vueltas']} vueltas, {informe['eventos']} eventos, "
+        f"{informe['figuras']} figuras en {informe['total_s']:.3f} s",
+        f"{'herramienta':<32}{'vueltas':>8}{'media ms':>10}{'p95 ms':>10}{'max ms':>10}",
+    ]
+    for nombre, datos in informe["herramientas"].items():
+        lineas.append(f"{nombre:<32}{datos['vueltas']:>8}{datos['media_ms']:>10.3f}"
+                      f"{datos['p95_ms']:>10.3f}{datos['max_ms']:>10.3f}")
+    lineas.append(f"lienzo final: {informe['hash']}")
+    return "\n".join(lineas)
+
+
+def _configurar_registro(nivel):
+    """Muestra en la salida estándar los mensajes del nivel dado o más graves, antes del informe."""
+    salida = logging.StreamHandler(sys.stdout)
+    salida.setFormatter(logging.Formatter("%(message)s"))
+    raiz = logging.getLogger()
+    raiz.setLevel(nivel)
+    raiz.addHandler(salida)
+
+
+def main(argv=None):
+    """Punto de entrada de la línea de comandos; retorna el código de salida."""
+    parser = argparse.ArgumentParser(description="Reproduce sin ventana una sesión grabada del graficador.")
+    parser.add_argument("sesion", help="archivo JSONL grabado con graficador.py --grabar")
+    parser.add_argument("-o", "--salida", help="guarda el informe en un archivo JSON")
+    parser.add_argument("--hash", help="hash esperado del lienzo final; si no coincide retorna 1")
+    parser.add_argument("--verboso", action="store_true",
+                        help="muestra los mensajes informativos del graficador (por defecto sólo advertencias y errores)")
+    args = parser.parse_args(argv)
+    _configurar_registro(logging.INFO if args.verboso else logging.WARNING)
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.init()
+
+    try:
+        vueltas, opciones = leer_sesion(args.sesion)
+        informe = reproducir(vueltas, opciones)
+    except (OSError, ValueError, pygame.error) as error:
+        print(error, file=sys.stderr)
+        return 1
+
+    print(_resumen(informe))
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as archivo:
+            json.dump(informe, archivo, indent=2)
+
+    pygame.quit()
+    if args.hash and args.hash != informe["hash"]:
+        print(f"el lienzo final no coincide: se esperaba {args.hash}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+# Selección de figuras del programa de dibujo
+# Un índice espacial (una rejilla uniforme sobre las cajas envolventes)
+# encuentra las figuras bajo un punto o dentro de un rectángulo sin recorrer
+# toda la escena, y unas pocas matrices 3x3 describen cómo mover, escalar,
+# rotar o reflejar las figuras elegidas; escena.transformar_afin las aplica.
+
+import math
+
+import numpy as np
+import pygame
+
+from escena import RELLENO, _ultima_figura, cajas_figuras
+
+CELDA = 64        # Lado de las celdas de la rejilla, en píxeles del documento
+MAX_CELDAS = 64   # Las figuras que tocan más celdas que esto se prueban aparte
+_FILA = 1 << 27   # Separa las filas en la clave de cada celda
+_ORIGEN = 1 << 26  # Corrimiento que deja positivas las columnas y filas negativas
+
+COLOR_SELECCION = (0, 120, 215)
+MAX_CAJAS_VISIBLES = 256  # Con más figuras elegidas sólo se dibuja la caja de todas
+
+
+def _clave(cx, cy):
+    return (cy + _ORIGEN) * _FILA + cx + _ORIGEN
+
+
+class IndiceFiguras:
+    """
+    Rejilla uniforme sobre las cajas envolventes de las figuras de una escena.
+
+    Es la idea de IndiceBotones guardada en arreglos: un par (celda, figura)
+    por cada celda que toca cada caja, ordenados por celda, así que las
+    figuras de una fila de celdas seguidas son un tramo del arreglo y una
+    consulta hace una búsqueda binaria por fila. Las figuras que tocan más
+    de MAX_CELDAS celdas no se reparten y se prueban en todas las consultas.
+
+    El índice se rehace entero, vectorizado, la primera vez que se consulta
+    después de un cambio en la escena (según Escena.version).
+    """
+
+    def __init__(self, escena, celda=CELDA):
+        """
+        Constructor de la clase IndiceFiguras
+        :param escena: Escena cuyas figuras se indexan
+        :param celda: lado de las celdas de la rejilla en píxeles del documento
+        """
+        self.escena = escena
+        self.celda = celda
+        self.version = None
+        self.cajas = np.empty((0, 4), dtype=np.int64)
+
+    def actualizar(self):
+        """Rehace el índice si la escena cambió desde la última vez."""
+        escena = self.escena
+        if self.version == escena.version:
+            return
+        n = len(escena)
+        self.cajas = cajas_figuras(escena.tipos[:n], escena.parametros[:n])
+        c0 = self.cajas[:, :2] // self.celda
+        c1 = (self.cajas[:, 2:] - 1) // self.celda
+        ancho = np.maximum(c1[:, 0] - c0[:, 0] + 1, 0)
+        cuantas = ancho * np.maximum(c1[:, 1] - c0[:, 1] + 1, 0)
+
+        grandes = cuantas > MAX_CELDAS
+        self.grandes = np.flatnonzero(grandes)
+        cuantas[grandes] = 0
+        figura = np.repeat(np.arange(n), cuantas)
+        k = np.arange(len(figura)) - np.repeat(np.cumsum(cuantas) - cuantas, cuantas)
+        claves = _clave(c0[figura, 0] + k % ancho[figura], c0[figura, 1] + k // ancho[figura])
+        orden = np.argsort(claves, kind="stable")
+        self.claves = claves[orden]
+        self.figuras = figura[orden]
+        self.version = escena.version
+
+    def en_rect(self, rect):
+        """
+        Figuras cuya caja envolvente toca la zona rect del documento.
+
+        Returns:
+            Arreglo de índices de la escena, en orden creciente.
+        """
+        self.actualizar()
+        rect = pygame.Rect(rect)
+        if not rect:
+            return np.empty(0, dtype=np.intp)
+        cx0, cy0 = rect.left // self.celda, rect.top // self.celda
+        cx1, cy1 = (rect.right - 1) // self.celda, (rect.bottom - 1) // self.celda
+        filas = np.arange(cy0, cy1 + 1)
+        desde = np.searchsorted(self.claves, _clave(cx0, filas), "left")
+        hasta = np.searchsorted(self.claves, _clave(cx1, filas), "right")
+        candidatas = np.concatenate([self.grandes] + [self.figuras[i:j] for i, j in zip(desde, hasta) if j > i])
+        candidatas = np.unique(candidatas)
+        cajas = self.cajas[candidatas]
+        tocan = ((cajas[:, 0] < rect.right) & (cajas[:, 2] > rect.left)
+                 & (cajas[:, 1] < rect.bottom) & (cajas[:, 3] > rect.top))
+        return candidatas[tocan]
+
+    def contenidas(self, rect):
+        """Figuras cuya caja envolvente queda entera dentro de la zona rect (selección con marco)."""
+        indices = self.en_rect(rect)
+        cajas = self.cajas[indices]
+        rect = pygame.Rect(rect)
+        dentro = ((cajas[:, 0] >= rect.left) & (cajas[:, 2] <= rect.right)
+                  & (cajas[:, 1] >= rect.top) & (cajas[:, 3] <= rect.bottom))
+        return indices[dentro]
+
+    def en_punto(self, x, y, radio=2):
+        """
+        La figura de más arriba que pinta algún píxel a menos de radio del punto.
+
+        Las candidatas del índice se rasterizan sólo en ese cuadrado, con el
+        mismo cálculo que al dibujarlas, así que se elige lo que se ve y no
+        la caja envolvente. Los rellenos con balde no se eligen.
+
+        Returns:
+            Índice de la figura en la escena, o None.
+        """
+        zona = pygame.Rect(math.floor(x) - radio, math.floor(y) - radio, 2 * radio + 1, 2 * radio + 1)
+        candidatas = self.en_rect(zona)
+        escena = self.escena
+        candidatas = candidatas[escena.tipos[candidatas] != RELLENO]
+        if not len(candidatas):
+            return None
+        ultima = _ultima_figura(escena.tipos[candidatas], escena.parametros[candidatas], zona)
+        if ultima is None or ultima[2].max() < 0:
+            return None
+        return int(candidatas[ultima[2].max()])
+
+
+# Transformaciones: matrices 3x3 sobre coordenadas homogéneas (x, y, 1) ---------------
+def traslacion(dx, dy):
+    return np.array([[1, 0, dx], [0, 1, dy], [0, 0, 1]], dtype=np.float64)
+
+
+def _alrededor(matriz, centro):
+    """La matriz aplicada con centro como origen."""
+    return traslacion(*centro) @ matriz @ traslacion(-centro[0], -centro[1])
+
+
+def escalado(sx, sy=None, centro=(0, 0)):
+    """Escala por sx en x y sy en y (por defecto sx) dejando fijo el centro."""
+    sy = sx if sy is None else sy
+    return _alrededor(np.diag([sx, sy, 1.0]), centro)
+
+
+def rotacion(grados, centro=(0, 0)):
+    """Rota grados en sentido horario en pantalla (y hacia abajo) alrededor del centro."""
+    angulo = math.radians(grados)
+    c, s = math.cos(angulo), math.sin(angulo)
+    if grados % 90 == 0:
+        c, s = round(c), round(s)  # Exactos, para que los ejes sigan en los ejes
+    return _alrededor(np.array([[c, -s, 0], [s, c, 0], [0, 0, 1]], dtype=np.float64), centro)
+
+
+def reflexion(horizontal=True, centro=(0, 0)):
+    """Refleja de izquierda a derecha (horizontal) o de arriba abajo, alrededor del centro."""
+    return escalado(-1, 1, centro) if horizontal else escalado(1, -1, centro)
+
+
+def caja_total(cajas):
+    """pygame.Rect que contiene todas las cajas (x0, y0, x1, y1) dadas."""
+    x0, y0 = cajas[:, :2].min(axis=0).tolist()
+    x1, y1 = cajas[:, 2:].max(axis=0).tolist()
+    return pygame.Rect(x0, y0, x1 - x0, y1 - y0)
+
+
+def dibujar_cajas(pantalla, vista, cajas, desplazamiento=(0, 0)):
+    """
+    Dibuja sobre la pantalla la caja de cada figura elegida (si no son más
+    de MAX_CAJAS_VISIBLES) y la que las contiene a todas.
+
+    Args:
+        pantalla: Superficie de la ventana
+        vista: Vista con la que se ve el documento
+        cajas: Matriz (n, 4) con las cajas en coordenadas del documento
+        desplazamiento: Corrimiento en píxeles de la ventana (al arrastrar)
+
+    Returns:
+        pygame.Rect con la zona de la pantalla tocada, o None.
+    """
+    if not len(cajas):
+        return None
+    anterior = pantalla.get_clip()
+    pantalla.set_clip(vista.area)
+    rects = [] if len(cajas) > MAX_CAJAS_VISIBLES else [pygame.Rect(x0, y0, x1 - x0, y1 - y0)
+                                                      for x0, y0, x1, y1 in cajas.tolist()]
+    tocada = None
+    for rect in rects + [caja_total(cajas)]:
+        x0, y0 = vista.punto_a_pantalla(rect.topleft)
+        x1, y1 = vista.punto_a_pantalla(rect.bottomright)
+        rect = pygame.Rect(x0, y0, x1 - x0, y1 - y0).move(desplazamiento)
+        zona = pygame.draw.rect(pantalla, COLOR_SELECCION, rect, 1)
+        tocada = tocada.union(zona) if tocada else zona
+    pantalla.set_clip(anterior)
+    return tocada.clip(vista.area) if tocada else None
@@ -0,0 +1,139 @@
+# Grabación de sesiones del programa de dibujo
+# Guarda los eventos de cada vuelta del bucle principal en un archivo JSONL
+# (un evento por línea) para poder reproducirlos después sin ventana.
+#
+# Cada línea es {"f": vuelta, "t": milisegundos, "tipo": "MouseButtonDown", ...}
+# con los atributos del evento que se pueden guardar en JSON (pos, button, key, ...).
+# Los eventos propios del programa (pygame.event.custom_type) se guardan con
+# su nombre en EVENTOS_PROPIOS, porque su número depende del orden en que se
+# registraron.
+#
+# La primera línea, {"opciones": {...}}, guarda cómo se abrió el programa
+# (documento, tolerancia, suavizado y archivo) para reproducir la sesión con
+# la misma configuración. Los eventos cuyo tipo no se conoce al leer (de otra
+# versión de pygame, por ejemplo) se saltan con una advertencia.
+
+import json
+import logging
+from functools import lru_cache
+
+import pygame
+
+import recursos
+
+# Atributos de los eventos que interesan al graficador
+ATRIBUTOS = ("pos", "rel", "button", "buttons", "key", "mod", "unicode", "scancode", "x", "y")
+
+# Nombre con que se graba cada tipo de evento propio del programa
+EVENTOS_PROPIOS = {
+    "ICONOS_LISTOS": recursos.ICONOS_LISTOS,
+}
+_NOMBRES_PROPIOS = {tipo: nombre for nombre, tipo in EVENTOS_PROPIOS.items()}
+
+# Opciones de la línea de comandos que cambian lo que se dibuja
+OPCIONES = ("documento", "tolerancia", "suavizado", "archivo")
+
+log = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=1)
+def _tipos_pygame():
+    """Tipo de cada evento de pygame según su event_name ("AppTerminating" es pygame.APP_TERMINATING)."""
+    tipos = {}
+    for tipo in range(pygame.NUMEVENTS):
+        tipos.setdefault(pygame.event.event_name(tipo), tipo)
+    del tipos["Unknown"], tipos["UserEvent"]
+    return tipos
+
+
+def tipo_de_evento(nombre):
+    """Número del tipo de evento grabado con el nombre dado, o None si no se conoce."""
+    tipo = EVENTOS_PROPIOS.get(nombre)
+    return tipo if tipo is not None else _tipos_pygame().get(nombre)
+
+
+def evento_a_dict(evento):
+    """Convierte un evento de pygame en un diccionario serializable."""
+    datos = {"tipo": _NOMBRES_PROPIOS.get(evento.type) or pygame.event.event_name(evento.type)}
+    for nombre in ATRIBUTOS:
+        if hasattr(evento, nombre):
+            valor = getattr(evento, nombre)
+            datos[nombre] = list(valor) if isinstance(valor, tuple) else valor
+    return datos
+
+
+def dict_a_evento(datos):
+    """Reconstruye un evento de pygame a partir de un diccionario de evento_a_dict."""
+    nombre = datos["tipo"]
+    tipo = tipo_de_evento(nombre)
+    if tipo is None:
+        raise ValueError(f"tipo de evento desconocido '{nombre}'")
+    atributos = {
+        nombre: tuple(valor) if isinstance(valor, list) else valor
+        for nombre, valor in datos.items() if nombre in ATRIBUTOS
+    }
+    return pygame.event.Event(tipo, atributos)
+
+
+class Grabador:
+    """Escribe en un archivo JSONL los eventos de cada vuelta del bucle principal."""
+
+    def __init__(self, ruta, opciones=None):
+        """
+        Constructor de la clase Grabador
+        :param ruta: archivo donde se guardará la sesión
+        :param opciones: diccionario con las OPCIONES con que se abrió el programa
+        """
+        self.archivo = open(ruta, "w", encoding="utf-8")
+        if opciones is not None:
+            self.archivo.write(json.dumps({"opciones": opciones}, separators=(",", ":")) + "\n")
+        self.vuelta = 0
+        self.inicio = pygame.time.get_ticks()
+
+    def registrar(self, eventos):
+        """Guarda los eventos de una vuelta del bucle."""
+        t = pygame.time.get_ticks() - self.inicio
+        for evento in eventos:
+            datos = {"f": self.vuelta, "t": t, **evento_a_dict(evento)}
+            self.archivo.write(json.dumps(datos, separators=(",", ":")) + "\n")
+        self.vuelta += 1
+
+    def cerrar(self):
+        self.archivo.close()
+
+
+def leer_sesion(ruta):
+    """
+    Lee una sesión grabada.
+
+    Returns:
+        Tupla (vueltas, opciones): la lista de vueltas, donde cada vuelta es la
+        lista de eventos que se procesaron juntos, y el diccionario de opciones
+        de la cabecera (vacío si la sesión no la tiene).
+    """
+    vueltas = []
+    opciones = {}
+    saltados = set()
+    actual = None
+    with open(ruta, encoding="utf-8") as archivo:
+        for numero, linea in enumerate(archivo, start=1):
+            if not linea.strip():
+                continue
+            try:
+                datos = json.loads(linea)
+                if "opciones" in datos:
+                    opciones = dict(datos["opciones"])
+                    continue
+                evento = dict_a_evento(datos) if tipo_de_evento(datos["tipo"]) is not None else None
+            except (ValueError, KeyError, TypeError) as error:
+                raise ValueError(f"{ruta}:{numero}: {error}") from None
+            if datos.get("f") != actual or not vueltas:
+                # La vuelta se conserva aunque se salten todos sus eventos
+                vueltas.append([])
+                actual = datos.get("f")
+            if evento is not None:
+                vueltas[-1].append(evento)
+            elif datos["tipo"] not in saltados:
+                saltados.add(datos["tipo"])
+                log.warning("%s:%d: se saltan los eventos de tipo desconocido '%s'", ruta, numero, datos["tipo"])
+    return vueltas, opciones
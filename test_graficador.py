@@ -0,0 +1,107 @@
+# Pruebas de la lógica de eventos del graficador, sin ventana
+# Se corren con: python -m pytest
+
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np
+import pygame
+import pytest
+
+import primitivas as prim
+import seleccion
+from escena import CIRCULO, LINEA, dibujar_figura
+from graficador import Graficador, HERRAMIENTAS, PALETA, areaDibujo
+
+
+@pytest.fixture
+def app():
+    pygame.init()
+    return Graficador(pygame.Surface((1020, 650), 0, 32))
+
+
+def clic(app, pos, hasta=None):
+    """Presiona el botón izquierdo en pos, lo arrastra hasta 'hasta' (o no) y lo suelta."""
+    hasta = hasta or pos
+    app.procesar([pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=pos, button=1)])
+    app.procesar([pygame.event.Event(pygame.MOUSEMOTION, pos=hasta, rel=(0, 0), buttons=(1, 0, 0))])
+    app.procesar([pygame.event.Event(pygame.MOUSEBUTTONUP, pos=hasta, button=1)])
+
+
+def boton(app, valor):
+    """Centro del botón de la herramienta o el color dado."""
+    for b in app.botones:
+        if app.indice.buscar(b.rect.center)[1] is valor:
+            return b.rect.center
+    raise LookupError(valor)
+
+
+def test_arrastrar_en_el_lienzo_agrega_una_figura(app):
+    clic(app, (300, 300), (400, 350))
+    assert len(app.escena) == 1
+    assert app.escena.figura(0)[0] == LINEA
+
+
+@pytest.mark.parametrize("cual", ["color", "herramienta"])
+def test_clic_en_un_boton_no_agrega_figuras(app, cual):
+    clic(app, (300, 300), (400, 350))
+    valor = PALETA[0][2] if cual == "color" else HERRAMIENTAS["circulo"]
+    clic(app, boton(app, valor))
+    assert len(app.escena) == 1
+
+
+def test_arrastrar_desde_un_boton_no_dibuja(app):
+    clic(app, boton(app, PALETA[0][2]), areaDibujo.center)
+    assert len(app.escena) == 0
+
+
+def test_deshacer_tras_elegir_color_quita_el_ultimo_trazo(app):
+    clic(app, (300, 300), (400, 350))
+    clic(app, (200, 100), (250, 500))
+    clic(app, boton(app, PALETA[0][2]))
+    app.procesar([pygame.event.Event(pygame.KEYDOWN, key=pygame.K_z, mod=pygame.KMOD_LCTRL)])
+    assert len(app.escena) == 1
+    assert app.escena.figura(0)[1] == (230, 300, 330, 350)
+    assert app.historial.deshacer(app.documento, app.escena) is not None
+    assert not app.historial.puede_deshacer()
+
+
+@pytest.mark.parametrize("herramienta", ["linea", "elipse", "curva", "triangulo"])
+def test_la_vista_previa_pinta_lo_mismo_que_la_figura_confirmada(app, herramienta):
+    app.herramienta = herramienta
+    app.vista.desplazar(-137, -59)
+    documento = app.vista.a_pantalla(app.documento.get_rect())
+    for inicio, final in [((150, 90), (611, 377)), ((703, 512), (269, 131)), ((333, 444), (555, 101))]:
+        app.procesar([pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=inicio, button=1)])
+        app.procesar([pygame.event.Event(pygame.MOUSEMOTION, pos=final, rel=(0, 0), buttons=(1, 0, 0))])
+        previa = pygame.surfarray.array3d(app.screen.subsurface(documento))
+        app.procesar([pygame.event.Event(pygame.MOUSEBUTTONUP, pos=final, button=1)])
+        app.procesar([])
+        assert np.array_equal(pygame.surfarray.array3d(app.screen.subsurface(documento)), previa)
+
+
+def test_mover_la_seleccion_redibuja_las_vecinas_con_su_antialiasing(app):
+    # Contornos del mismo color que se pisan, con y sin antialiasing
+    anterior = prim.SUAVIZADO
+    try:
+        figuras = [(CIRCULO, (250, 200, 60), True), (LINEA, (180, 150, 330, 260), False),
+                   (CIRCULO, (270, 210, 55), True), (LINEA, (190, 260, 320, 140), True),
+                   (CIRCULO, (240, 190, 40), False), (LINEA, (200, 200, 340, 215), True)]
+        for tipo, p, activo in figuras:
+            prim.usar_suavizado(activo)
+            app.confirmar(tipo, p, (30, 30, 30))
+        prim.usar_suavizado(False)
+        app.elegir([2])
+        app.transformar_seleccion(seleccion.traslacion(6, 4))
+    finally:
+        prim.usar_suavizado(anterior)
+
+    esperado = pygame.Surface(app.documento.get_size(), 0, 32)
+    esperado.fill(app.documento.fondo)
+    for i, figura in enumerate(app.escena):
+        prim.usar_suavizado(bool(app.escena.suavizados[i]))
+        dibujar_figura(esperado, *figura)
+    prim.usar_suavizado(anterior)
+    documento = app.documento.subsurface(app.documento.get_rect())
+    assert np.array_equal(pygame.surfarray.array3d(documento), pygame.surfarray.array3d(esperado))
@@ -0,0 +1,92 @@
+# Pruebas del historial de deshacer/rehacer
+# Se corren con: python -m pytest
+
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np
+import pygame
+import pytest
+
+from escena import Escena, RECTANGULO_RELLENO, caja_figura, dibujar_figura
+from historial import Historial
+
+FONDO = (255, 255, 255)
+
+
+@pytest.fixture
+def lienzo():
+    pygame.init()
+    superficie = pygame.Surface((200, 150), 0, 32)
+    superficie.fill(FONDO)
+    return superficie
+
+
+def pixeles(superficie):
+    return pygame.surfarray.array3d(superficie).copy()
+
+
+def rectangulo(historial, lienzo, escena, x, y, color, lado=20):
+    """Registra y dibuja un rectángulo relleno como una acción, igual que Graficador.confirmar."""
+    p = (x, y, lado, lado)
+    with historial.accion(lienzo, caja_figura(RECTANGULO_RELLENO, p), escena, len(escena)):
+        escena.agregar(RECTANGULO_RELLENO, p, color)
+        dibujar_figura(lienzo, RECTANGULO_RELLENO, p, color)
+
+
+def test_deshacer_y_rehacer_restauran_pixeles_y_escena(lienzo):
+    historial, escena = Historial(), Escena()
+    estados = [pixeles(lienzo)]
+    for i, color in enumerate([(255, 0, 0), (0, 128, 0), (0, 0, 255)]):
+        rectangulo(historial, lienzo, escena, 10 + 15 * i, 10 + 10 * i, color)
+        estados.append(pixeles(lienzo))
+
+    for n in (2, 1, 0):
+        assert historial.deshacer(lienzo, escena)
+        assert len(escena) == n
+        assert np.array_equal(pixeles(lienzo), estados[n])
+    assert historial.deshacer(lienzo, escena) is None
+
+    for n in (1, 2, 3):
+        assert historial.rehacer(lienzo, escena)
+        assert len(escena) == n
+        assert np.array_equal(pixeles(lienzo), estados[n])
+    assert escena.figura(2)[2] == (0, 0, 255)
+    assert historial.rehacer(lienzo, escena) is None
+
+
+def test_una_accion_nueva_descarta_lo_que_habia_para_rehacer(lienzo):
+    historial, escena = Historial(), Escena()
+    rectangulo(historial, lienzo, escena, 10, 10, (255, 0, 0))
+    rectangulo(historial, lienzo, escena, 40, 40, (0, 0, 255))
+    historial.deshacer(lienzo, escena)
+    assert historial.puede_rehacer()
+
+    rectangulo(historial, lienzo, escena, 80, 20, (0, 128, 0))
+    assert not historial.puede_rehacer()
+    assert [escena.figura(i)[2] for i in range(len(escena))] == [(255, 0, 0), (0, 128, 0)]
+
+
+def test_el_limite_de_memoria_descarta_las_acciones_mas_viejas(lienzo):
+    escena = Escena()
+    medida = Historial()
+    rectangulo(medida, lienzo, escena, 0, 0, (1, 2, 3))
+    por_accion = medida.bytes_usados
+
+    # Caben unas tres acciones como la medida; se registran diez
+    historial, escena = Historial(limite_bytes=int(3.5 * por_accion)), Escena()
+    lienzo.fill(FONDO)
+    estados = [pixeles(lienzo)]
+    for i in range(10):
+        rectangulo(historial, lienzo, escena, 15 * i, 5 * i, (25 * i, 0, 255 - 25 * i))
+        estados.append(pixeles(lienzo))
+        assert historial.bytes_usados <= historial.limite_bytes
+
+    deshechas = 0
+    while historial.deshacer(lienzo, escena):
+        deshechas += 1
+        # Siempre se deshacen las más nuevas, en orden
+        assert np.array_equal(pixeles(lienzo), estados[10 - deshechas])
+        assert len(escena) == 10 - deshechas
+    assert 1 <= deshechas < 10
@@ -0,0 +1,96 @@
+# Pruebas del documento por teselas
+# Se corren con: python -m pytest
+
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np
+import pygame
+import pytest
+
+import primitivas as prim
+from escena import (
+    Escena, PAPELES, PARAMETROS, dibujar_figura,
+    LINEA, RECTANGULO, RECTANGULO_RELLENO, CIRCULO, CIRCULO_RELLENO, ELIPSE, TRIANGULO, CURVA, TRIANGULO_RELLENO,
+    TRAZO,
+)
+from mosaico import Mosaico
+
+ANCHO, ALTO = 500, 400
+TIPOS = [LINEA, RECTANGULO, RECTANGULO_RELLENO, CIRCULO, CIRCULO_RELLENO, ELIPSE, TRIANGULO, CURVA,
+         TRIANGULO_RELLENO, TRAZO]
+
+
+@pytest.fixture
+def suavizado():
+    pygame.init()
+    anterior = prim.SUAVIZADO
+    yield prim.usar_suavizado
+    prim.usar_suavizado(anterior)
+
+
+def figuras_al_azar(rng, n):
+    """n figuras (tipo, parametros, color) que cruzan bordes de teselas y del documento."""
+    figuras = []
+    for _ in range(n):
+        tipo = int(rng.choice(TIPOS))
+        p = rng.integers(-40, ANCHO + 40, len(PARAMETROS[tipo])).tolist()
+        for i, papel in enumerate(PAPELES[tipo]):
+            if papel == "m":
+                p[i] = int(rng.integers(0, 6 if tipo == TRAZO else 150))
+        figuras.append((tipo, tuple(p), tuple(rng.integers(0, 256, 3).tolist())))
+    return figuras
+
+
+def pixeles(superficie):
+    return pygame.surfarray.array3d(superficie)
+
+
+@pytest.mark.parametrize("activo", [False, True])
+def test_las_teselas_pintan_lo_mismo_que_una_sola_superficie(suavizado, activo):
+    suavizado(activo)
+    rng = np.random.default_rng(18)
+    for _ in range(40):
+        figuras = figuras_al_azar(rng, 3)
+        entera = pygame.Surface((ANCHO, ALTO), 0, 32)
+        entera.fill((255, 255, 255))
+        documento, escena = Mosaico(ANCHO, ALTO, lado=96), Escena()
+        for tipo, p, color in figuras:
+            dibujar_figura(entera, tipo, p, color)
+            documento.dibujar(tipo, p, color)
+            escena.agregar(tipo, p, color)
+        esperado = pixeles(entera)
+        assert np.array_equal(pixeles(documento.subsurface(documento.get_rect())), esperado), figuras
+
+        rasterizado = Mosaico(ANCHO, ALTO, lado=96)
+        rasterizado.rasterizar(escena, procesos=1)
+        assert np.array_equal(pixeles(rasterizado.subsurface(rasterizado.get_rect())), esperado), figuras
+
+        rasterizado.reconstruir(escena, (70, 50, 200, 180))
+        assert np.array_equal(pixeles(rasterizado.subsurface(rasterizado.get_rect())), esperado), figuras
+
+
+def test_cada_figura_se_reconstruye_con_su_antialiasing(suavizado):
+    # Figuras del mismo color que se pisan, unas con antialiasing y otras no
+    rng = np.random.default_rng(17)
+    figuras = [(tipo, p, (20, 40, 160)) for tipo, p, _ in figuras_al_azar(rng, 40)]
+    modos = rng.random(len(figuras)) < 0.6
+    entera = pygame.Surface((ANCHO, ALTO), 0, 32)
+    entera.fill((255, 255, 255))
+    escena = Escena()
+    for (tipo, p, color), activo in zip(figuras, modos.tolist()):
+        suavizado(activo)
+        dibujar_figura(entera, tipo, p, color)
+        escena.agregar(tipo, p, color)
+    assert escena.suavizados[:len(escena)].tolist() == modos.tolist()
+
+    for activo in (False, True):
+        # El modo global al reconstruir no cambia nada
+        suavizado(activo)
+        sola = pygame.Surface((ANCHO, ALTO), 0, 32)
+        escena.renderizar(sola)
+        documento = Mosaico(ANCHO, ALTO, lado=96)
+        documento.rasterizar(escena, procesos=1)
+        assert np.array_equal(pixeles(sola), pixeles(entera))
+        assert np.array_equal(pixeles(documento.subsurface(documento.get_rect())), pixeles(entera))
@@ -0,0 +1,113 @@
+# Pruebas de las primitivas de rasterizado
+# Se corren con: python -m pytest
+
+import os
+from collections import deque
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np
+import pygame
+import pytest
+
+import primitivas as prim
+
+FONDO = (255, 255, 255)
+COLOR = (200, 30, 60)
+
+
+@pytest.fixture
+def superficie():
+    pygame.init()
+    screen = pygame.Surface((400, 300), 0, 32)
+    screen.fill(FONDO)
+    return screen
+
+
+@pytest.fixture
+def tramos(monkeypatch):
+    """Lista donde se anotan los tramos (y, x_inicio, x_fin) que recibe fill_spans."""
+    anotados = []
+    original = prim.fill_spans
+
+    def anotar(screen, spans, color):
+        anotados.extend(np.asarray(spans, dtype=np.intp).reshape(-1, 3).tolist())
+        return original(screen, spans, color)
+
+    monkeypatch.setattr(prim, "fill_spans", anotar)
+    return anotados
+
+
+def _pintados(screen):
+    return int((pygame.surfarray.array3d(screen) != FONDO).any(axis=2).sum())
+
+
+@pytest.mark.parametrize("r", [0, 1, 2, 3, 7, 20, 64, 140])
+def test_circulo_relleno_escribe_cada_fila_una_vez(superficie, tramos, r):
+    prim.filled_circle_bresenham(superficie, 200, 150, r, COLOR)
+
+    filas = [y for y, _, _ in tramos]
+    assert len(filas) == len(set(filas))
+    assert sorted(filas) == list(range(min(filas), max(filas) + 1))
+    assert sum(x1 - x0 + 1 for _, x0, x1 in tramos) == _pintados(superficie)
+
+
+@pytest.mark.parametrize("xc, yc, r", [(10, 20, 60), (390, 290, 45), (200, -30, 100)])
+def test_circulo_relleno_recortado_escribe_cada_fila_una_vez(superficie, tramos, xc, yc, r):
+    clip = superficie.get_clip()
+    prim.filled_circle_bresenham(superficie, xc, yc, r, COLOR)
+
+    filas = [y for y, _, _ in tramos]
+    assert len(filas) == len(set(filas))
+    assert all(clip.top <= y < clip.bottom for y in filas)
+    escritos = sum(max(min(x1, clip.right - 1) - max(x0, clip.left) + 1, 0)
+                   for y, x0, x1 in tramos if clip.top <= y < clip.bottom)
+    assert escritos == _pintados(superficie)
+
+
+def _relleno_ingenuo(pixeles, x, y, tolerancia, clip):
+    """Máscara de la región que debe rellenar el balde, recorriendo píxel por píxel con una cola (4 vecinos)."""
+    semilla = pixeles[x, y].astype(int)
+    parecidos = (np.abs(pixeles.astype(int) - semilla) <= tolerancia).all(axis=2)
+    region = np.zeros(parecidos.shape, dtype=bool)
+    region[x, y] = True
+    cola = deque([(x, y)])
+    while cola:
+        px, py = cola.popleft()
+        for vx, vy in ((px + 1, py), (px - 1, py), (px, py + 1), (px, py - 1)):
+            if (clip.left <= vx < clip.right and clip.top <= vy < clip.bottom
+                    and parecidos[vx, vy] and not region[vx, vy]):
+                region[vx, vy] = True
+                cola.append((vx, vy))
+    return region
+
+
+@pytest.mark.parametrize("tolerancia", [0, 6, 25, 90, 255])
+@pytest.mark.parametrize("recortada", [False, True])
+def test_el_balde_rellena_lo_mismo_que_una_busqueda_pixel_por_pixel(tolerancia, recortada):
+    pygame.init()
+    rng = np.random.default_rng(16 + tolerancia)
+    ancho, alto = 37, 23
+    for prueba in range(30):
+        # Unos pocos colores, con ruido cuando hay tolerancia
+        paleta = rng.integers(0, 256, (3, 3))
+        pixeles = paleta[rng.choice(3, (ancho, alto), p=[0.55, 0.3, 0.15])]
+        if tolerancia:
+            pixeles = np.clip(pixeles + rng.integers(-tolerancia, tolerancia + 1, pixeles.shape), 0, 255)
+        screen = pygame.Surface((ancho, alto), 0, 32)
+        pygame.surfarray.blit_array(screen, pixeles.astype(np.uint8))
+        clip = pygame.Rect(5, 3, 24, 15) if recortada else screen.get_rect()
+        screen.set_clip(clip)
+
+        # La mitad de las semillas en un borde del área de recorte
+        x, y = int(rng.integers(clip.left, clip.right)), int(rng.integers(clip.top, clip.bottom))
+        x, y = [(x, y), (clip.left, y), (clip.right - 1, y), (x, clip.top), (x, clip.bottom - 1)][prueba % 5]
+        antes = pygame.surfarray.array3d(screen)
+        region = _relleno_ingenuo(antes, x, y, tolerancia, clip)
+
+        zona = prim.flood_fill(screen, x, y, COLOR, tolerancia)
+        esperado = antes.copy()
+        esperado[region] = COLOR
+        assert np.array_equal(pygame.surfarray.array3d(screen), esperado), (prueba, x, y)
+        xs, ys = np.nonzero(region)
+        assert zona.contains((xs.min(), ys.min(), xs.max() - xs.min() + 1, ys.max() - ys.min() + 1))
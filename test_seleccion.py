@@ -0,0 +1,148 @@
+# Pruebas del índice espacial de figuras y de las transformaciones de la selección
+# Se corren con: python -m pytest
+
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np
+import pygame
+import pytest
+
+from escena import (
+    Escena, PAPELES, PARAMETROS, MAX_LADOS_ABANICO, MAX_PARAMETROS, cajas_figuras, transformar, transformar_afin,
+    LINEA, RECTANGULO, RECTANGULO_RELLENO, CIRCULO, CIRCULO_RELLENO, ELIPSE, TRIANGULO, CURVA, TRIANGULO_RELLENO,
+    RELLENO, TRAZO,
+)
+from seleccion import IndiceFiguras, escalado, reflexion, rotacion, traslacion
+
+
+def escena_al_azar(rng, n, lejos=3000):
+    """Escena con n figuras de todo tipo, algunas enormes y algunas en coordenadas negativas."""
+    escena = Escena()
+    tipos = [LINEA, RECTANGULO, RECTANGULO_RELLENO, CIRCULO, CIRCULO_RELLENO, ELIPSE, TRIANGULO, CURVA,
+             TRIANGULO_RELLENO, TRAZO]
+    for _ in range(n):
+        tipo = int(rng.choice(tipos))
+        p = rng.integers(-200, 1200, len(PARAMETROS[tipo])).tolist()
+        for i, papel in enumerate(PAPELES[tipo]):
+            if papel == "m":
+                p[i] = int(rng.integers(0, 8 if tipo == TRAZO else (lejos if rng.random() < 0.1 else 80)))
+        escena.agregar(tipo, p, (0, 0, 0))
+    return escena
+
+
+def tocan(cajas, rect):
+    return np.flatnonzero((cajas[:, 0] < rect.right) & (cajas[:, 2] > rect.left)
+                          & (cajas[:, 1] < rect.bottom) & (cajas[:, 3] > rect.top))
+
+
+def test_en_rect_y_contenidas_coinciden_con_recorrer_todas_las_cajas():
+    rng = np.random.default_rng(24)
+    escena = escena_al_azar(rng, 400)
+    indice = IndiceFiguras(escena, celda=32)
+    cajas = cajas_figuras(escena.tipos[:len(escena)], escena.parametros[:len(escena)])
+    indice.actualizar()
+    assert len(indice.grandes)  # Hay figuras que no se reparten en la rejilla
+
+    for _ in range(200):
+        rect = pygame.Rect(*rng.integers(-300, 1300, 2).tolist(), *rng.integers(0, 400, 2).tolist())
+        esperadas = tocan(cajas, rect) if rect else np.empty(0, dtype=np.intp)
+        assert indice.en_rect(rect).tolist() == esperadas.tolist()
+        dentro = esperadas[(cajas[esperadas, 0] >= rect.left) & (cajas[esperadas, 2] <= rect.right)
+                           & (cajas[esperadas, 1] >= rect.top) & (cajas[esperadas, 3] <= rect.bottom)]
+        assert indice.contenidas(rect).tolist() == dentro.tolist()
+
+
+def test_el_indice_se_rehace_cuando_cambia_la_escena():
+    escena = Escena()
+    escena.agregar(RECTANGULO_RELLENO, (10, 10, 20, 20), (0, 0, 0))
+    indice = IndiceFiguras(escena)
+    assert indice.en_rect((500, 500, 10, 10)).tolist() == []
+
+    escena.agregar(CIRCULO, (505, 505, 3), (0, 0, 0))
+    assert indice.en_rect((500, 500, 10, 10)).tolist() == [1]
+    escena.recortar(1)
+    assert indice.en_rect((500, 500, 10, 10)).tolist() == []
+
+
+def test_en_punto_elige_la_figura_de_arriba_que_se_ve():
+    escena = Escena()
+    escena.agregar(RECTANGULO_RELLENO, (0, 0, 100, 100), (255, 0, 0))
+    escena.agregar(CIRCULO, (50, 50, 30), (0, 0, 255))
+    escena.agregar(RELLENO, (5, 5, 0), (0, 255, 0))
+    indice = IndiceFiguras(escena)
+    assert indice.en_punto(80, 50, radio=1) == 1    # Sobre el contorno del círculo
+    assert indice.en_punto(50, 50, radio=1) == 0    # Dentro del círculo sólo se ve el rectángulo
+    assert indice.en_punto(5, 5, radio=1) == 0      # El balde no se elige
+    assert indice.en_punto(300, 300) is None
+
+
+def aplicar(matriz, x, y):
+    x, y, _ = matriz @ np.array([x, y, 1.0])
+    return round(x, 9), round(y, 9)
+
+
+def test_las_matrices_dejan_fijo_su_centro():
+    centro = (120, -40)
+    for matriz in (escalado(3, 0.5, centro), rotacion(37, centro), reflexion(True, centro), reflexion(False, centro)):
+        assert aplicar(matriz, *centro) == centro
+    assert aplicar(traslacion(5, -7), 1, 2) == (6, -5)
+    assert aplicar(rotacion(90), 10, 0) == (0, 10)  # Horario en pantalla: x hacia y
+    assert aplicar(reflexion(True, (10, 0)), 0, 3) == (20, 3)
+    assert aplicar(reflexion(False, (0, 10)), 3, 0) == (3, 20)
+
+
+def filas(tipos, p):
+    parametros = np.zeros((len(tipos), MAX_PARAMETROS), dtype=np.int32)
+    for i, fila in enumerate(p):
+        parametros[i, :len(fila)] = fila
+    return np.array(tipos, dtype=np.uint8), parametros
+
+
+def test_traslacion_afin_es_la_de_transformar():
+    rng = np.random.default_rng(7)
+    escena = escena_al_azar(rng, 200)
+    tipos, parametros = escena.tipos[:len(escena)], escena.parametros[:len(escena)]
+    nuevos_tipos, nuevos, origen = transformar_afin(tipos, parametros, traslacion(13, -21))
+    assert origen.tolist() == list(range(len(escena)))
+    assert np.array_equal(nuevos_tipos, tipos)
+    assert np.array_equal(nuevos, transformar(tipos, parametros, 1, 13, -21))
+
+
+def test_cuatro_cuartos_de_vuelta_devuelven_las_figuras():
+    rng = np.random.default_rng(8)
+    escena = escena_al_azar(rng, 200)
+    tipos, parametros = escena.tipos[:len(escena)], escena.parametros[:len(escena)]
+    t, p = tipos, parametros
+    for _ in range(4):
+        t, p, origen = transformar_afin(t, p, rotacion(90, (300, 200)))
+        assert origen.tolist() == list(range(len(escena)))  # Los ejes siguen en los ejes: no cambian de tipo
+    assert np.array_equal(t, tipos)
+    assert np.array_equal(p, parametros)
+
+
+@pytest.mark.parametrize("tipo, p, matriz, esperados", [
+    (RECTANGULO, (0, 0, 40, 20), rotacion(30), [LINEA] * 4),
+    (RECTANGULO_RELLENO, (0, 0, 40, 20), rotacion(30), [TRIANGULO_RELLENO] * 2),
+    (CIRCULO, (50, 50, 20), escalado(2, 1), [ELIPSE]),
+    (CIRCULO, (50, 50, 20), rotacion(45) @ escalado(2, 1), [CURVA] * 4),
+    (ELIPSE, (50, 50, 20, 10), rotacion(90), [ELIPSE]),
+    (CIRCULO_RELLENO, (50, 50, 20), rotacion(45), [CIRCULO_RELLENO]),
+    (TRIANGULO, (0, 0, 10, 0, 0, 10), escalado(3, -2), [TRIANGULO]),
+])
+def test_las_figuras_alineadas_a_los_ejes_cambian_de_tipo_solo_si_hace_falta(tipo, p, matriz, esperados):
+    tipos, parametros = filas([tipo, LINEA], [p, (1, 2, 3, 4)])
+    nuevos_tipos, nuevos, origen = transformar_afin(tipos, parametros, matriz)
+    assert nuevos_tipos.tolist() == esperados + [LINEA]
+    assert origen.tolist() == [0] * len(esperados) + [1]
+
+
+def test_el_circulo_relleno_deformado_pasa_a_un_abanico_desde_su_centro():
+    tipos, parametros = filas([CIRCULO_RELLENO], [(100, 100, 30)])
+    matriz = rotacion(20, (100, 100)) @ escalado(2, 1, (100, 100))
+    nuevos_tipos, nuevos, origen = transformar_afin(tipos, parametros, matriz)
+    assert set(nuevos_tipos.tolist()) == {TRIANGULO_RELLENO}
+    assert 2 < len(nuevos_tipos) <= MAX_LADOS_ABANICO and (origen == 0).all()
+    # Todos los triángulos salen del centro, que no se mueve
+    assert (nuevos[:, 0] == 100).all() and (nuevos[:, 1] == 100).all()
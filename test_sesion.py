@@ -0,0 +1,109 @@
+# Pruebas de la grabación y la reproducción de sesiones
+# Se corren con: python -m pytest
+
+import json
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+import pytest
+
+import primitivas as prim
+from escena import LINEA
+from graficador import Graficador
+from reproductor import TAMANO, huella_lienzo, reproducir
+from sesion import Grabador, leer_sesion
+
+
+@pytest.fixture(autouse=True)
+def iniciar():
+    pygame.init()
+    anterior = prim.SUAVIZADO
+    yield
+    prim.usar_suavizado(anterior)
+
+
+def arrastre(inicio, final):
+    """Vueltas de presionar en inicio, arrastrar hasta final y soltar."""
+    return [
+        [pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=inicio, button=1)],
+        [pygame.event.Event(pygame.MOUSEMOTION, pos=final, rel=(0, 0), buttons=(1, 0, 0))],
+        [pygame.event.Event(pygame.MOUSEBUTTONUP, pos=final, button=1)],
+    ]
+
+
+def test_la_sesion_guarda_las_opciones_en_la_cabecera(tmp_path):
+    ruta = tmp_path / "sesion.jsonl"
+    opciones = {"documento": [300, 200], "tolerancia": 40, "suavizado": True, "archivo": None}
+    grabador = Grabador(ruta, opciones)
+    for vuelta in arrastre((300, 300), (400, 350)):
+        grabador.registrar(vuelta)
+    grabador.cerrar()
+
+    vueltas, leidas = leer_sesion(ruta)
+    assert leidas == opciones
+    assert [[evento.type for evento in vuelta] for vuelta in vueltas] == [
+        [pygame.MOUSEBUTTONDOWN], [pygame.MOUSEMOTION], [pygame.MOUSEBUTTONUP]]
+    assert vueltas[2][0].pos == (400, 350)
+
+
+def test_una_sesion_sin_cabecera_usa_las_opciones_por_defecto(tmp_path):
+    ruta = tmp_path / "sesion.jsonl"
+    ruta.write_text('{"f":0,"t":0,"tipo":"MouseButtonDown","pos":[1,2],"button":1}\n', encoding="utf-8")
+    vueltas, opciones = leer_sesion(ruta)
+    assert opciones == {}
+    assert vueltas[0][0].pos == (1, 2)
+
+
+def test_los_eventos_de_tipo_desconocido_se_saltan(tmp_path, caplog):
+    ruta = tmp_path / "sesion.jsonl"
+    lineas = [
+        {"f": 0, "t": 0, "tipo": "AppTerminating"},
+        {"f": 1, "t": 5, "tipo": "RenderTargetsReset"},
+        {"f": 1, "t": 5, "tipo": "EventoDeOtraVersion"},
+        {"f": 2, "t": 9, "tipo": "EventoDeOtraVersion"},
+        {"f": 3, "t": 12, "tipo": "ControllerDeviceMapped"},
+    ]
+    ruta.write_text("".join(json.dumps(datos) + "\n" for datos in lineas), encoding="utf-8")
+    vueltas, _ = leer_sesion(ruta)
+    assert [[evento.type for evento in vuelta] for vuelta in vueltas] == [
+        [pygame.APP_TERMINATING], [pygame.RENDER_TARGETS_RESET], [], [pygame.CONTROLLERDEVICEREMAPPED]]
+    assert caplog.text.count("EventoDeOtraVersion") == 1
+
+
+def test_una_linea_rota_sigue_siendo_un_error(tmp_path):
+    ruta = tmp_path / "sesion.jsonl"
+    ruta.write_text('{"f":0,"t":0,"tipo":"MouseButtonDown"}\n{"f":1,\n', encoding="utf-8")
+    with pytest.raises(ValueError, match="sesion.jsonl:2"):
+        leer_sesion(ruta)
+
+
+def test_la_reproduccion_usa_las_opciones_grabadas():
+    vueltas = arrastre((150, 90), (611, 377)) + arrastre((703, 512), (269, 131))
+    opciones = {"documento": [640, 480], "tolerancia": 40, "suavizado": True, "archivo": None}
+
+    prim.usar_suavizado(True)
+    app = Graficador(pygame.Surface(TAMANO, 0, 32), tolerancia=40, documento=(640, 480))
+    app.dibujar_paneles(app.screen)
+    for vuelta in vueltas:
+        app.procesar(vuelta)
+    prim.usar_suavizado(False)
+
+    informe = reproducir(vueltas, opciones)
+    assert informe["hash"] == huella_lienzo(app.lienzo)
+    assert informe["hash"] != reproducir(vueltas)["hash"]
+    assert not prim.SUAVIZADO  # El modo global vuelve a como estaba
+
+
+def test_la_reproduccion_abre_el_archivo_grabado_sin_sobrescribirlo(tmp_path):
+    ruta = tmp_path / "dibujo.svg"
+    app = Graficador(pygame.Surface(TAMANO, 0, 32))
+    app.confirmar(LINEA, (10, 10, 200, 120), (255, 0, 0))
+    app.guardar(str(ruta))
+    contenido = ruta.read_bytes()
+
+    guardar = [[pygame.event.Event(pygame.KEYDOWN, key=pygame.K_s, mod=pygame.KMOD_LCTRL)]]
+    informe = reproducir(arrastre((300, 300), (400, 350)) + guardar, {"archivo": str(ruta)})
+    assert informe["figuras"] == 2
+    assert ruta.read_bytes() == contenido
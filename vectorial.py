@@ -0,0 +1,296 @@
+# Exportación e importación vectorial (SVG) de las figuras del programa de dibujo
+# Guarda los parámetros de cada figura de la escena en vez de sus píxeles: un
+# archivo pequeño que se puede volver a dibujar a cualquier resolución.
+#
+# El balde no tiene equivalente en SVG (su región depende de los píxeles), así
+# que se guarda como <graficador:relleno x y tolerancia fill/> en un espacio de
+# nombres propio: los visores lo ignoran y leer_svg lo recupera.
+#
+# El antialiasing de cada contorno va en su atributo shape-rendering:
+# crispEdges (pincel de 2x2) o geometricPrecision (suavizado), que los
+# visores también respetan.
+#
+# Tanto la escritura como la lectura avanzan de a una figura, así que la
+# memoria no crece con el tamaño del documento.
+
+import xml.etree.ElementTree as ET
+from functools import lru_cache
+
+import numpy as np
+
+import primitivas as prim
+from escena import (
+    CONTORNOS, Escena, PARAMETROS, MAX_PARAMETROS,
+    LINEA, RECTANGULO, RECTANGULO_RELLENO, CIRCULO, CIRCULO_RELLENO, ELIPSE, TRIANGULO, CURVA,
+    TRIANGULO_RELLENO, RELLENO, TRAZO,
+)
+
+SVG = "http://www.w3.org/2000/svg"
+GRAFICADOR = "https://github.com/handrrey/Graficador"
+GROSOR = 2  # Ancho del trazo: el pincel de las primitivas es de 2x2
+
+# Figuras que se escriben, o se añaden a la escena al leer, de una vez
+LOTE = 4096
+
+# Valor de shape-rendering de los contornos según si llevan antialiasing
+RENDERIZADO = {False: "crispEdges", True: "geometricPrecision"}
+SUAVIZADO_DE = {valor: suavizado for suavizado, valor in RENDERIZADO.items()}
+
+
+def _color(color):
+    return "#%02x%02x%02x" % tuple(color)
+
+
+def _figura_svg(tipo, p, color, suavizado=None):
+    """Elemento SVG de una figura, como texto; con suavizado dado, los contornos llevan shape-rendering."""
+    elemento = _elemento_svg(tipo, p, color)
+    if suavizado is None or tipo not in CONTORNOS:
+        return elemento
+    return f'{elemento[:-2]} shape-rendering="{RENDERIZADO[bool(suavizado)]}"/>'
+
+
+def _elemento_svg(tipo, p, color):
+    """Elemento SVG de una figura sin su modo de antialiasing, como texto."""
+    c = _color(color)
+    trazo = f'fill="none" stroke="{c}"'
+    relleno = f'fill="{c}"'
+    if tipo == LINEA:
+        return f'<line x1="{p[0]}" y1="{p[1]}" x2="{p[2]}" y2="{p[3]}" stroke="{c}"/>'
+    if tipo in (RECTANGULO, RECTANGULO_RELLENO):
+        # SVG no admite anchos negativos: se mueve la esquina
+        x, ancho = (p[0] + p[2], -p[2]) if p[2] < 0 else (p[0], p[2])
+        y, alto = (p[1] + p[3], -p[3]) if p[3] < 0 else (p[1], p[3])
+        estilo = trazo if tipo == RECTANGULO else relleno
+        return f'<rect x="{x}" y="{y}" width="{ancho}" height="{alto}" {estilo}/>'
+    if tipo in (CIRCULO, CIRCULO_RELLENO):
+        estilo = trazo if tipo == CIRCULO else relleno
+        return f'<circle cx="{p[0]}" cy="{p[1]}" r="{abs(p[2])}" {estilo}/>'
+    if tipo == ELIPSE:
+        return f'<ellipse cx="{p[0]}" cy="{p[1]}" rx="{abs(p[2])}" ry="{abs(p[3])}" {trazo}/>'
+    if tipo in (TRIANGULO, TRIANGULO_RELLENO):
+        estilo = trazo if tipo == TRIANGULO else relleno
+        return f'<polygon points="{p[0]},{p[1]} {p[2]},{p[3]} {p[4]},{p[5]}" {estilo}/>'
+    if tipo == CURVA:
+        return (f'<path d="M{p[0]},{p[1]} C{p[2]},{p[3]} {p[4]},{p[5]} {p[6]},{p[7]}" {trazo}/>')
+    if tipo == TRAZO:
+        # El pincel redondo de radio r tiene 2r + 1 píxeles de ancho
+        return (f'<line x1="{p[0]}" y1="{p[1]}" x2="{p[2]}" y2="{p[3]}" stroke="{c}" '
+                f'stroke-width="{2 * abs(p[4]) + 1}" stroke-linecap="round"/>')
+    if tipo == RELLENO:
+        return f'<graficador:relleno x="{p[0]}" y="{p[1]}" tolerancia="{p[2]}" {relleno}/>'
+    raise ValueError(f"Tipo de figura desconocido: {tipo}")
+
+
+class EscritorSVG:
+    """
+    Escribe un SVG figura a figura, sin guardar el documento en memoria.
+
+    Se usa como contexto:
+
+        with EscritorSVG(archivo, 880, 650) as svg:
+            svg.figura(LINEA, (0, 0, 100, 100), (255, 0, 0))
+    """
+
+    def __init__(self, archivo, ancho, alto, fondo=(255, 255, 255)):
+        """
+        Constructor de la clase EscritorSVG
+        :param archivo: archivo de texto abierto para escribir
+        :param ancho: ancho del documento en píxeles
+        :param alto: alto del documento en píxeles
+        :param fondo: color de fondo, o None para dejarlo transparente
+        """
+        self.archivo = archivo
+        archivo.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<svg xmlns="{SVG}" xmlns:graficador="{GRAFICADOR}" '
+            f'width="{ancho}" height="{alto}" viewBox="0 0 {ancho} {alto}">\n'
+        )
+        if fondo is not None:
+            archivo.write(f'<rect id="fondo" width="{ancho}" height="{alto}" fill="{_color(fondo)}"/>\n')
+        # Los contornos usan el grosor del pincel y esquinas en escuadra como el pincel cuadrado
+        archivo.write(f'<g stroke-width="{GROSOR}" stroke-linecap="square" stroke-linejoin="miter">\n')
+
+    def figura(self, tipo, p, color, suavizado=None):
+        """
+        Escribe una figura con sus parámetros en el orden de PARAMETROS[tipo];
+        con suavizado None no se indica su antialiasing.
+        """
+        self.archivo.write(_figura_svg(tipo, p, color, suavizado) + "\n")
+
+    def escena(self, escena):
+        """Escribe todas las figuras de una escena, de a LOTE por vez."""
+        for inicio in range(0, len(escena), LOTE):
+            fin = min(inicio + LOTE, len(escena))
+            tipos = escena.tipos[inicio:fin].tolist()
+            parametros = escena.parametros[inicio:fin].tolist()
+            colores = escena.colores[inicio:fin].tolist()
+            suavizados = escena.suavizados[inicio:fin].tolist()
+            self.archivo.write("".join(
+                _figura_svg(t, p[:len(PARAMETROS[t])], c, s) + "\n"
+                for t, p, c, s in zip(tipos, parametros, colores, suavizados)
+            ))
+
+    def cerrar(self):
+        self.archivo.write("</g>\n</svg>\n")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar()
+
+
+def escribir_svg(ruta, escena, ancho, alto, fondo=(255, 255, 255)):
+    """Guarda una escena en un archivo SVG."""
+    with open(ruta, "w", encoding="utf-8") as archivo, EscritorSVG(archivo, ancho, alto, fondo) as svg:
+        svg.escena(escena)
+
+
+@lru_cache(maxsize=1024)
+def _leer_color(texto):
+    """Color '#rrggbb' o '#rgb' como tupla; None si es 'none', falta o no se entiende."""
+    if not texto or not texto.startswith("#"):
+        return None
+    texto = texto[1:]
+    if len(texto) == 3:
+        texto = "".join(c * 2 for c in texto)
+    try:
+        return tuple(bytes.fromhex(texto))[:3] if len(texto) == 6 else None
+    except ValueError:
+        return None
+
+
+def _entero(texto):
+    """Número de un atributo, redondeado; los que escribe EscritorSVG ya son enteros."""
+    try:
+        return int(texto)
+    except ValueError:
+        return int(round(float(texto)))
+
+
+def _numeros(texto):
+    """Números de una lista de puntos o de un trazado ('M10,20 C...'), redondeados."""
+    for letra in "MCLmcl,":
+        texto = texto.replace(letra, " ")
+    return [_entero(v) for v in texto.split()]
+
+
+def _figura_desde(nombre, a):
+    """
+    Figura (tipo, parametros, color) de un elemento SVG, o None si no se puede representar.
+
+    Args:
+        nombre: Nombre del elemento sin espacio de nombres
+        a: Atributos del elemento
+    """
+    def n(clave):
+        return _entero(a.get(clave, "0"))
+
+    relleno = _leer_color(a.get("fill", "#000"))  # En SVG, sin fill se rellena de negro
+    trazo = _leer_color(a.get("stroke"))
+    color = relleno or trazo
+
+    if nombre == "line" and trazo and a.get("stroke-linecap") == "round":
+        return TRAZO, (n("x1"), n("y1"), n("x2"), n("y2"), _entero(a.get("stroke-width", str(GROSOR))) // 2), trazo
+    if nombre == "line" and trazo:
+        return LINEA, (n("x1"), n("y1"), n("x2"), n("y2")), trazo
+    if nombre == "rect" and color:
+        return (RECTANGULO_RELLENO if relleno else RECTANGULO), (n("x"), n("y"), n("width"), n("height")), color
+    if nombre == "circle" and color:
+        return (CIRCULO_RELLENO if relleno else CIRCULO), (n("cx"), n("cy"), n("r")), color
+    if nombre == "ellipse" and trazo:
+        return ELIPSE, (n("cx"), n("cy"), n("rx"), n("ry")), trazo
+    if nombre == "polygon" and color:
+        puntos = _numeros(a.get("points", ""))
+        if len(puntos) == 6:
+            return (TRIANGULO_RELLENO if relleno else TRIANGULO), tuple(puntos), color
+    if nombre == "path" and trazo:
+        d = a.get("d", "").strip()
+        puntos = _numeros(d)
+        if d.startswith("M") and "C" in d and len(puntos) == 8:
+            return CURVA, tuple(puntos), trazo
+        if d.startswith("M") and "L" in d and len(puntos) == 4:
+            return LINEA, tuple(puntos), trazo
+    if nombre == "relleno" and relleno:
+        return RELLENO, (n("x"), n("y"), n("tolerancia")), relleno
+    return None
+
+
+class _Lector:
+    """
+    Destino del analizador XML: recibe cada etiqueta al abrirse y junta las
+    figuras en lotes. No se arma el árbol, así que la memoria no crece con
+    el archivo.
+    """
+
+    def __init__(self):
+        self.escena = Escena()
+        self.opciones = {}
+        self.raiz = None
+        self.lote = ([], [], [], [])  # tipos, parámetros completados hasta MAX_PARAMETROS, colores, suavizados
+
+    def start(self, etiqueta, atributos):
+        nombre = etiqueta.rpartition("}")[2]
+        if self.raiz is None:
+            self.raiz = nombre
+            if nombre != "svg":
+                raise ValueError("no es un SVG")
+            for clave, atributo in (("ancho", "width"), ("alto", "height")):
+                valor = atributos.get(atributo, "").removesuffix("px")
+                if valor.replace(".", "", 1).isdigit():
+                    self.opciones[clave] = _entero(valor)
+            return
+
+        if nombre == "rect" and atributos.get("id") == "fondo":
+            self.opciones["fondo"] = _leer_color(atributos.get("fill")) or (255, 255, 255)
+            return
+        figura = _figura_desde(nombre, atributos)
+        if figura is not None:
+            tipo, parametros, color = figura
+            tipos, todos, colores, suavizados = self.lote
+            tipos.append(tipo)
+            todos.append(parametros + (0,) * (MAX_PARAMETROS - len(parametros)))
+            colores.append(color)
+            # Sin shape-rendering (otros programas, el balde) se usa el modo global
+            suavizados.append(SUAVIZADO_DE.get(atributos.get("shape-rendering"), prim.SUAVIZADO))
+            if len(tipos) >= LOTE:
+                self.vaciar_lote()
+
+    def end(self, etiqueta):
+        pass
+
+    def vaciar_lote(self):
+        tipos, parametros, colores, suavizados = self.lote
+        if tipos:
+            self.escena.extender((np.array(tipos, dtype=np.uint8), np.array(parametros, dtype=np.int32),
+                                  np.array(colores, dtype=np.uint8), np.array(suavizados, dtype=bool)))
+        self.lote = ([], [], [], [])
+
+    def close(self):
+        self.vaciar_lote()
+        return self.escena, self.opciones
+
+
+def leer_svg(ruta):
+    """
+    Reconstruye una escena desde un SVG.
+
+    Lee los SVG que escribe EscritorSVG y, de otros, las líneas (las de
+    extremos redondos, como trazos del pincel), rectángulos, círculos,
+    elipses, triángulos y curvas cúbicas sueltas; los demás elementos (y las
+    transformaciones) se ignoran. Cada contorno toma su antialiasing de
+    shape-rendering, o de prim.SUAVIZADO si no lo indica. El archivo se lee
+    por bloques y no se arma el árbol XML.
+
+    Returns:
+        Tupla (escena, opciones) con "ancho", "alto" y "fondo" en opciones
+        si el archivo los indica, como las funciones de renderizador.
+    """
+    analizador = ET.XMLParser(target=_Lector())
+    try:
+        with open(ruta, "rb") as archivo:
+            while bloque := archivo.read(1 << 16):
+                analizador.feed(bloque)
+        return analizador.close()
+    except ET.ParseError as error:
+        raise ValueError(str(error)) from None